@@ -14,10 +14,26 @@ import numpy.random as rd
 import matplotlib.pyplot as plt
 import pandas as pd
 import scipy.stats as stats
-import copy
+import os
+import glob
+import pickle
+import hashlib
+import inspect
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+# compiled kernels are optional (only required for the numba backend)
+try:
+    import kernels
+except ImportError:
+    kernels = None
 
 # imports from other python files
-from agents import Renters, Landlords
+from agents import Renters, Landlords, CompiledRenters, CompiledLandlords
+from replicas import runReplicaMonths, runReplicaIntervention
+from results import ResultsCube, OnlineResults
+from streams import RandomStreams, createGenerator
+from profiler import profiler
 from setup import path_plots
 from parameters import (inc_factor_state, income_min, preferences_mean, 
                         preferences_std, income_max, max_rent_share, 
@@ -29,298 +45,643 @@ from parameters import (inc_factor_state, income_min, preferences_mean,
                         req_utility_improvement, req_n_preferred_options, 
                         max_sample_applicants, max_applications, cycles,
                         quality_apartment, q_threshold, min_n_comparable,
-                        p_base_std, weight_quality, n_renters, n_apartments)
+                        p_base_std, weight_quality, n_renters, n_apartments,
+                        batched_selection, application_batch_size, 
+                        compact_mode, backend, lockstep, n_processes,
+                        checkpoint_interval, checkpoint_compression,
+                        cache_directory, cache_size, aggregate, 
+                        reservoir_size, ci_target, adaptive_batch, 
+                        common_random_numbers, antithetic, bit_generator,
+                        profiling, profile_directory)
+import parameters
 
 #%% [1] Methods for initializing and updating the population
 
 def initializeModel(n_renters, n_apartments, share_state_apartments, 
-                    state_price):
+                    state_price, rng=rd):
     """
-    Method that creates the initial population of landlords and renters.
+    Method that creates the initial population of landlords and renters. With
+    the numba backend, the compiled populations are created and the random
+    number generator of the kernels is seeded with a random draw. Random 
+    numbers are drawn from rng (numpy.random by default, see RandomStreams).
     """
+    landlords_class, renters_class = getPopulationClasses()
     # Calculate number of private and state landlords to be created
     n_private = int(n_apartments * (1 - share_state_apartments))
     n_state = int(n_apartments * share_state_apartments)
     # prepare quality ratings for all apartments so that it can be used for 
     # prices and quality arrays creation afterwards.
-    quality = np.append(quality_apartment[1] + (rd.rand(n_private) * 
+    quality = np.append(quality_apartment[1] + (rng.rand(n_private) * 
                         quality_apartment[0]), quality_apartment[1] + (
-                        rd.rand(n_state) * quality_max_public)) 
+                        rng.rand(n_state) * quality_max_public)) 
     # create instance of class Landlords containing entire landlord population
-    landlords = Landlords(
+    landlords = landlords_class(
+                compact = compact_mode,
                 private = np.append(np.ones(n_private,dtype=bool), 
                                     np.zeros(n_state,dtype=bool)),
                 apartment = np.arange(n_private+n_state)+1,
                 quality = quality,
                 price = np.append(
-                    rd.normal(state_price, p_base_std, n_private) + ( 
+                    rng.normal(state_price, p_base_std, n_private) + ( 
                     (quality[0:n_private]-quality_apartment[1]) 
                     * weight_quality), np.ones(n_state)*state_price),                            
                 available = np.ones(n_private+n_state,dtype=bool),
-                random = rd.rand(n_private+n_state))
+                random = rng.rand(n_private+n_state),
+                tenant = np.ones(n_private+n_state,dtype=int)*-1)
 
     # create instance of class Landlords containing entire renter population
-    renters = Renters(uid= np.arange(n_renters)+1, 
-                      apartment=np.ones(n_renters,dtype=int)*-1, 
-                      price=np.zeros(n_renters), 
-                      quality=np.zeros(n_renters),
-                      searching=np.ones(n_renters,dtype=bool),
-                      income=rd.uniform(income_min,income_max,n_renters),
-                      random=rd.rand(n_renters),
-                      preferences= rd.normal(preferences_mean, preferences_std,
-                                             n_renters),
-                      utility=np.zeros(n_renters))
+    renters = renters_class(compact = compact_mode,
+                            uid= np.arange(n_renters)+1, 
+                            apartment=np.ones(n_renters,dtype=int)*-1, 
+                            price=np.zeros(n_renters), 
+                            quality=np.zeros(n_renters),
+                            searching=np.ones(n_renters,dtype=bool),
+                            income=rng.uniform(income_min, income_max, 
+                                               n_renters),
+                            random=rng.rand(n_renters),
+                            preferences= rng.normal(preferences_mean, 
+                                                   preferences_std, n_renters),
+                            utility=np.zeros(n_renters))
+    # seed random number generator of compiled kernels
+    if backend == 'numba':
+        kernels.seed(rng.randint(2**31))
     return(renters,landlords)
 
-def updatePopulation(renters, landlords): 
+def getPopulationClasses():
+    """
+    Population classes of the selected backend (landlords and renters).
+    """
+    if backend == 'numba':
+        if kernels is None:
+            raise ImportError("The numba backend requires the package numba.")
+        return(CompiledLandlords, CompiledRenters)
+    return(Landlords, Renters)
+
+def updatePopulation(renters, landlords, rng=rd): 
     """
     Method that controls the joiner and leaver processes for renters. Leavers
     will leave the model entirely and joiners will start to look for an
-    apartment immediately after they have joined.
+    apartment immediately after they have joined. Random numbers are drawn 
+    from rng (numpy.random by default).
     """
     # randomly draw number of leavers from defined range for population share
     number_of_leavers = round(
-        rd.uniform(leaver_min,leaver_max)*len(renters.uid))
+        rng.uniform(leaver_min,leaver_max)*len(renters.uid))
     # randomly draw leavers and store their index
-    leaver_index = rd.randint(0,len(renters.uid),number_of_leavers)
-    #get apartment numbers of leavers 
-    leaver_apartments = renters.apartment[leaver_index]
+    leaver_index = rng.randint(0,len(renters.uid),number_of_leavers)
     # set apartment status for landlords of leavers to available
-    landlords.available[np.where(
-        np.isin(landlords.apartment,leaver_apartments))] = True
+    landlords.moveOut(renters.apartment[leaver_index])
     # remove leavers from population
-    renters.apartment = np.delete(renters.apartment, leaver_index)
-    renters.income = np.delete(renters.income, leaver_index)
-    renters.preferences = np.delete(renters.preferences, leaver_index)
-    renters.price = np.delete(renters.price, leaver_index)
-    renters.quality = np.delete(renters.quality, leaver_index)
-    renters.random = np.delete(renters.random, leaver_index)
-    renters.searching = np.delete(renters.searching, leaver_index)
-    renters.uid = np.delete(renters.uid, leaver_index)
-    renters.utility = np.delete(renters.utility, leaver_index)
+    renters.remove(leaver_index)
 
     # get number of joiners 
     number_of_joiners = round(
-        rd.uniform(joiner_min,joiner_max)*len(renters.uid))
-    # append attributes of joiners to arrays of existing population
+        rng.uniform(joiner_min,joiner_max)*len(renters.uid))
+    # append joiners to existing population (searching without apartment)
     uid_next = max(renters.uid) + 1
-    renters.uid = np.append(renters.uid, 
-                            np.arange(uid_next,uid_next + number_of_joiners,1))
-    renters.apartment = np.append(renters.apartment, 
-                                  np.ones(number_of_joiners, dtype=int)*-1)
-    renters.price = np.append(renters.price, np.zeros(number_of_joiners))
-    renters.quality = np.append(renters.quality, np.zeros(number_of_joiners))
-    renters.searching = np.append(renters.searching, 
-                                  np.ones(number_of_joiners, dtype=bool))
-    renters.income = np.append(renters.income, rd.uniform(
-        income_min, income_max, number_of_joiners))
-    renters.random = np.append(renters.random, rd.rand(number_of_joiners))
-    renters.preferences = np.append(renters.preferences, 
-        rd.normal(preferences_mean, preferences_std, number_of_joiners))
-    renters.utility = np.append(renters.utility, np.zeros(number_of_joiners))
+    renters.append(number_of_joiners,
+        uid = np.arange(uid_next,uid_next + number_of_joiners,1),
+        income = rng.uniform(income_min, income_max, number_of_joiners),
+        random = rng.rand(number_of_joiners),
+        preferences = rng.normal(preferences_mean, preferences_std, 
+                                number_of_joiners))
     return(renters, landlords)
 
-def updateApartments(renters, landlords):
+def updateApartments(renters, landlords, rng=rd):
     """
     Method that controls the construction of new as well as the demolition of
     existing apartments. Renters living in an apartment that will be demolished
-    also get updated. 
+    also get updated. Random numbers are drawn from rng (numpy.random by 
+    default).
     """
     # get number of apartments to be demolished  (randomly drawn from 
     # predefined range for share of the current population)
     number_of_demolitions = round(
-        rd.uniform(demolition_min, demolition_max)*len(landlords.apartment))
+        rng.uniform(demolition_min, demolition_max)*len(landlords.apartment))
     # get index of private apartments (no state apartments are demolished)
     private_index = np.where(landlords.private==True)[0]
     # randomly select private apartments to be demolished
-    demolition_index = rd.choice(private_index,number_of_demolitions)
-    # get apartment numbers of demolished apartment 
-    demolition_apartment = landlords.apartment[demolition_index]
+    demolition_index = rng.choice(private_index,number_of_demolitions)
+    # get uids of tenants living in a demolished apartment 
+    demolition_tenants = landlords.tenant[demolition_index]
     # update renters which are living in an apartment that will be domolished
-    renters.searching[np.where(
-        np.isin(renters.apartment, demolition_apartment))] = True
-    renters.price[np.where(
-        np.isin(renters.apartment, demolition_apartment))] = 0
-    renters.quality[np.where(
-        np.isin(renters.apartment, demolition_apartment))] = 0
-    renters.apartment[np.where(
-        np.isin(renters.apartment, demolition_apartment))] = -1
+    renters.moveOut(renters.getIndex(
+        demolition_tenants[demolition_tenants >= 0]))
     #remove landlords from population whose apartment will be demolished
-    landlords.apartment = np.delete(landlords.apartment, demolition_index)   
-    landlords.private = np.delete(landlords.private, demolition_index)   
-    landlords.quality = np.delete(landlords.quality, demolition_index)   
-    landlords.price = np.delete(landlords.price, demolition_index)   
-    landlords.available = np.delete(landlords.available, demolition_index)   
-    landlords.random = np.delete(landlords.random, demolition_index)  
+    landlords.remove(demolition_index)
     
     # get number of new apartments to be constructed
     number_of_new_apartments = round(
-        rd.uniform(construction_min,construction_max)*len(landlords.apartment))
-    # append attributes of new apartments to arrays of existing landlords
+        rng.uniform(construction_min, construction_max)
+        * len(landlords.apartment))
+    # append new apartments to existing landlords (available, without price)
     apartment_next = max(landlords.apartment) + 1     
-    landlords.apartment = np.append(landlords.apartment,
-        np.arange(apartment_next, apartment_next+number_of_new_apartments,1)) 
-    #only private appartments added (no state apartments are constructed)
-    landlords.private = np.append(landlords.private, 
-                                  np.ones(number_of_new_apartments,dtype=bool))   
-    landlords.quality = np.append(landlords.quality, 
-                                  rd.rand(number_of_new_apartments) *
-                                  quality_apartment[0] + quality_apartment[1]) 
-    landlords.price = np.append(landlords.price, 
-                                np.zeros(number_of_new_apartments))
-    landlords.available = np.append(landlords.available,
-                                np.ones(number_of_new_apartments,dtype=bool))   
-    landlords.random = np.append(landlords.random, 
-                                 rd.rand(number_of_new_apartments))  
+    landlords.append(number_of_new_apartments,
+        apartment = np.arange(apartment_next, 
+                              apartment_next+number_of_new_apartments,1),
+        #only private appartments added (no state apartments are constructed)
+        private = True,
+        quality = rng.rand(number_of_new_apartments) * quality_apartment[0] 
+                  + quality_apartment[1],
+        price = 0,
+        random = rng.rand(number_of_new_apartments))
     return(renters, landlords)  
 
-def constructStateApartments(landlords, new_apartments, state_price):
+def constructStateApartments(landlords, new_apartments, state_price, 
+                             rng=rd):
     """
     Method controls a 'one-time' construction of state apartments. Number of 
     apartments to be constructed can be flexibly chosen when the method is
-    called (with the new_apartments parameter).
+    called (with the new_apartments parameter). Random numbers are drawn from 
+    rng (numpy.random by default).
     """
-    # append attributes of new state apartments to existing landlord arrays
+    # append new state apartments to existing landlords (available)
     apartment_next = max(landlords.apartment) + 1     
-    landlords.apartment = np.append(landlords.apartment,
-                    np.arange(apartment_next,apartment_next+new_apartments,1)) 
-    landlords.private = np.append(landlords.private, 
-                                  np.zeros(new_apartments,dtype=bool))   
-    landlords.quality = np.append(landlords.quality, 
-        rd.rand(new_apartments)*quality_apartment[0] + quality_apartment[1])   
-    landlords.price = np.append(landlords.price, 
-                                np.ones(new_apartments)*state_price)   
-    landlords.available = np.append(landlords.available, 
-                                    np.ones(new_apartments,dtype=bool))   
-    landlords.random = np.append(landlords.random, rd.rand(new_apartments))  
+    landlords.append(new_apartments,
+        apartment = np.arange(apartment_next,apartment_next+new_apartments,1),
+        private = False,
+        quality = rng.rand(new_apartments)*quality_apartment[0] 
+                  + quality_apartment[1],
+        price = state_price,
+        random = rng.rand(new_apartments))
     return(landlords)
 
 #%% [2] Methods to run simulations and experiments (Process flows)
 
 # Run model for one month        
 def simulateMonth(renters, landlords, m, inc_factor_state, max_increase, 
-                  state_price):   
+                  state_price, streams=None, rng=rd):   
     """ 
     Standard process to simulate one month. Method does not include evaluation 
     of results and cannot be used for first month (slightly different set up
     required due to new initialization of populations).
+    If streams (RandomStreams) are given, every stochastic process draws from
+    its own random stream of the month (common random numbers), otherwise 
+    all random numbers are drawn from the random number generator rng 
+    (numpy.random by default, see createGenerator).
+    The time of every phase and the market activity are recorded by the 
+    profiler if profiling is set in the parameters (see profiler.py).
     """
+    profiler.startMonth(m)
+    # random number generator of every stochastic process
+    if streams is None:
+        rng = dict.fromkeys(RandomStreams.processes, rng)
+    else:
+        rng = streams.month(m)
     # only apply following steps from month 2 onwards
     if m > 0:
         # Update population, apartments, prices, income and utility 
-        renters, landlords = updatePopulation(renters, landlords)
-        renters, landlords = updateApartments(renters, landlords)
-        renters = landlords.updatePrice(renters, prob_increase, max_increase)
+        renters, landlords = updatePopulation(renters, landlords, 
+                                              rng['population'])
+        profiler.record('population')
+        renters, landlords = updateApartments(renters, landlords, 
+                                              rng['apartments'])
+        profiler.record('apartments')
+        renters = landlords.updatePrice(renters, prob_increase, max_increase,
+                                        rng['prices'])
+        profiler.record('updatePrice')
         renters.updateIncome(prob_income_change, income_change, income_min, 
-                             income_max)
+                             income_max, rng['income'])
+        profiler.record('income')
         renters.updateUtility()
+        profiler.record('utility')
         
         # Renters check affordability, move randomly, and screen market   
         landlords = renters.checkAffordability(landlords, max_rent_share)
-        landlords = renters.moveRandomly(landlords, prob_random_move)
+        profiler.record('affordability')
+        landlords = renters.moveRandomly(landlords, prob_random_move, 
+                                         rng['moves'])
+        profiler.record('moves')
         landlords = renters.screenMarket(landlords, screener_share, 
                                          req_utility_improvement, 
-                                         req_n_preferred_options)
+                                         req_n_preferred_options, 
+                                         rng['screening'])
+        profiler.record('screening')
         
         # Landlords adjust pricing
         landlords.setPrice(max_increase, q_threshold, min_n_comparable)
+        profiler.record('setPrice')
     
     # Market exchange (cycles are mimicking a 3 months notice period)
     for cycle in range(cycles):
         # landlords decrease offered price if apartment remains available
         if cycle > 0:
             landlords.decreasePrice(rent_decrease_factor)
+            profiler.record('decreasePrice')
         # Application & Selection
         apartment_info, applicants = renters.application(
             landlords, max_rent_share, inc_factor_state,
-            state_price, max_sample_applicants, max_applications)
+            state_price, max_sample_applicants, max_applications, 
+            application_batch_size, rng['application'])
+        profiler.record('application_' + str(cycle))
+        if profiler.enabled:
+            searchers = np.count_nonzero(renters.searching)
+            profiler.count('searchers_' + str(cycle), searchers)
+            profiler.count('applications_' + str(cycle), applicants.nnz)
         renters = landlords.selectTenant(renters, apartment_info,
-                                         applicants)
+                                         applicants, batched_selection, 
+                                         rng['selection'])
+        if profiler.enabled:
+            profiler.count('matches_' + str(cycle), 
+                           searchers - np.count_nonzero(renters.searching))
+        profiler.record('selectTenant_' + str(cycle))
     return (renters,landlords)
 
 # Evaluate one month
-def evaluateMonth(renters,landlords):
+class Evaluation(dict):
+    """
+    Shared quantities (masks, counts, quantiles) for the evaluation of one 
+    month. Quantities are computed on first access with the function 
+    registered in quantities (see registerQuantity) and reused by all 
+    metrics afterwards.
+    """
+    def __init__(self, renters, landlords):
+        self.renters = renters
+        self.landlords = landlords
+    
+    def __missing__(self, name):
+        self[name] = quantities[name](self)
+        return(self[name])
+
+def registerQuantity(name, function):
+    """
+    Register a shared quantity for the evaluation. The function receives the
+    Evaluation of the month (populations and other shared quantities).
+    """
+    quantities[name] = function
+
+def registerMetric(name, function):
+    """
+    Register a metric (output) for the evaluation. The function receives the
+    Evaluation of the month (populations and shared quantities) and returns
+    the value of the metric. Registered metrics can be requested as outputs
+    (in lockstep mode, they are evaluated replica by replica, see 
+    evaluateReplicaMonth).
+    """
+    metrics[name] = function
+
+# registered shared quantities and metrics
+quantities = dict()
+metrics = dict()
+
+# masks of the landlords (private, available and rented private apartments)
+registerQuantity('private', lambda e: e.landlords.private==True)
+registerQuantity('available', lambda e: e.landlords.available==True)
+registerQuantity('rented_private', lambda e: ~e['available'] & e['private'])
+# prices of rented private apartments
+registerQuantity('rented_prices', 
+                 lambda e: e.landlords.price[e['rented_private']])
+# income quartiles of renters (25% and 75% quantile)
+registerQuantity('income_quartiles', 
+                 lambda e: np.quantile(e.renters.income, [.25, .75]))
+
+# mean price of rented private apartments
+registerMetric('mean_price', lambda e: np.mean(e['rented_prices']))
+# median price of rented private apartments
+registerMetric('median_price', lambda e: np.median(e['rented_prices']))
+# vacancy rate  (for private apartment market) in %
+registerMetric('vacancy_rate_p', lambda e: (np.count_nonzero(
+    e['available'] & e['private']) / np.count_nonzero(e['private'])) * 100)
+# vacancy rate  (for state apartment market) in %
+registerMetric('vacancy_rate_s', lambda e: (np.count_nonzero(
+    e['available'] & ~e['private']) / np.count_nonzero(~e['private'])) * 100)
+# vacancy rate  (total) in %
+registerMetric('vacancy_rate_t', lambda e: np.count_nonzero(
+    e['available']) / len(e['available']) * 100)
+# Utility (lowest income quartile) for renters living in an apartment 
+registerMetric('utility_p25', lambda e: np.mean(e.renters.utility[
+    e.renters.income < e['income_quartiles'][0]]))
+# Utility (middle 50% income class) for renters living in an apartment
+registerMetric('utility_p50', lambda e: np.mean(e.renters.utility[
+    (e.renters.income <= e['income_quartiles'][1]) & 
+    (e.renters.income >= e['income_quartiles'][0])]))
+# Utility (75 percentile) for renters living in an apartment
+registerMetric('utility_p75', lambda e: np.mean(e.renters.utility[
+    e.renters.income > e['income_quartiles'][1]]))
+
+def evaluateMonth(renters, landlords, outputs=None):
     """ 
-    Method that evaluate outcomes for one month and returns them.
+    Method that evaluate outcomes for one month and returns them. Only the 
+    requested outputs (default: all registered metrics) are evaluated, 
+    quantities required by several metrics are computed once.
     """
+    evaluation = Evaluation(renters, landlords)
     # create dictionary to store the evaluation results
     results_month = dict()
-    # mean price of rented private apartments
-    results_month['mean_price'] = np.mean(landlords.price[np.where(
-        (landlords.available==False) & (landlords.private==True))])
-    # median price of rented private apartments
-    results_month['median_price'] = np.median(landlords.price[np.where(
-        (landlords.available==False) & (landlords.private==True))])
-    # vacancy rate  (for private apartment market) in %
-    results_month['vacancy_rate_p'] = (len(np.where(
-        (landlords.available==True) & (landlords.private==True))[0]) 
-        / len(np.where(landlords.private==True)[0])) * 100
-    # vacancy rate  (for state apartment market) in %
-    results_month['vacancy_rate_s'] = (len(np.where(
-        (landlords.available==True) & (landlords.private==False))[0]) 
-        / len(np.where(landlords.private==False)[0])) * 100
-    # vacancy rate  (total) in %
-    results_month['vacancy_rate_t'] = len(np.where(
-        landlords.available==True)[0]) / len(landlords.available) * 100
-    # Utility (lowest income quartile) for renters living in an apartment 
-    results_month['utility_p25'] = np.mean(renters.utility[np.where(
-        renters.income<np.quantile(renters.income,.25))])
-    # Utility (middle 50% income class) for renters living in an apartment
-    results_month['utility_p50'] = np.mean(renters.utility[np.where(
-        (renters.income<=np.quantile(renters.income,.75)) & 
-        (renters.income>=np.quantile(renters.income,.25)))])
-    # Utility (75 percentile) for renters living in an apartment
-    results_month['utility_p75'] = np.mean(renters.utility[np.where(
-        renters.income>np.quantile(renters.income,.75))])
+    for output in (metrics if outputs is None else outputs):
+        results_month[output] = metrics[output](evaluation)
     return(results_month)
 
+def saveCheckpoint(checkpoint, month, renters, landlords, results, settings,
+                   rng=rd):
+    """
+    Store the state of a simulation after the given number of months in a 
+    npz file (compressed if checkpoint_compression is set): attributes of 
+    renters and landlords, state of the random number generator rng, month
+    and the results so far. The settings (dictionary of arrays or scalars) 
+    are checked when the simulation is resumed (see loadCheckpoint). The file
+    is replaced at once, such that an interruption while saving keeps the 
+    previous checkpoint.
+    """
+    arrays = dict(getRandomState(rng), month = month)
+    for name in renters.attributes:
+        arrays['renters.' + name] = getattr(renters, name)
+    for name in landlords.attributes:
+        arrays['landlords.' + name] = getattr(landlords, name)
+    for key in results:
+        arrays['results.' + key] = np.asarray(results[key], dtype=float)
+    for key in settings:
+        arrays['settings.' + key] = np.asarray(settings[key])
+    # write to temporary file first and replace previous checkpoint
+    with open(checkpoint + '.tmp', 'wb') as file:
+        if checkpoint_compression:
+            np.savez_compressed(file, **arrays)
+        else:
+            np.savez(file, **arrays)
+    os.replace(checkpoint + '.tmp', checkpoint)
+
+def loadCheckpoint(checkpoint, settings, rng=rd):
+    """
+    Load a checkpoint (see saveCheckpoint) and restore the state of the 
+    random number generator rng. Raises a ValueError if the checkpoint has been
+    stored with different settings. Returns the number of months simulated,
+    the populations of renters and landlords and the results so far.
+    Note: the random number generator of the numba kernels is not stored,
+    simulations with the numba backend do not continue with the same draws.
+    """
+    with np.load(checkpoint) as arrays:
+        for key in settings:
+            if ('settings.' + key not in arrays.files or not np.array_equal(
+                    arrays['settings.' + key], np.asarray(settings[key]))):
+                raise ValueError('Checkpoint ' + checkpoint + ' has been '
+                                 'stored with a different ' + key + '.')
+        landlords_class, renters_class = getPopulationClasses()
+        renters = renters_class(compact = compact_mode, **{
+            name: arrays['renters.' + name] 
+            for name in renters_class.attributes})
+        landlords = landlords_class(compact = compact_mode, **{
+            name: arrays['landlords.' + name] 
+            for name in landlords_class.attributes})
+        results = {key[len('results.'):]: arrays[key] 
+                   for key in arrays.files if key.startswith('results.')}
+        setRandomState(rng, arrays)
+        month = int(arrays['month'])
+    return(month, renters, landlords, results)
+
+def getRandomState(rng):
+    """
+    State of the random number generator rng (numpy.random, RandomState or
+    GeneratorAdapter) as a dictionary of arrays (see saveCheckpoint).
+    """
+    state = rng.get_state()
+    if isinstance(state, tuple):
+        return({'rng_key': state[1], 'rng_pos': state[2], 
+                'rng_has_gauss': state[3], 
+                'rng_cached_gaussian': state[4]})
+    # state of other bit generators (dictionary, stored as bytes)
+    return({'rng_state': np.frombuffer(pickle.dumps(state), dtype=np.uint8)})
+
+def setRandomState(rng, arrays):
+    """
+    Restore the state of the random number generator rng from the arrays
+    (see getRandomState).
+    """
+    if 'rng_state' in arrays:
+        rng.set_state(pickle.loads(arrays['rng_state'].tobytes()))
+    else:
+        rng.set_state(('MT19937', arrays['rng_key'], int(arrays['rng_pos']),
+                       int(arrays['rng_has_gauss']), 
+                       float(arrays['rng_cached_gaussian'])))
+
+def getCheckpoint(checkpoint, name):
+    """
+    Path of a checkpoint file within the checkpoint directory (None if no 
+    directory is given). The directory is created if required.
+    """
+    if checkpoint is None:
+        return(None)
+    os.makedirs(checkpoint, exist_ok=True)
+    return(os.path.join(checkpoint, name + '.npz'))
+
+# scripts of the experiments, which are not part of the model code (see 
+# getCacheKey)
+scripts = ['runOFAT.py', 'runPolicy_evaluation.py', 'calibration.py', 
+           'benchmarks.py', 'scaling.py', 'setup.py']
+
+def getCacheKey(run, arguments):
+    """
+    Key of a run in the result cache: hash of all values in parameters.py, 
+    the source code of the model (every python file in this directory 
+    except the scripts and tests), the name and arguments of the run (except
+    the checkpoint directory) and the state of the numpy random number 
+    generator.
+    """
+    key = hashlib.sha256()
+    # parameters (module-level values in parameters.py)
+    for name, value in sorted(vars(parameters).items()):
+        if not name.startswith('_') and not inspect.ismodule(value):
+            key.update((name + '=' + repr(value) + ';').encode())
+    # model code (all modules of the model, except scripts and tests)
+    for file in sorted(glob.glob(os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        name = os.path.basename(file)
+        if name in scripts or name.startswith('test_'):
+            continue
+        with open(file, 'rb') as f:
+            key.update(name.encode())
+            key.update(f.read())
+    # run and arguments
+    key.update((run.__name__ + repr(sorted(
+        (name, value) for name, value in arguments.items() 
+        if name != 'checkpoint'))).encode())
+    # state of the random number generator
+    state = rd.get_state()
+    key.update(state[1].tobytes())
+    key.update(repr(state[2:]).encode())
+    return(key.hexdigest())
+
+def cached(run):
+    """
+    Decorator for runs whose results are stored in the result cache (if 
+    cache_directory is set in the parameters). On a cache hit, the stored 
+    results are returned and the numpy random number generator is set to the
+    state after the run, such that following runs continue with the same 
+    random draws. Least recently used results are removed once the cache 
+    exceeds cache_size bytes.
+    """
+    @functools.wraps(run)
+    def cachedRun(*args, **kwargs):
+        if cache_directory is None:
+            return(run(*args, **kwargs))
+        arguments = inspect.signature(run).bind(*args, **kwargs)
+        arguments.apply_defaults()
+        file = os.path.join(cache_directory, getCacheKey(
+            run, arguments.arguments) + '.pkl')
+        # return results from cache (and mark them as recently used)
+        if os.path.exists(file):
+            with open(file, 'rb') as f:
+                results, state = pickle.load(f)
+            os.utime(file)
+            rd.set_state(state)
+            print("Results loaded from cache:", file)
+            return(results)
+        results = run(*args, **kwargs)
+        # store results (write to temporary file first)
+        os.makedirs(cache_directory, exist_ok=True)
+        with open(file + '.tmp', 'wb') as f:
+            pickle.dump((results, rd.get_state()), f)
+        os.replace(file + '.tmp', file)
+        # remove least recently used results if the cache is too large
+        files = sorted(glob.glob(os.path.join(cache_directory, '*.pkl')), 
+                       key=os.path.getmtime)
+        size = sum(os.path.getsize(f) for f in files)
+        while size > cache_size and len(files) > 1:
+            size -= os.path.getsize(files[0])
+            os.remove(files.pop(0))
+        return(results)
+    return(cachedRun)
+
+def clearCache():
+    """
+    Remove all results from the result cache (see cached).
+    """
+    if cache_directory is not None:
+        for file in glob.glob(os.path.join(cache_directory, '*.pkl')):
+            os.remove(file)
+
+def openStream(stream, month_start):
+    """
+    Prepare the stream directory of a run (see appendStream). Months from 
+    month_start onwards are removed from an existing stream (e.g. months 
+    that were written after the checkpoint a run is resumed from).
+    """
+    os.makedirs(stream, exist_ok=True)
+    months = readStream(stream).get('month', np.zeros(0))
+    n_rows = np.count_nonzero(months < month_start)
+    for file in glob.glob(os.path.join(stream, '*.bin')):
+        with open(file, 'r+b') as f:
+            f.truncate(n_rows * 8)
+
+def appendStream(stream, month, results_month):
+    """
+    Append the results of one month to the stream of a run. The stream is a 
+    directory with one binary file (float64 values) per output and one for
+    the month, such that partial results of a running simulation can be read
+    at any time (see readStream).
+    """
+    for key, value in [('month', month)] + list(results_month.items()):
+        with open(os.path.join(stream, key + '.bin'), 'ab') as f:
+            f.write(np.float64(value).tobytes())
+
+def readStream(stream):
+    """
+    Read the results of a stream (see appendStream). Returns a dictionary with
+    one array per output and the months (only months that have been written
+    completely).
+    """
+    results = {os.path.basename(file)[:-len('.bin')]: np.fromfile(file)
+               for file in glob.glob(os.path.join(stream, '*.bin'))}
+    n_rows = min([len(values) for values in results.values()], default=0)
+    results = {key: values[:n_rows] for key, values in results.items()}
+    if 'month' in results:
+        results['month'] = results['month'].astype(int)
+    return(results)
+
 def runMonths(months, initialization_period, state_price, 
-              share_state_apartments, inc_factor_state, outputs, max_increase):    
+              share_state_apartments, inc_factor_state, outputs, max_increase,
+              verbose=True, checkpoint=None, stream=None, streams=None, 
+              rng=None):    
     """
     Run model for several months and store results (after end of initialization
-    period) into arrays within a dictionary.
+    period) into arrays within a dictionary. The calculation progress is only
+    printed if verbose is True.
+    If a checkpoint file is given, the state of the simulation is stored every
+    checkpoint_interval months and at the end (see saveCheckpoint). If the 
+    file already exists, the simulation is resumed from the stored state and
+    continues with the same random draws as the uninterrupted simulation. 
+    The checkpoint needs to be stored with the same arguments and the same
+    state of the random number generator at the start of the simulation.
+    If a stream directory is given, the results of each month are also 
+    written to disk during the run (see appendStream). If random streams 
+    (RandomStreams) are given, the simulation uses common random numbers 
+    (see simulateMonth). Otherwise, the random numbers are drawn from the 
+    random number generator rng (see createGenerator), or from numpy.random 
+    if rng is None.
     """
-    #create dictionary to store simulation results
-    results_sim = {key: np.empty(0) for key in outputs}
-    # initialization of population
-    renters, landlords = initializeModel(n_renters, n_apartments, 
-                                         share_state_apartments, state_price)
+    if rng is None:
+        rng = rd
+    # settings to identify the simulation of a checkpoint
+    settings = dict(getRandomState(rng),
+                    months = months, 
+                    initialization_period = initialization_period,
+                    state_price = state_price, 
+                    share_state_apartments = share_state_apartments,
+                    inc_factor_state = inc_factor_state, outputs = outputs,
+                    max_increase = max_increase)
+    if streams is not None:
+        settings['streams'] = repr(streams)
+    #create dictionary with arrays to store simulation results
+    results_sim = {key: np.empty(max(months - initialization_period, 0)) 
+                   for key in outputs}
+    if checkpoint is not None and os.path.exists(checkpoint):
+        # resume simulation from checkpoint
+        month_start, renters, landlords, results_c = loadCheckpoint(
+            checkpoint, settings, rng)
+        for key in outputs:
+            results_sim[key][:len(results_c[key])] = results_c[key]
+    else:
+        month_start = 0
+        # initialization of population
+        renters, landlords = initializeModel(n_renters, n_apartments, 
+            share_state_apartments, state_price, 
+            rng if streams is None else streams.get('initialization', 0))
+    if stream is not None:
+        openStream(stream, month_start)
+    # profile of the run (see profiler.py)
+    profiler.reset(profiling, run = 'runMonths', months = months, 
+                   initialization_period = initialization_period, 
+                   state_price = state_price, 
+                   share_state_apartments = share_state_apartments,
+                   inc_factor_state = inc_factor_state, 
+                   max_increase = max_increase, n_renters = n_renters, 
+                   n_apartments = n_apartments)
     #simulate months
-    for m in range(months):
+    for m in range(month_start, months):
         # print calculation progress
-        if ((m+10) % 10 ==0) & (m+10 < months):
+        if verbose & ((m+10) % 10 ==0) & (m+10 < months):
             print('   Months:',m+1,'-',m+10, '(of', months, 'months)')
-        elif ((m+10) % 10 ==0) & (m+10 >= months):
+        elif verbose & ((m+10) % 10 ==0) & (m+10 >= months):
             print('   Months:',m+1,'-', months, '(of', months, 'months)')
         # run simulations
         renters, landlords = simulateMonth(renters, landlords, m, 
                                            inc_factor_state, max_increase,
-                                           state_price) 
+                                           state_price, streams, rng) 
         # start evaluation after initialization period
         if m >= initialization_period:
-            results_month = evaluateMonth(renters,landlords)
-            # append results from current month to arrays in dictionary
-            results_sim['mean_price'] = np.append( 
-                results_sim['mean_price'], results_month['mean_price'])
-            results_sim['median_price'] = np.append( 
-                results_sim['median_price'], results_month['median_price'])
-            results_sim['vacancy_rate_p'] = np.append(
-                results_sim['vacancy_rate_p'], results_month['vacancy_rate_p'])
-            results_sim['vacancy_rate_s'] = np.append(
-                results_sim['vacancy_rate_s'], results_month['vacancy_rate_s'])
-            results_sim['vacancy_rate_t'] = np.append(
-                results_sim['vacancy_rate_t'], results_month['vacancy_rate_t'])
-            results_sim['utility_p25'] = np.append(
-                results_sim['utility_p25'], results_month['utility_p25'])
-            results_sim['utility_p50'] = np.append(
-                results_sim['utility_p50'], results_month['utility_p50'])
-            results_sim['utility_p75'] = np.append(
-                results_sim['utility_p75'], results_month['utility_p75'])
+            profiler.start()
+            results_month = evaluateMonth(renters, landlords, outputs)
+            profiler.record('evaluation')
+            # store results from current month in arrays of dictionary
+            for key in outputs:
+                results_sim[key][m-initialization_period] = results_month[key]
+            if stream is not None:
+                appendStream(stream, m, results_month)
+        # store state of simulation (results of simulated months)
+        if checkpoint is not None and (
+                (m+1) % checkpoint_interval == 0 or m+1 == months):
+            saveCheckpoint(checkpoint, m+1, renters, landlords, 
+                           {key: results_sim[key][:max(
+                               m+1-initialization_period, 0)] 
+                            for key in outputs}, settings, rng)
+    profiler.stop()
+    if profiling and profile_directory is not None:
+        profiler.save(profile_directory)
     return(results_sim, renters, landlords)
 
+@cached
 def runSimulations(months, simulations, initialization_period,state_price, 
                    share_state_apartments, inc_factor_state, outputs, 
-                   max_increase):
+                   max_increase, seed=None, checkpoint=None, online=None):
     """
     Run and evaluate several simulations. 
     
@@ -329,7 +690,8 @@ def runSimulations(months, simulations, initialization_period,state_price,
     months : integer
         defines for how many months the model should be run per simulation.
     simulations : integer
-        defines number of simulations to be run.
+        defines number of simulations to be run (maximum number if ci_target
+        is set in the parameters, see stopSimulations).
     initialization_period : integer
         defines number of months per simulations where the model runs without
         being evaluated yet.
@@ -344,40 +706,448 @@ def runSimulations(months, simulations, initialization_period,state_price,
     outputs : list
         list containing the labels (/keys) for all required outputs that will
         be evaluated.
+    seed : integer or None
+        experiment seed for the random streams of the simulations if they are
+        run in parallel (n_processes in the parameters), with common random
+        numbers (common_random_numbers) or with a bit generator other than 
+        legacy (bit_generator). If None, the seed is drawn from the numpy 
+        random number generator (seeded by the caller).
+    checkpoint : string or None
+        directory for the checkpoint files of the simulations (see runMonths,
+        only used if the simulations are run one after another). An 
+        interrupted call continues with the same results if it is repeated.
+    online : boolean or None
+        aggregate the results online (OnlineResults, see createResults). If
+        None, aggregate in the parameters decides.
         
     Returns
     -------
-    results_all : dictionary
+    results_all : dictionary or OnlineResults
         contains all simulations results
         
+    If lockstep is set in the parameters, all simulations are run
+    simultaneously (see runReplicaMonths), and the returned populations 
+    contain the agents of all simulations.
     """
     # print state parameters
     print("State price:", state_price, 
           "\nShare of state apartment:", share_state_apartments,
           "\nIncome factor state:", inc_factor_state)
+    
+    # settings of every simulation (arguments of runMonths)
+    settings = dict(months = months, 
+                    initialization_period = initialization_period, 
+                    state_price = state_price, 
+                    share_state_apartments = share_state_apartments, 
+                    inc_factor_state = inc_factor_state, outputs = outputs, 
+                    max_increase = max_increase)
+    # experiment seed of the random streams (the same for all batches)
+    if seed is None and (n_processes is not None or common_random_numbers 
+                         or bit_generator != 'legacy'):
+        seed = rd.randint(2**31)
 
-    # create dictionary with empty arrays to store results
-    results_all = {key: []  for key in outputs}
-    # results_all = {key: np.array([], 
-    #         dtype=np.int64).reshape(0,evaluation_periods) for key in outputs}
-    # run simulations
-    for s in range(simulations):
-        print("Simulation:", s+1, "/", simulations)
-        results_sim, renters, landlords = runMonths(months,
-            initialization_period, state_price, share_state_apartments, 
-            inc_factor_state, outputs, max_increase)
-        # append results from current simulation to arrays in dictionary
-        results_all['mean_price'].append(results_sim['mean_price'])
-        results_all['median_price'].append(results_sim['median_price'])
-        results_all['vacancy_rate_p'].append(results_sim['vacancy_rate_p'])
-        results_all['vacancy_rate_s'].append(results_sim['vacancy_rate_s'])
-        results_all['vacancy_rate_t'].append(results_sim['vacancy_rate_t'])
-        results_all['utility_p25'].append(results_sim['utility_p25'])
-        results_all['utility_p50'].append(results_sim['utility_p50'])
-        results_all['utility_p75'].append(results_sim['utility_p75'])      
+    # create dictionary with empty arrays to store results (or accumulators)
+    results_all = createResults(outputs, online)
+    # run simulations (in batches if ci_target is set in the parameters)
+    start = 0
+    while start < simulations:
+        batch = getBatchSize(simulations, start)
+        landlords, renters = runSimulationBatch(results_all, settings, batch,
+                                                start, seed, checkpoint)
+        start += batch
+        if stopSimulations([results_all], start, simulations):
+            break
     return(results_all, landlords, renters)
 
-def runPostinvtervention(months, renters, landlords, max_increase): 
+def runSimulationBatch(results_all, settings, simulations, start=0, 
+                       seed=None, checkpoint=None):
+    """
+    Run the simulations start+1, ..., start+simulations with the given 
+    settings (arguments of runMonths) and add their results to results_all
+    (see createResults). The simulations are run one after another, all at 
+    once (lockstep) or on the worker processes (n_processes), see 
+    runSimulations. Returns the populations of the last simulation.
+    """
+    # run all simulations at once
+    if lockstep:
+        print("Simulations:", start+1, "-", start+simulations, "(lockstep)")
+        results_replicas, landlords, renters = runReplicaMonths(
+            simulations = simulations, **settings)
+        for s in range(simulations):
+            addResults(results_all, {key: results_replicas[key][s] 
+                                     for key in settings['outputs']})
+        return(landlords, renters)
+    # run simulations in parallel (one random stream per simulation)
+    if n_processes is not None:
+        return(runParallelSimulations([settings], simulations, seed, 
+                                      start = start, 
+                                      results = [results_all])[0][1:])
+    # run simulations one after another
+    for s in range(start, start+simulations):
+        print("Simulation:", s+1, "/", start+simulations)
+        results_sim, renters, landlords = runMonths(checkpoint = 
+            getCheckpoint(checkpoint, 'simulation_' + str(s+1)), 
+            streams = getStreams(seed, s), rng = getGenerator(seed, s), 
+            **settings)
+        # append results from current simulation to arrays in dictionary
+        addResults(results_all, results_sim)
+    return(landlords, renters)
+
+def getStreams(seed, simulation, phase=0):
+    """
+    Random streams of a simulation (see RandomStreams) if 
+    common_random_numbers is set in the parameters, otherwise None.
+    """
+    if not common_random_numbers:
+        return(None)
+    return(RandomStreams(seed, simulation, phase, antithetic))
+
+def getGenerator(seed, simulation, phase=0):
+    """
+    Random number generator of a simulation: numpy.random in legacy mode 
+    (bit_generator in the parameters), otherwise a generator with the 
+    selected bit generator (see createGenerator), seeded with the experiment
+    seed, phase and simulation (the same generator as the simulation of the
+    first setting in runParallelSimulations for phase 0).
+    """
+    if bit_generator == 'legacy':
+        return(rd)
+    return(createGenerator(np.random.SeedSequence(
+        seed, spawn_key=(phase, simulation)), bit_generator))
+
+def getBatchSize(simulations, start):
+    """
+    Number of simulations of the next batch, if start of the given number of
+    simulations are finished: all remaining simulations, or adaptive_batch 
+    if ci_target is set in the parameters.
+    """
+    if ci_target is None:
+        return(simulations - start)
+    return(min(adaptive_batch, simulations - start))
+
+def getHalfWidth(results, output):
+    """
+    Half-width of the 95% confidence interval of the mean of the output for
+    every month, for both kinds of results (see createResults).
+    """
+    if isinstance(results, OnlineResults):
+        return(results.halfWidth(output))
+    values = np.asarray(results[output])
+    return(1.96 * values.std(axis=0, ddof=1) / np.sqrt(len(values)))
+
+def stopSimulations(results, start, simulations):
+    """
+    Check if further simulations are required (adaptive number of 
+    simulations, see ci_target in the parameters): True if the confidence 
+    intervals of all outputs in ci_target are narrower than their targets in
+    every month, for all given results (list, e.g. with and without 
+    intervention). The number of simulations run (start) is reported once 
+    the target or the maximum number of simulations is reached.
+    """
+    if ci_target is None or start < 2:
+        return(False)
+    precise = all(np.all(getHalfWidth(results_i, output) <= target) 
+                  for results_i in results 
+                  for output, target in ci_target.items())
+    if precise:
+        print("Target precision reached after", start, "simulations")
+    elif start == simulations:
+        print("Target precision not reached with", simulations, 
+              "simulations")
+    return(precise)
+
+def createResults(outputs, online=None):
+    """
+    Empty container for the results of several simulations: dictionary with 
+    an empty list per output, or OnlineResults if online is True (if None,
+    if aggregate is set in the parameters).
+    """
+    if online is None:
+        online = aggregate
+    if online:
+        return(OnlineResults(outputs, reservoir_size))
+    return({key: [] for key in outputs})
+
+def addResults(results_all, results_sim):
+    """
+    Add the results of one simulation to the results of all simulations (see
+    createResults).
+    """
+    if isinstance(results_all, OnlineResults):
+        results_all.add(results_sim)
+    else:
+        for key in results_all:
+            results_all[key].append(results_sim[key])
+
+def mergeResults(results_all, results_batch):
+    """
+    Combine the results of all previous simulations (None if there are none)
+    with the results of a further batch of simulations (dictionaries with 
+    arrays of simulations x months, or OnlineResults).
+    """
+    if results_all is None:
+        return(results_batch)
+    if isinstance(results_all, OnlineResults):
+        results_all.merge(results_batch)
+        return(results_all)
+    return({key: np.concatenate([results_all[key], results_batch[key]]) 
+            for key in results_all})
+
+def summarizeResults(results, output):
+    """
+    Mean and standard deviation (over all simulations) of the output for 
+    every month, for both kinds of results (see createResults).
+    """
+    if isinstance(results, OnlineResults):
+        return(results.mean(output), results.std(output))
+    return(np.asarray(results[output]).mean(axis=0),
+           np.asarray(results[output]).std(axis=0))
+
+def getPool():
+    """
+    Pool of n_processes worker processes. The pool is created on first use 
+    and kept for all following parallel runs, such that the workers only 
+    import the model once.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(n_processes)
+    return(_pool)
+
+# pool of worker processes (see getPool)
+_pool = None
+
+def runSeededSimulation(seed, settings, return_populations=False):
+    """
+    Run one simulation (see runMonths) with its own random stream. A local
+    numpy RandomState is seeded with the given SeedSequence (or a generator 
+    with the bit generator of the parameters is created, see 
+    createGenerator), such that the numpy random number generator of the 
+    caller is not changed if the simulation runs in the current process.
+    settings contains the arguments of runMonths. The populations are only 
+    returned if return_populations is True (otherwise None).
+    """
+    if bit_generator == 'legacy':
+        rng = np.random.RandomState(seed.generate_state(4))
+    else:
+        rng = createGenerator(seed, bit_generator)
+    results_sim, renters, landlords = runMonths(verbose = False, rng = rng,
+                                                **settings)
+    if not return_populations:
+        renters, landlords = None, None
+    return(results_sim, renters, landlords)
+
+def runParallelSimulations(settings, simulations, seed=None, cube=None,
+                           start=0, results=None, online=None, 
+                           checkpoint=None):
+    """
+    Run several simulations for each of the given settings (list of 
+    dictionaries with the arguments of runMonths) on the worker processes
+    (n_processes, 1 runs the simulations in the current process). Every 
+    simulation gets its own random stream, spawned from the experiment seed
+    by setting and simulation index. The results do therefore not depend on
+    the number of processes or the order of execution. If seed is None, it is
+    drawn from the numpy random number generator.
+    Returns a list with one tuple per setting (see runSimulations): the 
+    results of all simulations and the populations of the last simulation.
+    If a ResultsCube is given, the results are stored in the cube (one 
+    parameter value per setting) as soon as a simulation is finished, and 
+    the cube is returned instead of the results of each setting.
+    The simulations start+1, ..., start+simulations are run (batches of an 
+    experiment, see runSimulations), and their results are added to the 
+    given results (list with the results of every setting, see 
+    createResults) if results is not None, otherwise to new results 
+    (OnlineResults if online is True, see createResults).
+    If checkpoint is given (list with one directory per setting), every 
+    simulation stores its state in its own checkpoint file (see runMonths),
+    such that an interrupted call continues with the same results if it is 
+    repeated.
+    """
+    if seed is None:
+        seed = rd.randint(2**31)
+    # random streams of all simulations (stream s of setting i is the same 
+    # as SeedSequence(seed).spawn(len(settings))[i].spawn(s+1)[s])
+    seeds = [[np.random.SeedSequence(seed, spawn_key=(i, s)) 
+              for s in range(start, start+simulations)] 
+             for i in range(len(settings))]
+    # common random numbers: same streams for the simulation in all settings
+    tasks = [(seeds[i][s], dict(settings[i], 
+                                streams = getStreams(seed, start+s),
+                                checkpoint = None if checkpoint is None else
+                                getCheckpoint(checkpoint[i], 'simulation_' +
+                                              str(start+s+1))), 
+              s == simulations-1) 
+             for i in range(len(settings)) for s in range(simulations)]
+    if n_processes == 1:
+        runs = map(runSeededSimulation, *zip(*tasks))
+    else:
+        runs = getPool().map(runSeededSimulation, *zip(*tasks))
+    # collect results of each setting (in the order of the simulations)
+    runs_settings = []
+    for i in range(len(settings)):
+        if results is None:
+            results_all = createResults(settings[i]['outputs'], online)
+        else:
+            results_all = results[i]
+        for s in range(simulations):
+            print("Simulation:", i*simulations+s+1, "/", 
+                  len(settings)*simulations)
+            results_sim, renters, landlords = next(runs)
+            if cube is None:
+                addResults(results_all, results_sim)
+            else:
+                cube.store(results_sim, i, start+s)
+        runs_settings.append((results_all if cube is None else cube, 
+                              landlords, renters))
+    return(runs_settings)
+
+def runSweep(factor, parameter_values, simulations, seed=None, path=None,
+             dtype='float64', checkpoint=None, **settings):
+    """
+    Run the simulations of an OFAT analysis: several simulations for every
+    value of one factor, all other settings are fixed.
+    
+    Parameters
+    ----------
+    factor : string
+        name of the varying factor (argument of runMonths, e.g. state_price)
+    parameter_values : list
+        values that are tested for the factor
+    simulations : integer
+        number of simulations per value
+    seed : integer or None
+        experiment seed if the simulations are run in parallel (see 
+        runParallelSimulations) or with common random numbers
+    path : string or None
+        directory to store the results on disk (memory-mapped ResultsCube
+        with the given dtype). If None, the results are kept in memory.
+    checkpoint : string or None
+        directory for the checkpoint files of the simulations, with one 
+        subdirectory per value (value_1, value_2, ..., see runSimulations).
+        An interrupted sweep continues with the same results if it is 
+        repeated (not for lockstep simulations).
+    settings : 
+        remaining arguments of runMonths (months, initialization_period, 
+        state_price, share_state_apartments, inc_factor_state, outputs and
+        max_increase)
+    
+    Returns
+    -------
+    results_ofat : dictionary or ResultsCube
+        contains for every output a list with one array (simulations x 
+        months) per value, as required by plotOFAT and tabulateResults (or 
+        the array values x simulations x months if a path is given).
+    
+    The simulations of all values are run one after another with 
+    runSimulations, or on the worker processes if n_processes is set in the
+    parameters (all simulations of all values are distributed at once). If 
+    ci_target is set in the parameters, simulations is the maximum number of
+    simulations per value (see runAdaptiveSweep). The results of a sweep are
+    never aggregated online (aggregate in the parameters is ignored), 
+    because plotOFAT and tabulateResults require the results of every 
+    simulation.
+    """
+    # settings for every value of the factor
+    settings_values = [dict(settings, **{factor: value}) 
+                       for value in parameter_values]
+    # checkpoint directory of every value
+    checkpoints = None
+    if checkpoint is not None:
+        checkpoints = [os.path.join(checkpoint, 'value_' + str(p+1)) 
+                       for p in range(len(parameter_values))]
+    # common random numbers: the same seed for all values
+    if common_random_numbers and seed is None:
+        seed = rd.randint(2**31)
+    # store results on disk
+    cube = None
+    if path is not None:
+        cube = ResultsCube(settings['outputs'], simulations, 
+                           settings['months'] - settings[
+                               'initialization_period'], 
+                           parameter_values, path, dtype)
+    # run batches of simulations until the results are precise enough
+    if ci_target is not None:
+        return(runAdaptiveSweep(settings_values, simulations, seed, cube, 
+                                checkpoints))
+    if n_processes is None:
+        runs = []
+        for p in range(len(parameter_values)):
+            print("Parameter", p+1, " /", len(parameter_values))
+            runs.append(runSimulations(simulations = simulations, seed = seed,
+                                       online = False, checkpoint = None if 
+                                       checkpoints is None else 
+                                       checkpoints[p], **settings_values[p]))
+            if cube is not None:
+                cube.store(runs.pop()[0], p)
+    else:
+        runs = runParallelSimulations(settings_values, simulations, seed, 
+                                      cube, online = False, 
+                                      checkpoint = checkpoints)
+    if cube is not None:
+        cube.save()
+        return(cube)
+    # collect results of all simulations for every value
+    results_ofat = {key: [np.array(run[0][key]) for run in runs] 
+                    for key in settings['outputs']}
+    return(results_ofat)
+
+def runAdaptiveSweep(settings_values, simulations, seed=None, cube=None,
+                     checkpoints=None):
+    """
+    Run the simulations of an OFAT analysis (see runSweep) in batches until 
+    the confidence intervals of every value are narrow enough (see 
+    stopSimulations), such that all values have the same number of 
+    simulations. checkpoints is None or a list with the checkpoint directory
+    of every value.
+    """
+    outputs = settings_values[0]['outputs']
+    # experiment seed of the random streams (the same for all batches)
+    if seed is None and (n_processes is not None or common_random_numbers 
+                         or bit_generator != 'legacy'):
+        seed = rd.randint(2**31)
+    # mean and variance of every value (to check the precision), and results
+    # of all simulations (if they are not stored in the cube)
+    results_online = [OnlineResults(outputs) for settings in settings_values]
+    results_all = [{key: [] for key in outputs} for settings in 
+                   settings_values]
+    start = 0
+    while start < simulations:
+        batch = getBatchSize(simulations, start)
+        results_batch = [{key: [] for key in outputs} for settings in 
+                         settings_values]
+        if n_processes is None:
+            for p in range(len(settings_values)):
+                print("Parameter", p+1, " /", len(settings_values))
+                runSimulationBatch(results_batch[p], settings_values[p], 
+                                   batch, start, seed, None if checkpoints 
+                                   is None else checkpoints[p])
+        else:
+            runParallelSimulations(settings_values, batch, seed, start=start,
+                                   results=results_batch, 
+                                   checkpoint=checkpoints)
+        # add results of the batch
+        for p in range(len(settings_values)):
+            for s in range(batch):
+                results_online[p].add({key: results_batch[p][key][s] 
+                                       for key in outputs})
+            if cube is None:
+                for key in outputs:
+                    results_all[p][key] += results_batch[p][key]
+            else:
+                cube.store(results_batch[p], p, start)
+        start += batch
+        if stopSimulations(results_online, start, simulations):
+            break
+    if cube is not None:
+        cube.truncate(start)
+        cube.save()
+        return(cube)
+    return({key: [np.array(results[key]) for results in results_all] 
+            for key in outputs})
+
+def runPostinvtervention(months, renters, landlords, max_increase, 
+                         outputs=None, checkpoint=None, stream=None, 
+                         streams=None, rng=None): 
     """
     Method to simulate and evaluate the months after a policy intervention - in 
     case of the baseline simulations for the time after the 'non-intervention'.
@@ -391,21 +1161,63 @@ def runPostinvtervention(months, renters, landlords, max_increase):
         pooplation of renters at the time right after the (non-)intervention 
     landlords : object
         population of landlords at the time right after the (non-)intervention 
+    outputs : list or None
+        labels of the outputs that are evaluated (including registered 
+        metrics, see registerMetric). If None, the eight outputs of the 
+        policy evaluation are evaluated.
+    checkpoint : string or None
+        checkpoint file (see runMonths). If it exists, the populations are 
+        replaced by the stored populations and the simulation is resumed.
+    stream : string or None
+        directory to write the results of each month to (see appendStream)
+    streams : RandomStreams or None
+        random streams for common random numbers (see simulateMonth)
+    rng : random number generator or None
+        generator of the random numbers (see createGenerator), numpy.random
+        if None
     Returns
     -------
     results_post_int : dictionary
         contains all results of the months after (non-)intervention.
     """
     #outputs 
-    outputs = ['mean_price','median_price', 'vacancy_rate_p', 'vacancy_rate_s',
-               'vacancy_rate_t', 'utility_p25', 'utility_p50', 'utility_p75']
-    # create dictionary with empty arrays to store results
-    results_post_int = {key: [] for key in outputs}
+    if outputs is None:
+        outputs = ['mean_price','median_price', 'vacancy_rate_p', 
+                   'vacancy_rate_s', 'vacancy_rate_t', 'utility_p25', 
+                   'utility_p50', 'utility_p75']
+    # create dictionary with arrays to store results
+    results_post_int = {key: np.empty(months) for key in outputs}
+    if rng is None:
+        rng = rd
+    # settings to identify the simulation of a checkpoint
+    settings = dict(getRandomState(rng), months = months, 
+                    max_increase = max_increase, 
+                    inc_factor_state = inc_factor_state, 
+                    state_price = state_price, outputs = outputs)
+    if streams is not None:
+        settings['streams'] = repr(streams)
+    month_start = 1
+    if checkpoint is not None and os.path.exists(checkpoint):
+        # resume simulation from checkpoint
+        month_start, renters_c, landlords_c, results_c = loadCheckpoint(
+            checkpoint, settings, rng)
+        month_start += 1
+        renters.restore(renters_c)
+        landlords.restore(landlords_c)
+        for key in outputs:
+            results_post_int[key][:len(results_c[key])] = results_c[key]
+    if stream is not None:
+        openStream(stream, month_start)
+    # profile of the run (see profiler.py)
+    profiler.reset(profiling, run = 'runPostinvtervention', months = months,
+                   state_price = state_price, 
+                   inc_factor_state = inc_factor_state, 
+                   max_increase = max_increase)
 
     # simulate months (skip month 0 because process deviates for the 
     # first month  due to initialization -> not required here because model
     # was already initiated)
-    for m in range(1, months+1):
+    for m in range(month_start, months+1):
         # print calculation progress
         if ((m+9) % 10 ==0) & (m+9 < months):
             print('   Months:',m,'-',m+9, '(of', months, 'months)')
@@ -413,26 +1225,35 @@ def runPostinvtervention(months, renters, landlords, max_increase):
             print('   Months:',m,'-', months, '(of', months, 'months)')
         renters, landlords = simulateMonth(renters, landlords, m, 
                                            inc_factor_state, max_increase, 
-                                           state_price) 
+                                           state_price, streams, rng) 
         #evaluate each month after intervention
-        results_m = evaluateMonth(renters,landlords)  
+        profiler.start()
+        results_m = evaluateMonth(renters, landlords, outputs)
+        profiler.record('evaluation')
         # store results in dictionary
-        results_post_int['mean_price'].append(results_m['mean_price'])
-        results_post_int['median_price'].append(results_m['median_price'])
-        results_post_int['vacancy_rate_p'].append(results_m['vacancy_rate_p'])
-        results_post_int['vacancy_rate_s'].append(results_m['vacancy_rate_s'])
-        results_post_int['vacancy_rate_t'].append(results_m['vacancy_rate_t'])
-        results_post_int['utility_p25'].append(results_m['utility_p25'])
-        results_post_int['utility_p50'].append(results_m['utility_p50'])
-        results_post_int['utility_p75'].append(results_m['utility_p75'])  
+        for key in outputs:
+            results_post_int[key][m-1] = results_m[key]
+        if stream is not None:
+            appendStream(stream, m, results_m)
+        # store state of simulation (results of simulated months)
+        if checkpoint is not None and (
+                m % checkpoint_interval == 0 or m == months):
+            saveCheckpoint(checkpoint, m, renters, landlords, 
+                           {key: results_post_int[key][:m] 
+                            for key in outputs}, settings, rng)
+    profiler.stop()
+    if profiling and profile_directory is not None:
+        profiler.save(profile_directory)
     return(results_post_int)
 
 
 
+@cached
 def runIntervention(months_before_intervention, months_after_intervention, 
                       simulations, initialization_period,state_price, 
                       share_state_apartments, inc_factor_state, outputs,
-                      new_apartments, max_increase):
+                      new_apartments, max_increase, checkpoint=None, 
+                      seed=None):
     """
     Method that simulates and evaluates policy intervention at a specific point
     in time. It runs the simulations for the time before the intervention, for
@@ -465,15 +1286,96 @@ def runIntervention(months_before_intervention, months_after_intervention,
         additional state apartments are constructed before simulations if the
         parameter is set to true. No additional apartments are constructed if
         the parameter is set to False.
+    checkpoint : string or None
+        directory for the checkpoint files of all simulations (see runMonths
+        and runPostinvtervention). An interrupted call continues with the 
+        same results if it is repeated.
+    seed : integer or None
+        experiment seed for common random numbers (common_random_numbers in
+        the parameters): the simulations with and without intervention use
+        the same random streams after the intervention. Also used for the 
+        generators of the simulations if bit_generator is not legacy. If 
+        None, the seed is drawn from the numpy random number generator.
 
     Returns
     -------
     results_int : dictionary
         dictionary that includes all results from the simulations.
+    
+    If ci_target is set in the parameters, the simulations are run in 
+    batches until the confidence intervals with and without intervention 
+    are narrow enough (see stopSimulations), simulations is then the maximum
+    number of simulations.
+    """
+    # experiment seed of the random streams (the same for all batches)
+    if seed is None and (common_random_numbers or bit_generator != 'legacy'):
+        seed = rd.randint(2**31)
+    # run all simulations at once
+    if ci_target is None:
+        return(runInterventionBatch(months_before_intervention, 
+            months_after_intervention, simulations, initialization_period, 
+            state_price, share_state_apartments, inc_factor_state, outputs,
+            new_apartments, max_increase, checkpoint, seed = seed))
+    
+    # run batches of simulations until the results are precise enough
+    results_int_total, results_no_int_total = None, None
+    start = 0
+    while start < simulations:
+        batch = getBatchSize(simulations, start)
+        results_int, results_no_int, renters, landlords = runInterventionBatch(
+            months_before_intervention, months_after_intervention, batch, 
+            initialization_period, state_price, share_state_apartments, 
+            inc_factor_state, outputs, new_apartments, max_increase, 
+            None if checkpoint is None else os.path.join(
+                checkpoint, 'batch_' + str(start+1)), start, seed)
+        results_int_total = mergeResults(results_int_total, results_int)
+        results_no_int_total = mergeResults(results_no_int_total, 
+                                            results_no_int)
+        start += batch
+        if stopSimulations([results_int_total, results_no_int_total], start,
+                           simulations):
+            break
+    return(results_int_total, results_no_int_total, renters, landlords)
 
+def runInterventionBatch(months_before_intervention, 
+                         months_after_intervention, simulations, 
+                         initialization_period, state_price, 
+                         share_state_apartments, inc_factor_state, outputs, 
+                         new_apartments, max_increase, checkpoint=None, 
+                         start=0, seed=None):
     """
+    Run and evaluate the given number of simulations with and without 
+    intervention at once (see runIntervention). The simulations are numbered
+    from start (random streams of common random numbers). If lockstep is set
+    in the parameters, all simulations are run simultaneously (see 
+    runReplicaIntervention, without checkpoints and common random numbers).
+    """
+    # run all simulations at once
+    if lockstep:
+        results_int, results_no_int, renters, landlords = (
+            runReplicaIntervention(months_before_intervention, 
+                months_after_intervention, simulations, 
+                initialization_period, state_price, share_state_apartments,
+                inc_factor_state, outputs, new_apartments, max_increase))
+        if not aggregate:
+            return(results_int, results_no_int, renters, landlords)
+        # aggregated results (see OnlineResults)
+        results = []
+        for results_all in (results_int, results_no_int):
+            results.append(createResults(outputs))
+            for s in range(simulations):
+                addResults(results[-1], {key: results_all[key][s] 
+                                         for key in outputs})
+        return(results[0], results[1], renters, landlords)
+    # run simulations one after another (aggregated results)
+    if aggregate:
+        return(runAggregatedIntervention(months_before_intervention, 
+            months_after_intervention, simulations, initialization_period, 
+            state_price, share_state_apartments, inc_factor_state, outputs,
+            new_apartments, max_increase, checkpoint, start, seed))
+    
     # create dictionary with empty arrays to store results
-    results_all = {key: []  for key in outputs}
+    results_all = createResults(outputs, False)
     landlords_copies = []
     renters_copies = []
     
@@ -483,98 +1385,119 @@ def runIntervention(months_before_intervention, months_after_intervention,
               simulations)
         results_sim, renters, landlords = runMonths(months_before_intervention,
             initialization_period, state_price, share_state_apartments, 
-            inc_factor_state, outputs, max_increase)
+            inc_factor_state, outputs, max_increase, 
+            checkpoint = getCheckpoint(checkpoint, 'pre_intervention_' 
+                                       + str(s+1)), 
+            streams = getStreams(seed, start+s), 
+            rng = getGenerator(seed, start+s))
         # append results from current simulation to arrays in dictionary
-        results_all['mean_price'].append(results_sim['mean_price'])
-        results_all['median_price'].append(results_sim['median_price'])
-        results_all['vacancy_rate_p'].append(results_sim['vacancy_rate_p'])
-        results_all['vacancy_rate_s'].append(results_sim['vacancy_rate_s'])
-        results_all['vacancy_rate_t'].append(results_sim['vacancy_rate_t'])
-        results_all['utility_p25'].append(results_sim['utility_p25'])
-        results_all['utility_p50'].append(results_sim['utility_p50'])
-        results_all['utility_p75'].append(results_sim['utility_p75']) 
-        landlords_copies.append(copy.deepcopy(landlords))
-        renters_copies.append(copy.deepcopy(renters))
+        addResults(results_all, results_sim)
+        # snapshot of the populations (shares the arrays, no copy)
+        landlords_copies.append(landlords.snapshot())
+        renters_copies.append(renters.snapshot())
     
-    # create dictionaries with empty arrays to store results
-    results_int = {key: []  for key in outputs}
-    results_int_total = {key: []  for key in outputs}
+    # create dictionary with empty arrays to store results
+    results_int = createResults(outputs, False)
 
     # run simulations after intervention
     for s in range(simulations): 
         print("Simulations with intervention:", s + 1, "/", simulations)
+        # restore populations (arrays are copied once they are modified)
+        landlords.restore(landlords_copies[s])
+        renters.restore(renters_copies[s])
+        # random streams after the intervention (common random numbers)
+        streams = getStreams(seed, start+s, phase=1)
+        rng = getGenerator(seed, start+s, phase=1)
         # implement policy (construction) if intervention = True
-        landlords = copy.deepcopy(landlords_copies[s])
-        renters = copy.deepcopy(renters_copies[s])
         landlords = constructStateApartments(landlords, new_apartments, 
-                                              state_price)
+            state_price, rng if streams is None else streams.get(
+                'intervention', 0))
         results_s = runPostinvtervention(months_after_intervention, renters, 
-                                          landlords, max_increase)
+            landlords, max_increase, outputs, 
+            checkpoint = getCheckpoint(checkpoint, 'intervention_' + str(s+1)),
+            streams = streams, rng = rng)
         # append results from current simulation
-        results_int['mean_price'].append(results_s['mean_price'])
-        results_int['median_price'].append(results_s['median_price'])
-        results_int['vacancy_rate_p'].append(results_s['vacancy_rate_p'])
-        results_int['vacancy_rate_s'].append(results_s['vacancy_rate_s'])
-        results_int['vacancy_rate_t'].append(results_s['vacancy_rate_t'])
-        results_int['utility_p25'].append(results_s['utility_p25'])
-        results_int['utility_p50'].append(results_s['utility_p50'])
-        results_int['utility_p75'].append(results_s['utility_p75']) 
+        addResults(results_int, results_s)
     # combine results from pre intervention and post intervention
-    results_int_total['mean_price'] = np.append(
-        results_all['mean_price'], results_int['mean_price'], axis=1)
-    results_int_total['median_price'] = np.append(
-        results_all['median_price'], results_int['median_price'], axis=1)
-    results_int_total['vacancy_rate_p'] = np.append(
-        results_all['vacancy_rate_p'], results_int['vacancy_rate_p'], axis=1)
-    results_int_total['vacancy_rate_s'] = np.append(
-        results_all['vacancy_rate_s'], results_int['vacancy_rate_s'], axis=1)
-    results_int_total['vacancy_rate_t'] = np.append(
-        results_all['vacancy_rate_t'], results_int['vacancy_rate_t'], axis=1)
-    results_int_total['utility_p25'] = np.append(
-        results_all['utility_p25'], results_int['utility_p25'], axis=1)
-    results_int_total['utility_p50'] = np.append(
-        results_all['utility_p50'], results_int['utility_p50'], axis=1)
-    results_int_total['utility_p75'] = np.append(
-        results_all['utility_p75'], results_int['utility_p75'], axis=1)
-
-    # create dictionaries with empty arrays to store results
-    results_no_int = {key: []  for key in outputs}
-    results_no_int_total = {key: []  for key in outputs}
+    results_int_total = {key: np.append(results_all[key], results_int[key], 
+                                        axis=1) for key in outputs}
+
+    # create dictionary with empty arrays to store results
+    results_no_int = createResults(outputs, False)
     # run simulations after non-intervention
     for s in range(simulations): 
         print("Simulations without intervention:", s + 1, '/', simulations)
-        # implement policy (construction) if intervention = True
-        landlords = copy.deepcopy(landlords_copies[s])
-        renters = copy.deepcopy(renters_copies[s])
+        # restore populations (arrays are copied once they are modified)
+        landlords.restore(landlords_copies[s])
+        renters.restore(renters_copies[s])
         # simulate months after (non-)intervention
         results_s = runPostinvtervention(months_after_intervention, renters, 
-                                          landlords, max_increase)
+            landlords, max_increase, outputs, 
+            checkpoint = getCheckpoint(checkpoint, 'no_intervention_' 
+                                       + str(s+1)), 
+            streams = getStreams(seed, start+s, phase=1), 
+            rng = getGenerator(seed, start+s, phase=1))
         # append results from current simulation
-        results_no_int['mean_price'].append(results_s['mean_price'])
-        results_no_int['median_price'].append(results_s['median_price'])
-        results_no_int['vacancy_rate_p'].append(results_s['vacancy_rate_p'])
-        results_no_int['vacancy_rate_s'].append(results_s['vacancy_rate_s'])
-        results_no_int['vacancy_rate_t'].append(results_s['vacancy_rate_t'])
-        results_no_int['utility_p25'].append(results_s['utility_p25'])
-        results_no_int['utility_p50'].append(results_s['utility_p50'])
-        results_no_int['utility_p75'].append(results_s['utility_p75']) 
+        addResults(results_no_int, results_s)
     # combine results from pre intervention and post intervention
-    results_no_int_total['mean_price'] = np.append(
-        results_all['mean_price'], results_no_int['mean_price'], axis=1)
-    results_no_int_total['median_price'] = np.append(
-        results_all['median_price'], results_no_int['median_price'], axis=1)
-    results_no_int_total['vacancy_rate_p'] = np.append(
-        results_all['vacancy_rate_p'],results_no_int['vacancy_rate_p'], axis=1)
-    results_no_int_total['vacancy_rate_s'] = np.append(
-        results_all['vacancy_rate_s'],results_no_int['vacancy_rate_s'], axis=1)
-    results_no_int_total['vacancy_rate_t'] = np.append(
-        results_all['vacancy_rate_t'],results_no_int['vacancy_rate_t'], axis=1)
-    results_no_int_total['utility_p25'] = np.append(
-        results_all['utility_p25'],results_no_int['utility_p25'], axis=1)
-    results_no_int_total['utility_p50'] = np.append(
-        results_all['utility_p50'], results_no_int['utility_p50'], axis=1)
-    results_no_int_total['utility_p75'] = np.append(
-        results_all['utility_p75'], results_no_int['utility_p75'], axis=1)
+    results_no_int_total = {key: np.append(results_all[key], 
+                                           results_no_int[key], axis=1) 
+                            for key in outputs}
+    return(results_int_total, results_no_int_total, renters, landlords)
+
+def runAggregatedIntervention(months_before_intervention, 
+                              months_after_intervention, simulations, 
+                              initialization_period, state_price, 
+                              share_state_apartments, inc_factor_state, 
+                              outputs, new_apartments, max_increase, 
+                              checkpoint=None, start=0, seed=None):
+    """
+    Policy intervention (see runIntervention) with online aggregation of the
+    results (see OnlineResults). Each simulation runs the pre-intervention 
+    period, the intervention and the no-intervention case before the next 
+    simulation starts, such that only the populations of one simulation are
+    kept in memory. The random draws therefore differ from runIntervention.
+    """
+    results_int_total = OnlineResults(outputs, reservoir_size)
+    results_no_int_total = OnlineResults(outputs, reservoir_size)
+    for s in range(simulations):
+        print("Simulation:", s + 1, "/", simulations)
+        # pre-intervention period
+        results_sim, renters, landlords = runMonths(months_before_intervention,
+            initialization_period, state_price, share_state_apartments, 
+            inc_factor_state, outputs, max_increase, 
+            checkpoint = getCheckpoint(checkpoint, 'pre_intervention_' 
+                                       + str(s+1)), 
+            streams = getStreams(seed, start+s), 
+            rng = getGenerator(seed, start+s))
+        landlords_copy = landlords.snapshot()
+        renters_copy = renters.snapshot()
+        # random streams after the intervention (common random numbers)
+        streams = getStreams(seed, start+s, phase=1)
+        rng = getGenerator(seed, start+s, phase=1)
+        # intervention (construction of state apartments)
+        landlords = constructStateApartments(landlords, new_apartments, 
+            state_price, rng if streams is None else streams.get(
+                'intervention', 0))
+        results_int = runPostinvtervention(months_after_intervention, 
+            renters, landlords, max_increase, outputs, 
+            checkpoint = getCheckpoint(checkpoint, 'intervention_' + str(s+1)),
+            streams = streams, rng = rng)
+        # no intervention
+        landlords.restore(landlords_copy)
+        renters.restore(renters_copy)
+        results_no_int = runPostinvtervention(months_after_intervention, 
+            renters, landlords, max_increase, outputs, 
+            checkpoint = getCheckpoint(checkpoint, 'no_intervention_' 
+                                       + str(s+1)), 
+            streams = streams, rng = getGenerator(seed, start+s, phase=1))
+        # add results (pre and post intervention combined)
+        results_int_total.add({key: np.append(results_sim[key], 
+                                              results_int[key]) 
+                               for key in outputs})
+        results_no_int_total.add({key: np.append(results_sim[key], 
+                                                 results_no_int[key]) 
+                                  for key in outputs})
     return(results_int_total, results_no_int_total, renters, landlords)
 
 #%% [3] Visualization and Processing of OFAT results
@@ -595,7 +1518,7 @@ def plotOFAT(xlabel, parameter_values, results_ofat):
     # use parameter values for x-axis
     x = np.array((parameter_values))
     #calculate mean over all months for each simulation 
-    price_mean_sim = np.array(results_ofat['mean_price']).mean(axis=2)
+    price_mean_sim = np.asarray(results_ofat['mean_price']).mean(axis=2)
     # calculate mean and std of simulation means for each parameter setting
     price_mean_parameter = price_mean_sim.mean(axis=1)
     price_std_parameter = price_mean_sim.std(axis=1)
@@ -614,7 +1537,7 @@ def plotOFAT(xlabel, parameter_values, results_ofat):
     
     """Price Median"""
     #calculate mean over all months for each simulation 
-    price_median_sim = np.array(results_ofat['median_price']).mean(axis=2)
+    price_median_sim = np.asarray(results_ofat['median_price']).mean(axis=2)
     # calculate mean and std of simulation means for each parameter setting
     mean = price_median_sim.mean(axis=1)
     std = price_median_sim.std(axis=1)
@@ -633,9 +1556,9 @@ def plotOFAT(xlabel, parameter_values, results_ofat):
     
     """Vacancy"""
     # calculate mean over all months for each simulation 
-    vp_mean_sim = np.array(results_ofat['vacancy_rate_p']).mean(axis=2)
-    vs_mean_sim = np.array(results_ofat['vacancy_rate_s']).mean(axis=2)
-    vt_mean_sim = np.array(results_ofat['vacancy_rate_t']).mean(axis=2)
+    vp_mean_sim = np.asarray(results_ofat['vacancy_rate_p']).mean(axis=2)
+    vs_mean_sim = np.asarray(results_ofat['vacancy_rate_s']).mean(axis=2)
+    vt_mean_sim = np.asarray(results_ofat['vacancy_rate_t']).mean(axis=2)
     # calculate mean and std of simulation means for each parameter setting
     vp_mean_parameter = vp_mean_sim.mean(axis=1) 
     vp_std_parameter = vp_mean_sim.std(axis=1) 
@@ -671,9 +1594,9 @@ def plotOFAT(xlabel, parameter_values, results_ofat):
   
     """Utility"""
     # calculate mean over all months for each simulation 
-    u25_mean_sim = np.array(results_ofat['utility_p25']).mean(axis=2)
-    u50_mean_sim = np.array(results_ofat['utility_p50']).mean(axis=2)
-    u75_mean_sim = np.array(results_ofat['utility_p75']).mean(axis=2)
+    u25_mean_sim = np.asarray(results_ofat['utility_p25']).mean(axis=2)
+    u50_mean_sim = np.asarray(results_ofat['utility_p50']).mean(axis=2)
+    u75_mean_sim = np.asarray(results_ofat['utility_p75']).mean(axis=2)
     
     # calculate mean of simulation means for each parameter setting
     u25_mean_parameter = u25_mean_sim.mean(axis=1)
@@ -739,7 +1662,7 @@ def tabulateResults(mean_values, parameter_values):
     """
     # Get means of simulations (over months) for each parameter setting
     #mean_values=results_ofat['mean_price']
-    sim_mean = np.array(mean_values).mean(axis=2)
+    sim_mean = np.asarray(mean_values).mean(axis=2)
     # Get p-values
     p_values = np.zeros((len(parameter_values),len(parameter_values)))
     for i in range(len(sim_mean)):
@@ -824,10 +1747,8 @@ def plotIntervention(title, ylabel, output, results_int, results_no_int,
 
     """
     # calculate mean and standard deviation
-    means_int = np.array(results_int[output]).mean(axis=0)
-    std_int = np.array(results_int[output]).std(axis=0)
-    means_no_int = np.array(results_no_int[output]).mean(axis=0)
-    std_no_int = np.array(results_no_int[output]).std(axis=0)
+    means_int, std_int = summarizeResults(results_int, output)
+    means_no_int, std_no_int = summarizeResults(results_no_int, output)
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
     ci_no_int = 1.96 * std_no_int / np.sqrt(len(std_no_int))
@@ -911,10 +1832,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """subplot for high-income housholds"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['utility_p75']).mean(axis=0)
-    std_int = np.array(results_int_total['utility_p75']).std(axis=0)
-    means_no_int = np.array(results_no_int_total['utility_p75']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['utility_p75']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'utility_p75')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'utility_p75')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -951,10 +1871,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """ Subplot for middle-income housholds"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['utility_p50']).mean(axis=0)
-    std_int = np.array(results_int_total['utility_p50']).std(axis=0)
-    means_no_int = np.array(results_no_int_total['utility_p50']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['utility_p50']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'utility_p50')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'utility_p50')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -990,10 +1909,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """Subplot for low-income housholds"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['utility_p25']).mean(axis=0)
-    std_int = np.array(results_int_total['utility_p25']).std(axis=0)
-    means_no_int = np.array(results_no_int_total['utility_p25']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['utility_p25']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'utility_p25')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'utility_p25')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -1047,11 +1965,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """Subplot for private vacancy rate"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['vacancy_rate_p']).mean(axis=0)
-    std_int = np.array(results_int_total['vacancy_rate_p']).std(axis=0)
-    means_no_int = np.array(
-        results_no_int_total['vacancy_rate_p']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['vacancy_rate_p']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'vacancy_rate_p')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'vacancy_rate_p')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -1088,11 +2004,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """Subplot for vacancy rate in public sector"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['vacancy_rate_s']).mean(axis=0)
-    std_int = np.array(results_int_total['vacancy_rate_s']).std(axis=0)
-    means_no_int = np.array(
-        results_no_int_total['vacancy_rate_s']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['vacancy_rate_s']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'vacancy_rate_s')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'vacancy_rate_s')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -1128,11 +2042,9 @@ def subplotIntervention(results_int_total, results_no_int_total,
     
     """"Subplot for total vacancy rate"""
     # calculate mean and standard deviation 
-    means_int = np.array(results_int_total['vacancy_rate_t']).mean(axis=0)
-    std_int = np.array(results_int_total['vacancy_rate_t']).std(axis=0)
-    means_no_int = np.array(
-        results_no_int_total['vacancy_rate_t']).mean(axis=0)
-    std_no_int = np.array(results_no_int_total['vacancy_rate_t']).std(axis=0)
+    means_int, std_int = summarizeResults(results_int_total, 'vacancy_rate_t')
+    means_no_int, std_no_int = summarizeResults(results_no_int_total,
+                                                'vacancy_rate_t')
     
     # calculate confidence interval based on std
     ci_int = 1.96 * std_int / np.sqrt(len(std_int))
@@ -1205,8 +2117,16 @@ def tableIntervention_results(output, results_int, results_no_int,
     diff_pval_tables: dataframe
         contains mean differences by quarter after simulation and
         corresponding significance level.
-
+    
+    The significance levels require the results of every simulation, 
+    aggregated results (OnlineResults, see aggregate in the parameters) are
+    not supported.
     """
+    if (isinstance(results_int, OnlineResults) or 
+            isinstance(results_no_int, OnlineResults)):
+        raise TypeError('tableIntervention_results requires the results of '
+                        'every simulation, not aggregated results '
+                        '(set aggregate = False in the parameters).')
     # define index start and end for results
     start = months_before_intervention
     end = months_before_intervention + months_after_intervention
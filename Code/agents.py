@@ -4,29 +4,232 @@
 """ 
 This file contains the classes - specifically the class of renters and the 
 class of landlords. These classes will be used to create the objects which
-contain the entire population of landlords respectively renters.
+contain the entire population of landlords respectively renters. Both are 
+based on the class Population, which stores the attributes of all agents.
+The compiled populations use the numba kernels (kernels.py) for the most time
+consuming methods.
 """
 
 #%% [0] Import required modules
 
 import numpy as np
 import numpy.random as rd
+import scipy.sparse as sparse
+import copy
+from profiler import profiler
 
-#%% [1] Class for population of landlords
+# compiled kernels are optional (only required for the numba backend)
+try:
+    import kernels
+except ImportError:
+    kernels = None
 
-class Landlords(): 
-    # Declare instance variables
-    def __init__(self, private = None, apartment=None, quality=None, 
-                 price=None, available=None, random=None):
-       self.private = private
-       self.apartment = apartment
-       self.quality = quality
-       self.price = price 
-       self.available = available
-       self.random = random
+#%% [1] Base class for populations of agents
+
+class Population():
+    """
+    Storage of a population of agents. The attributes of the agents are
+    declared once per class in 'attributes' (name: data type and default 
+    value for new agents). Each attribute is stored in a preallocated array 
+    with spare capacity, and is accessible as array of the current population
+    (e.g. renters.income). Assigning an array to an attribute overwrites the
+    stored values in place, the size of the population can only be changed
+    with append and remove. Arrays only get reallocated if the capacity is 
+    exceeded (growth by factor 2).
+    In compact mode, floats and integers are stored with 32 bit instead of 
+    64 bit (see compact_dtypes). Flags are stored as boolean arrays (1 byte
+    per agent).
+    Snapshots (see snapshot and restore) share the arrays with the population
+    (copy-on-write): an array that is shared is only copied once a population
+    modifies the attribute. Reading a shared attribute returns a read-only 
+    view (no copy), methods which modify attributes in place take ownership 
+    of them first (see _own).
+    """
+    __slots__ = ('_data', '_size', '_shared')
+    attributes = dict()
+    # data types used instead of the declared types in compact mode
+    compact_dtypes = {float: np.float32, int: np.int32}
+    
+    def __init_subclass__(cls):
+        # create property (array of current population) for each attribute
+        for name in cls.attributes:
+            setattr(cls, name, property(
+                lambda self, name=name: self._get(name),
+                lambda self, value, name=name: self._set(name, value)))
+    
+    def __init__(self, capacity=None, compact=False, **values):
+        # size of population (given attribute arrays need to have same size)
+        size = 0
+        for value in values.values():
+            if value is not None:
+                size = len(value)
+        # preallocate arrays for all attributes
+        self._size = 0
+        self._shared = set()
+        self._data = {name: np.empty(max(size, capacity or 0), 
+                      dtype=self.compact_dtypes.get(dtype, dtype) 
+                      if compact else dtype)
+                      for name, (dtype, default) in self.attributes.items()}
+        self.append(size, **values)
+    
+    def _get(self, name):
+        # array of current population (read-only if shared with snapshot)
+        array = self._data[name][:self._size]
+        if name in self._shared:
+            array.flags.writeable = False
+        return(array)
+    
+    def _set(self, name, value):
+        # overwrite values of current population (same size required)
+        if np.ndim(value) > 0 and len(value) != self._size:
+            raise ValueError('Size of ' + name + ' does not match population '
+                             'size, use append and remove instead.')
+        self._own(name)
+        self._data[name][:self._size] = value
+    
+    def _own(self, *names):
+        # replace arrays shared with a snapshot by own copies (required before
+        # the arrays are modified in place)
+        for name in names:
+            if name in self._shared:
+                self._data[name] = self._data[name].copy()
+                self._shared.discard(name)
+    
+    def snapshot(self):
+        """
+        Snapshot of the current state of the population. Returns a population
+        of the same class which shares all arrays with this population, such
+        that taking a snapshot does not copy any data. An array is only copied
+        once the population or the snapshot modifies the attribute (every 
+        holder copies an array at most once).
+        """
+        snapshot = copy.copy(self)
+        snapshot._data = dict(self._data)
+        snapshot._shared = set(self._data)
+        self._shared = set(self._data)
+        return(snapshot)
+    
+    def restore(self, snapshot):
+        """
+        Restore the state of a snapshot (see snapshot). The arrays are shared
+        with the snapshot until they are modified, the snapshot itself is not
+        changed and can be restored again.
+        """
+        self._data = dict(snapshot._data)
+        self._size = snapshot._size
+        self._shared = set(snapshot._data)
+        snapshot._shared = set(snapshot._data)
+    
+    def __len__(self):
+        return(self._size)
+    
+    def memoryUsage(self):
+        """
+        Memory usage of the population. Returns the bytes required per agent
+        (sum over all attributes) and the total bytes allocated for all 
+        attributes (including the spare capacity).
+        """
+        bytes_per_agent = sum(data.itemsize for data in self._data.values())
+        bytes_total = sum(data.nbytes for data in self._data.values())
+        return(bytes_per_agent, bytes_total)
+    
+    def append(self, n, **values):
+        """
+        Append n agents to the population. Attributes which are not given 
+        (or None) are set to the declared default value.
+        """
+        # increase capacity if required (amortized growth)
+        if self._size + n > len(next(iter(self._data.values()))):
+            capacity = 2 * (self._size + n)
+            for name in self._data:
+                data = np.empty(capacity, dtype=self._data[name].dtype)
+                data[:self._size] = self._data[name][:self._size]
+                self._data[name] = data
+            self._shared = set()
+        # store attributes of new agents
+        for name, (dtype, default) in self.attributes.items():
+            value = values.get(name)
+            self._own(name)
+            self._data[name][self._size:self._size+n] = (
+                default if value is None else value)
+        self._size += n
+    
+    def remove(self, index):
+        """
+        Remove the agents with the given index (duplicates allowed) from the
+        population. The agents are marked as removed first, afterwards the
+        remaining agents of all attributes are moved to the front of the 
+        preallocated arrays (order is kept, no reallocation).
+        """
+        # mark removed agents
+        keep = np.ones(self._size, dtype=bool)
+        keep[index] = False
+        # compact arrays of all attributes
+        size = np.count_nonzero(keep)
+        for name in self._data:
+            # shared arrays are replaced instead of overwritten
+            if name in self._shared:
+                data = np.empty(len(self._data[name]), 
+                                dtype=self._data[name].dtype)
+                data[:size] = self._data[name][:self._size][keep]
+                self._data[name] = data
+                self._shared.discard(name)
+            else:
+                self._data[name][:size] = self._data[name][:self._size][keep]
+        self._size = size
+
+#%% [2] Class for population of landlords
+
+class Landlords(Population): 
+    __slots__ = ()
+    # Declare instance variables (data type and default for new landlords)
+    attributes = {'private': (bool, True),
+                  'apartment': (int, -1),
+                  'quality': (float, 0),
+                  'price': (float, 0),
+                  'available': (bool, True),
+                  'random': (float, 0),
+                  # uid of the current tenant (-1 if apartment is not rented)
+                  'tenant': (int, -1)}
     
 
     # Define instance methods 
+    def getIndex(self, apartments):
+        """
+        Retrieve the index of the landlords of the given apartment numbers. 
+        Apartment numbers are strictly increasing (new apartments get a higher
+        number than all existing ones and removals keep the order), such that
+        a binary search is sufficient and the lookup remains valid after
+        demolitions and constructions.
+        """
+        profiler.count('index_lookups')
+        return(np.searchsorted(self.apartment, apartments))
+    
+    def moveOut(self, apartments):
+        """
+        Landlords of the given apartments are informed that their tenant moved
+        out. Their apartments become available again. Apartment numbers of 
+        renters without an apartment (-1) are ignored.
+        """
+        idx_landlords = self.getIndex(apartments[apartments >= 0])
+        self._own('available', 'tenant')
+        self.available[idx_landlords] = True
+        self.tenant[idx_landlords] = -1
+    
+    def getApartmentInfo(self, index):
+        """
+        Information on the apartments of the landlords with the given index
+        as record array (apartment, price, quality and private).
+        """
+        apartment_info = np.empty(len(index), dtype=[
+            ('apartment', self.apartment.dtype), ('price', self.price.dtype), 
+            ('quality', self.quality.dtype), ('private', bool)])
+        apartment_info['apartment'] = self.apartment[index]
+        apartment_info['price'] = self.price[index]
+        apartment_info['quality'] = self.quality[index]
+        apartment_info['private'] = self.private[index]
+        return(apartment_info)
+    
     def setPrice(self, max_increase, q_threshold, min_n_comparable):
         """
         Private landlords set the price for their available apartments. First,
@@ -45,40 +248,88 @@ class Landlords():
         if len(np.where(self.available==False)[0]) > 0:
             # get index of private landlords with an available apartment
             index_price_setters = np.where(
-                (self.available==True) & (self.private==True))
-            # loop through landlords who need to set a new price
-            for l in index_price_setters[0]:
-                # set comparable quality threshold such that 10% is covered
-                q_c = (max(self.quality) - min(self.quality)) * q_threshold
-                # check if 10 or more rented apartments of comparable quality 
-                while len(np.where((self.quality>self.quality[l]-q_c)
-                                & (self.quality<self.quality[l]+q_c)
-                                & (self.available==False) 
-                                & (self.private==True))[0]) < min_n_comparable:
-                    # increase comparable quality threshold if needed
-                    q_c += q_c
-                # calculate current market price
-                current_market_price = np.mean(self.price[np.where(
-                    (self.quality>self.quality[l]-q_c)
-                    & (self.quality<self.quality[l]+q_c) 
-                    & (self.available==False) 
-                    & (self.private==True))])
-                # print(self.price[l], current_market_price, q_c)
-                # check if the apartment is new on the market:
-                if self.price[l] == 0:
-                    # set original price slightly above the market price
-                    self.price[l] = current_market_price * max_increase
-                # if previously above market price, try to keep high price first
-                elif self.price[l] > current_market_price:
-                    self.price[l] = self.price[l]
-                # ensure that price is not more increased than legally allowed
-                elif current_market_price > max_increase*self.price[l]:
-                    self.price[l] *= max_increase
-                # if the legal restrictions don't apply, use the market price
-                else:
-                    self.price[l] = current_market_price
+                (self.available==True) & (self.private==True))[0]
+            # set comparable quality threshold such that 10% is covered
+            q_c = np.full(len(index_price_setters), 
+                          (max(self.quality) - min(self.quality)) * q_threshold)
+            # index of rented private apartments sorted by quality
+            comparables, quality_sorted = self.getComparables()
+            # position of comparables within quality range of each setter
+            lower, upper = self.findComparables(
+                quality_sorted, self.quality[index_price_setters], q_c)
+            # check if 10 or more rented apartments of comparable quality 
+            # (stop widening once the range already covers all comparables)
+            extend = ((upper - lower) < min_n_comparable) & (
+                (lower > 0) | (upper < len(comparables)))
+            while extend.any():
+                profiler.count('setPrice_iterations')
+                # increase comparable quality threshold if needed
+                q_c[extend] += q_c[extend]
+                lower[extend], upper[extend] = self.findComparables(
+                    quality_sorted, self.quality[index_price_setters[extend]],
+                    q_c[extend])
+                extend = ((upper - lower) < min_n_comparable) & (
+                    (lower > 0) | (upper < len(comparables)))
+            # calculate current market price (comparables are averaged in the
+            # order of the landlord arrays to obtain identical mean values)
+            current_market_price = self.price[index_price_setters].copy()
+            for i in np.where(upper > lower)[0]:
+                current_market_price[i] = np.mean(self.price[np.sort(
+                    comparables[lower[i]:upper[i]])])
+            self._own('price')
+            self.price[index_price_setters] = self.adjustPrice(
+                self.price[index_price_setters], current_market_price, 
+                max_increase)
+    
+    @staticmethod
+    def adjustPrice(previous_price, current_market_price, max_increase):
+        """
+        New prices of price setters given their previous price and the current
+        market price of comparable apartments.
+        """
+        return(np.select(
+            [# new apartments on the market: set original price slightly 
+             # above the market price
+             previous_price == 0,
+             # if previously above market price, try to keep high price 
+             previous_price > current_market_price,
+             # ensure price is not more increased than legally allowed
+             current_market_price > max_increase*previous_price],
+            [current_market_price * max_increase,
+             previous_price,
+             previous_price * max_increase],
+            # if the legal restrictions don't apply, use the market price
+            current_market_price))
+    
+    def getComparables(self):
+        """
+        Index of all rented private apartments (the comparables for the market
+        price) sorted by quality. Returns the landlord indexes of the 
+        comparables together with their sorted quality ratings, such that the
+        comparables within a quality range can be retrieved by a binary
+        search instead of scanning all landlords.
+        """
+        # get index of rented private apartments
+        comparables = np.where(
+            (self.available==False) & (self.private==True))[0]
+        # sort comparables by quality (stable to keep the landlord order)
+        comparables = comparables[np.argsort(self.quality[comparables], 
+                                             kind='stable')]
+        return(comparables, self.quality[comparables])
+    
+    @staticmethod
+    def findComparables(quality_sorted, quality, q_c):
+        """
+        Binary search for the comparables with a quality strictly within the 
+        range (quality - q_c, quality + q_c). Returns the first and the last 
+        (exclusive) position within the sorted comparables index.
+        """
+        lower = np.searchsorted(quality_sorted, quality - q_c, side='right')
+        upper = np.searchsorted(quality_sorted, quality + q_c, side='left')
+        return(lower, upper)
             
-    def selectTenant(self, renters, apartment_information, applicants):
+    def selectTenant(self, renters, apartment_information, applicants, 
+                     batched=False, rng=rd):
         """
         Landlords select a new tenant among the applicants. The selection is a 
         random choice among the applicants. Applications to other apartments 
@@ -86,37 +337,115 @@ class Landlords():
         double selection). Income criterion does not need to be checked for
         state apartments, because only households that fulfill the income
         criterion are allowed to apply.
+        The applications are received as sparse matrix (apartments x renters,
+        see application) and renters and landlords are updated at once after
+        the selection. By default the 
+        landlords select their tenants one after another (same random draws 
+        as the original apartment by apartment loop). If batched is True, the
+        selection is resolved for all apartments simultaneously (see 
+        resolveApplications), which follows the same distribution but does
+        not reproduce the random draws of the sequential selection.
+        Random numbers are drawn from rng (numpy.random by default, see 
+        RandomStreams in streams.py).
+        """
+        # Skip selection if there are no applications at all
+        if applicants.nnz == 0:
+            return(renters)
+        # retrieve apartment position and renter index of all applications
+        apartment_pos = np.repeat(np.arange(applicants.shape[0]), 
+                                  np.diff(applicants.indptr))
+        renter_idx = applicants.indices
+        
+        if batched:
+            # select tenants for all apartments at once
+            selected = self.resolveApplications(apartment_pos, renter_idx, 
+                                                applicants.shape[0], 
+                                                len(renters.uid), rng)
+        else:
+            # store index of selected tenant (-1 if no applicant is left)
+            selected = np.full(applicants.shape[0], -1)
+            matched = np.zeros(len(renters.uid), dtype=bool)
+            # Loop through application list (apartment by apartment)
+            for i in range(applicants.shape[0]):
+                # remove renters that were already selected by other landlords
+                candidates = renter_idx[
+                    applicants.indptr[i]:applicants.indptr[i+1]]
+                candidates = candidates[~matched[candidates]]
+                # Skip selection if there are no applicants left
+                if len(candidates) > 0:
+                    # retrieve index of randomly chosen applicant
+                    selected[i] = candidates[rng.choice(
+                        np.arange(len(candidates)))]
+                    matched[selected[i]] = True
+        return(self.assignTenants(renters, apartment_information, selected))
+    
+    def assignTenants(self, renters, apartment_information, selected):
+        """
+        Update renters and landlords after the tenant selection. The array 
+        selected contains the index of the selected renter for every apartment
+        in apartment_information (-1 if no tenant was selected).
         """
-        # Loop through application list (apartment by apartment)
-        for i in range(len(apartment_information)):
-            # Skip selection if there are no applicants left
-            if len(applicants[i]) > 0:
-                # retrieve index of randomly chosen applicant
-                selected_tenant_index = rd.choice(
-                    np.arange(len(applicants[i])))
-                # retrieve selected applicants uid
-                selected_r = int(applicants[i][selected_tenant_index])
-                # store landlords apartment number
-                a = apartment_information[i][0]  
-                
-                # update price, search status and apartment for selected tenant
-                renters.apartment[np.where(renters.uid == selected_r)] = a 
-                renters.searching[np.where(renters.uid == selected_r)] = False
-                renters.price[np.where(renters.apartment == a)] = self.price[
-                    np.where(self.apartment == a)]
-                renters.quality[np.where(
-                    renters.apartment == a)] = self.quality[np.where(
-                        self.apartment == a)]
-                
-                # update availability of landlord after tenant selection
-                self.available[np.where(self.apartment == a)] = False
-                #remove selected renter from other applications
-                for j in range(len(apartment_information)):
-                    if selected_r in applicants[j]:
-                        index_remove = applicants[j].tolist().index(selected_r)
-                        applicants[j] = np.delete(applicants[j], index_remove)
+        # retrieve index of selected tenants and of their landlords
+        idx_apartments = np.where(selected >= 0)[0]
+        idx_tenants = selected[idx_apartments]
+        idx_landlords = self.getIndex(
+            apartment_information['apartment'][idx_apartments])
+        # update price, search status and apartment for selected tenants
+        renters._own('apartment', 'searching', 'price', 'quality')
+        self._own('available', 'tenant')
+        renters.apartment[idx_tenants] = self.apartment[idx_landlords]
+        renters.searching[idx_tenants] = False
+        renters.price[idx_tenants] = self.price[idx_landlords]
+        renters.quality[idx_tenants] = self.quality[idx_landlords]
+        # update availability and tenant of landlords after tenant selection
+        self.available[idx_landlords] = False
+        self.tenant[idx_landlords] = renters.uid[idx_tenants]
         return(renters)
     
+    @staticmethod
+    def resolveApplications(apartment_pos, renter_idx, n_apartments, 
+                            n_renters, rng=rd):
+        """
+        Vectorized tenant selection for the entire set of applications. Each 
+        application receives a random key and every apartment selects the 
+        applicant with the lowest key among the applicants who have not been
+        selected for a preceding apartment. This corresponds to a random 
+        choice among the remaining applicants, processed apartment by 
+        apartment. The selection is resolved in rounds: an apartment's 
+        proposal is final if no preceding unresolved apartment received an 
+        application of the proposed renter. Returns the index of the selected
+        renter for every apartment (-1 if no applicant is left).
+        """
+        # random keys for all applications
+        key = rng.rand(len(renter_idx))
+        selected = np.full(n_apartments, -1)
+        matched = np.zeros(n_renters, dtype=bool)
+        resolved = np.zeros(n_apartments, dtype=bool)
+        # sort applications by apartment and key once (order is kept when 
+        # applications are revoked)
+        order = np.lexsort((key, apartment_pos))
+        apartment_pos = apartment_pos[order]
+        renter_idx = renter_idx[order]
+        active = np.ones(len(renter_idx), dtype=bool)
+        while active.any():
+            a_pos = apartment_pos[active]
+            r_idx = renter_idx[active]
+            # proposal of each apartment: applicant with the lowest key
+            first = np.append(True, a_pos[1:] != a_pos[:-1])
+            proposal_a = a_pos[first]
+            proposal_r = r_idx[first]
+            # first apartment (in order) that each renter has applied to
+            earliest = np.full(n_renters, n_apartments)
+            np.minimum.at(earliest, r_idx, a_pos)
+            # proposals that cannot be overruled by preceding apartments
+            final = earliest[proposal_r] == proposal_a
+            selected[proposal_a[final]] = proposal_r[final]
+            matched[proposal_r[final]] = True
+            resolved[proposal_a[final]] = True
+            # revoke applications of selected renters and settled apartments
+            active &= ~resolved[apartment_pos] & ~matched[renter_idx]
+        return(selected)
+    
     def decreasePrice(self, rent_decrease_factor):
         """ 
         Method for price reduction of available apartments of landlords by a 
@@ -128,7 +457,7 @@ class Landlords():
         self.price = np.where((self.available == True) & (self.private==True), 
                               self.price * rent_decrease_factor, self.price)
         
-    def updatePrice(self, renters, prob_increase, max_increase): 
+    def updatePrice(self, renters, prob_increase, max_increase, rng=rd): 
         """
         Draw random values ([0,1)) for all landlords, and then update the price
         for apartments of private landlords by factor max_increase, if the 
@@ -145,40 +474,61 @@ class Landlords():
         deviate due to the random seed changing compared to the presented 
         results in the thesis.
         """       
-        self.random = rd.rand(len(self.apartment)) 
-        # retrieve 'IDs' of apartments whose price will be increased
-        apartment_increase = self.apartment[np.where(
-            (self.random < prob_increase) & (self.private==True))] 
+        self.random = rng.rand(len(self.apartment)) 
+        # retrieve index of landlords whose price will be increased
+        idx_increase = np.where(
+            (self.random < prob_increase) & (self.private==True))[0]
         # increase apartment price for landlords
-        self.price[np.where(np.isin(self.apartment,
-                                    apartment_increase))] *= max_increase
+        self._own('price')
+        renters._own('price')
+        self.price[idx_increase] *= max_increase
         # increase price for current renters of affected apartments
-        renters.price[np.where(np.isin(renters.apartment,
-                                        apartment_increase))] *= max_increase
+        tenants = self.tenant[idx_increase]
+        renters.price[renters.getIndex(tenants[tenants >= 0])] *= max_increase
         return(renters)
 
         
 
-#%%% [2] Class for population of renters
+#%%% [3] Class for population of renters
 
-class Renters: 
-    # Declare instance variables
-    def __init__(self, uid=None, apartment=None, price=None, quality=None, 
-                 searching=None,income=None, random=None, preferences=None, 
-                 utility=None):
-        self.uid = uid
-        self.apartment = apartment
-        self.price = price 
-        self.quality = quality
-        self.searching = searching
-        self.income = income
-        self.random = random
-        self.preferences = preferences
-        self.utility = utility
+class Renters(Population): 
+    __slots__ = ()
+    # Declare instance variables (data type and default for new renters)
+    attributes = {'uid': (int, 0),
+                  'apartment': (int, -1),
+                  'price': (float, 0),
+                  'quality': (float, 0),
+                  'searching': (bool, True),
+                  'income': (float, 0),
+                  'random': (float, 0),
+                  'preferences': (float, 0),
+                  'utility': (float, 0)}
     
     # Define instance methods 
+    def getIndex(self, uid):
+        """
+        Retrieve the index of the renters with the given uids. Uids are 
+        strictly increasing (joiners get a higher uid than all existing 
+        renters and removals keep the order), such that a binary search is
+        sufficient and the lookup remains valid after joins and leaves.
+        """
+        profiler.count('index_lookups')
+        return(np.searchsorted(self.uid, uid))
+    
+    def moveOut(self, idx_renters):
+        """
+        Renters with the given index move out of their apartment and start 
+        searching for a new apartment (the landlords have to be informed 
+        separately, see Landlords.moveOut).
+        """
+        self._own('searching', 'price', 'quality', 'apartment')
+        self.searching[idx_renters] = True
+        self.price[idx_renters] = 0
+        self.quality[idx_renters] = 0
+        self.apartment[idx_renters] = -1
+    
     def updateIncome(self, prob_income_change, income_change, income_min,
-                     income_max):
+                     income_max, rng=rd):
         """" 
         Renters' income is updated. The affected renters are chosen by a 
         stochastic process each period. The parameter 'prob_income_change' 
@@ -188,9 +538,9 @@ class Renters:
         Furthermore, incomes cannot exceed the maximum income, and cannot 
         become lower than the minimum income.
         """
-        self.random = rd.rand(len(self.uid))
+        self.random = rng.rand(len(self.uid))
         self.income = np.where(self.random < prob_income_change, 
-                               np.exp(rd.randn()*income_change)*self.income, 
+                               np.exp(rng.randn()*income_change)*self.income, 
                                self.income)
         self.income = np.where(self.income < income_min,income_min,self.income)
         self.income = np.where(self.income > income_max,income_max,self.income)
@@ -211,54 +561,37 @@ class Renters:
        If that is no longer the case they move out and inform their landlords
        about the change.
        """
-       # get apartment ID of unaffordable apartments
-       apartments = self.apartment[np.where(
-           (self.price != None) & (max_rent_share * self.income < self.price))]
-       #print("Sum of no longer affordable apartments:", len(apartments))
-       # change renters status, price, quality and ap. if no longer affordable
-       self.searching = np.where(np.isin(self.apartment, apartments),
-                                 True, self.searching)
-       self.price = np.where(np.isin(self.apartment, apartments), 
-                             0, self.price)
-       self.quality = np.where(np.isin(self.apartment, apartments),
-                               0, self.quality)
-       self.apartment = np.where(np.isin(self.apartment, apartments),
-                                 -1, self.apartment)
+       # get index of renters whose apartment is no longer affordable
+       idx_movers = np.where(max_rent_share * self.income < self.price)[0]
+       #print("Sum of no longer affordable apartments:", len(idx_movers))
        # Update availability of Landlords apartment
-       landlords.available = np.where(np.isin(landlords.apartment, apartments),
-                                      True, landlords.available)
+       landlords.moveOut(self.apartment[idx_movers])
+       # change renters status, price, quality and ap. if no longer affordable
+       self.moveOut(idx_movers)
        return(landlords)
 
 
-    def moveRandomly(self, landlords, prob_random_move):
+    def moveRandomly(self, landlords, prob_random_move, rng=rd):
         """ 
         Stochastic process that determines which renters decide to move out 
         from their current apartment. The method ensures that the renters who
         move out as well as their landlords are updated accordingly.
         """
         # update random numbers for selection of renters
-        self.random = rd.rand(len(self.uid))
-        # get apartment IDs of renters moving out (randomly selected)
-        apartments = self.apartment[np.where((self.random < prob_random_move)
-                                             & (self.searching == False))]
-        #print("Number of random movers", len(apartments))
-        # update search status, price, quality and apartment for random movers
-        self.searching = np.where(np.isin(self.apartment,apartments),
-                                  True,self.searching)
-        self.price = np.where(np.isin(self.apartment,apartments), 
-                              0, self.price)
-        self.quality = np.where(np.isin(self.apartment,apartments),
-                                0,self.quality)
-        self.apartment = np.where(np.isin(self.apartment,apartments),
-                                  -1,self.apartment)   
+        self.random = rng.rand(len(self.uid))
+        # get index of renters moving out (randomly selected)
+        idx_movers = np.where((self.random < prob_random_move)
+                              & (self.searching == False))[0]
+        #print("Number of random movers", len(idx_movers))
         # Update availability of Landlords apartment
-        landlords.available = np.where(np.isin(landlords.apartment,apartments),
-                                       True,landlords.available)
+        landlords.moveOut(self.apartment[idx_movers])
+        # update search status, price, quality and apartment for random movers
+        self.moveOut(idx_movers)
         return(landlords)
 
 
     def screenMarket(self, landlords, screener_share, req_utility_improvement,
-                     req_n_preferred_options):
+                     req_n_preferred_options, rng=rd):
         """
         This method lets renters currently living in an apartment sporadically
         check the apartment market and evaluate if the available options are
@@ -271,113 +604,310 @@ class Renters:
         # Get index of households living in an apartment (potential screeners)
         idx_pot_screeners = np.where(self.searching==False)
         # Randomly draw sample of potential screeners (actually screening)
-        idx_screening = rd.choice(idx_pot_screeners[0], 
+        idx_screening = rng.choice(idx_pot_screeners[0], 
             size = round(len(idx_pot_screeners[0])*screener_share),
             replace=False)
         
-        # check for all screeners if they have room for improvement:
-        for r in range(len(idx_screening)):
-            # calculate utility for available apartments (utility alternative)
-            utility_alt = quality**self.preferences[idx_screening[r]] * (
-                (self.income[idx_screening[r]]-prices).clip(min=0)**(
-                1-self.preferences[idx_screening[r]]))
-            number_prefered_apartments = len(np.where(utility_alt > 
-                    self.utility[idx_screening[r]])[0]*req_utility_improvement)
-            # screener leaves if enough preferred options are available
-            if number_prefered_apartments >= req_n_preferred_options:               
-                # Update availability of sceener's previous apartment
-                landlords.available[np.where(landlords.apartment == 
-                                    self.apartment[idx_screening[r]])] = True
-                # Update screener's status who decided to leave
-                self.searching[idx_screening[r]] = True
-                self.price[idx_screening[r]] = 0
-                self.quality[idx_screening[r]] = 0
-                self.apartment[idx_screening[r]] = -1  
+        # check for all screeners if they have room for improvement (the
+        # required improvement factor does not restrict the count, as in the 
+        # original specification of the model)
+        number_prefered_apartments = self.countPreferredOptions(
+            idx_screening, prices, quality, req_n_preferred_options)
+        # screener leaves if enough preferred options are available
+        idx_leaving = idx_screening[
+            number_prefered_apartments >= req_n_preferred_options]
+        # Update availability of sceeners' previous apartments
+        landlords.moveOut(self.apartment[idx_leaving])
+        # Update screeners' status who decided to leave
+        self.moveOut(idx_leaving)
         return(landlords)
     
+    def countPreferredOptions(self, idx_renters, prices, quality, max_count,
+                              max_elements=2**20, rows=None):
+        """
+        Count for the given renters how many of the apartments (prices and 
+        quality) would provide a higher utility than their current apartment.
+        Prices and quality are either the same apartments for all renters 
+        (1-D) or tables with one row of apartments per group of renters (2-D,
+        padded with NaN, e.g. replicas), rows contains the row of every 
+        renter (only the rows of the current chunk are indexed).
+        The utilities are evaluated in chunks of renters x apartments with at
+        most max_elements entries. Counting stops for a renter once max_count
+        preferred options have been found, the returned count is then only a
+        lower bound of the number of preferred options.
+        """
+        counts = np.zeros(len(idx_renters), dtype=int)
+        # size of chunks (apartments and renters)
+        n_columns = max(1, min(prices.shape[-1], 1024))
+        n_rows = max(1, max_elements // n_columns)
+        for start in range(0, len(idx_renters), n_rows):
+            # renters of current chunk who are still counting
+            active = np.arange(start, min(start+n_rows, len(idx_renters)))
+            for c in range(0, prices.shape[-1], n_columns):
+                r = idx_renters[active]
+                # apartments of current chunk
+                if prices.ndim == 1:
+                    p = prices[c:c+n_columns]
+                    q = quality[c:c+n_columns]
+                else:
+                    p = prices[rows[active], c:c+n_columns]
+                    q = quality[rows[active], c:c+n_columns]
+                # calculate utility for apartments (utility alternative)
+                utility_alt = q**self.preferences[r][:,None] * (
+                    (self.income[r][:,None]-p).clip(min=0)**(
+                        1-self.preferences[r][:,None]))
+                counts[active] += np.sum(
+                    utility_alt > self.utility[r][:,None], axis=1)
+                # stop counting once enough preferred options were found
+                active = active[counts[active] < max_count]
+                if len(active) == 0:
+                    break
+        return(counts)
+    
     def application(self, landlords, max_rent_share, inc_factor_state, 
-                    state_price, max_sample_applicants, max_applications):
+                    state_price, max_sample_applicants, max_applications,
+                    batch_size=None, rng=rd):
         """
         Method for the application process for renters who are actively 
-        searching for an apartment. Arrays are created containing all
+        searching for an apartment. A sparse matrix is created containing all
         applications by renters for all selected apartments. Specifically, 
-        renters do append their own uid to apartments for which they do want to 
-        apply. Information will be sent to landlords who will then select new 
+        the matrix has one row per available apartment and one column per 
+        renter, and an entry for every apartment a renter does want to apply
+        for. Information will be sent to landlords who will then select new 
         tenants among the applicants.
         Renters can only select among visible apartments - meaning that
         unaffordable apartments and state apartments where they do not fulfill 
         the income criterion are not presented to renters. Furthermore, some
         of the remaining apartments might as well not be visible due to
         imperfect information (random subset is presented). 
+        If a batch_size is defined, the searchers are not processed one after
+        another, but in batches of batch_size searchers at once (see 
+        selectApartments). Same selection process, but different random draws.
+        Random numbers are drawn from rng (numpy.random by default).
+        Returns a record array with the apartment, price, quality and private
+        flag of all apartments with applications, and the application matrix.
         """
         # retrieve required information of available apartments
-        apartments = landlords.apartment[np.where(landlords.available == True)]
-        prices = landlords.price[np.where(landlords.available == True)]
-        quality = landlords.quality[np.where(landlords.available == True)]
-        private = landlords.private[np.where(landlords.available == True)]
-        apartment_info = np.transpose(np.vstack(
-            (apartments,prices,quality,private)))
-        # create new array to later collect UIDs of applicants
-        applicants_uid = np.zeros_like(apartment_info[:,0])
+        idx_available = np.where(landlords.available == True)[0]
+        apartment_info = landlords.getApartmentInfo(idx_available)
+        prices = landlords.price[idx_available]
+        quality = landlords.quality[idx_available]
+        private = landlords.private[idx_available]
         # get index from all households currently searching an apartment
         idx_searchers = np.where(self.searching == True)[0]
-        # loop through all searchers to select and apply for apartments
-        for i in idx_searchers:
-            # filter out apartments that are not affordable
-            visible_a = apartment_info[np.where(
-                apartment_info[:,1]<max_rent_share*self.income[i])]
-            # filter out state apartments from visible apartment list 
-            # for renters who do not fulfill the income criterion
-            if self.income[i] > state_price * inc_factor_state:
-                visible_a = visible_a[visible_a[:,3]==True]
-            # only continue if at least 1 apartment on the market is affordable
-            if visible_a.size > 0:
-                # get random sample of available apartment (imperfect inf.)
-                # sample size is equal to max_sample_applicants or to all
-                # visible apartments in case it is below max_sample_applicants
-                sample_size = min(max_sample_applicants,len(visible_a[:,0]))
-                idx_sampled_a = rd.choice(np.arange(len(visible_a)),
-                                          sample_size,replace=False)
-                visible_a = visible_a[idx_sampled_a,:]
-                
-                # calculate utility for visible apartments    
-                utility = visible_a[:,2]**self.preferences[i] * (
-                    (self.income[i]-visible_a[:,1]).clip(min=0)**(
-                        (1-self.preferences[i])))
-                visible_a = np.column_stack((visible_a,utility))
-                # select apartments with greatest utility (no more than 
-                # max_application can be selected)
-                selection_size = min(max_applications,len(visible_a))
-                selected_apartments = visible_a[np.argpartition(
-                    visible_a[:,4],-selection_size)[-selection_size:],:]
-                #create list of same shape to append uid of current searcher
-                uid  = np.zeros_like(apartment_info[:,0])
-                index_applicants = np.where(np.isin(
-                    apartment_info[:,0],selected_apartments[:,0]))
-                uid[index_applicants] = self.uid[i]
-                # combine applications of current searcher with already 
-                # collected applications from other searchers
-                applicants_uid = np.column_stack((applicants_uid,uid))
+        # preallocate arrays to collect the applications (apartment position
+        # and renter index), each searcher applies for max_applications at most
+        application_a = np.zeros(len(idx_searchers)*max_applications, 
+                                 dtype=int)
+        application_r = np.zeros(len(idx_searchers)*max_applications, 
+                                 dtype=int)
+        n_applications = 0
+        # process searchers in batches
+        if batch_size is not None:
+            for start in range(0, len(idx_searchers), batch_size):
+                # select apartments for current batch of searchers
+                batch_a, batch_r = self.selectApartments(
+                    idx_searchers[start:start+batch_size], prices, quality, 
+                    private, max_rent_share, inc_factor_state, state_price, 
+                    max_sample_applicants, max_applications, rng = rng)
+                # store applications of current batch
+                application_a[n_applications:n_applications+len(batch_a)] = (
+                    batch_a)
+                application_r[n_applications:n_applications+len(batch_a)] = (
+                    batch_r)
+                n_applications += len(batch_a)
+        else:
+            # loop through all searchers to select and apply for apartments
+            for i in idx_searchers:
+                # filter out apartments that are not affordable
+                visible_a = np.where(prices<max_rent_share*self.income[i])[0]
+                # filter out state apartments from visible apartment list 
+                # for renters who do not fulfill the income criterion
+                if self.income[i] > state_price * inc_factor_state:
+                    visible_a = visible_a[private[visible_a]==True]
+                # only continue if at least 1 apartment is affordable
+                if visible_a.size > 0:
+                    # get random sample of available apartment (imperfect 
+                    # inf.) sample size is equal to max_sample_applicants or
+                    # to all visible apartments in case it is below 
+                    # max_sample_applicants
+                    sample_size = min(max_sample_applicants,len(visible_a))
+                    idx_sampled_a = rng.choice(np.arange(len(visible_a)),
+                                              sample_size,replace=False)
+                    visible_a = visible_a[idx_sampled_a]
+                    
+                    # calculate utility for visible apartments    
+                    utility = quality[visible_a]**self.preferences[i] * (
+                        (self.income[i]-prices[visible_a]).clip(min=0)**(
+                            (1-self.preferences[i])))
+                    # select apartments with greatest utility (no more than 
+                    # max_application can be selected)
+                    selection_size = min(max_applications,len(visible_a))
+                    selected_apartments = visible_a[np.argpartition(
+                        utility,-selection_size)[-selection_size:]]
+                    # store applications of current searcher
+                    application_a[n_applications:
+                                  n_applications+selection_size] = (
+                                      selected_apartments)
+                    application_r[n_applications:
+                                  n_applications+selection_size] = i
+                    n_applications += selection_size
+            
+        return(self.collectApplications(apartment_info, 
+                                        application_a[:n_applications], 
+                                        application_r[:n_applications]))
+    
+    def collectApplications(self, apartment_info, application_a, 
+                            application_r):
+        """
+        Combine the applications (apartment position within apartment_info 
+        and renter index) to the sparse application matrix. Apartments without 
+        applications are excluded. Returns the information of the apartments
+        with applications and the application matrix.
+        """
+        # exclude apartments with no applications
+        idx_applied, application_a = np.unique(application_a, 
+                                               return_inverse=True)
+        apartment_info = apartment_info[idx_applied]
+        # create sparse application matrix (apartments x renters), applicants
+        # of each apartment are ordered by their index
+        applicants = sparse.csr_matrix(
+            (np.ones(len(application_r), dtype=bool), 
+             (application_a, application_r)),
+            shape=(len(apartment_info), len(self.uid)))
+        applicants.sort_indices()
+        return(apartment_info,applicants)
 
-        # create properly formatted list containing all applicants
-        applicants_uid_combined = []
-        for i in range(len(applicants_uid)):
-            # emtpy lists for apartments with no applications received
-            if np.sum(applicants_uid[i]) == 0:
-                applicants_uid_combined.append([])
-            # list with all applicants for other apartments
-            else:
-                applicants_uid_combined.append(applicants_uid[i,np.nonzero(
-                    applicants_uid[i])][0].astype(int))
-        # ensure that apartment numbers are formatted as integers
-        apartment_info[:,0] = apartment_info[:,0].astype(int)
-        #exclude apartments with no applications
-        idx_no_applicants = [idx for idx, element in enumerate(
-            applicants_uid_combined) if len(element) == 0]
-        if len(idx_no_applicants) > 0:
-            # sorting required, such that highest indexes are deleted first,
-            # and other indexes are not changed after the deletion
-            for index in sorted(idx_no_applicants, reverse=True):
-                del applicants_uid_combined[index]
-            apartment_info = np.delete(apartment_info, idx_no_applicants, 0)
-        return(apartment_info,applicants_uid_combined)     
\ No newline at end of file
+    def selectApartments(self, idx_searchers, prices, quality, private, 
+                         max_rent_share, inc_factor_state, state_price, 
+                         max_sample_applicants, max_applications, 
+                         candidates=None, rng=rd):
+        """
+        Apartment selection of the application process for a batch of 
+        searchers at once. Visibility, sampling and utility are evaluated for
+        all searchers and available apartments in 2-D arrays (searchers x
+        apartments). The random sample of visible apartments consists of the
+        visible apartments with the lowest random keys, which corresponds to 
+        a random choice without replacement. By default all apartments are 
+        candidates for all searchers, otherwise candidates contains the 
+        positions of the candidate apartments for each searcher (one row per
+        searcher, padded with -1). Returns the apartment positions and renter
+        indexes of all applications of the batch.
+        """
+        # candidate apartments of the searchers (all apartments by default)
+        if candidates is None:
+            candidates = np.arange(len(prices))[None,:]
+        # no applications if no apartment is available
+        if candidates.shape[1] == 0:
+            return(np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        income = self.income[idx_searchers][:,None]
+        preferences = self.preferences[idx_searchers][:,None]
+        # visible apartments: affordable, and state apartments only for
+        # renters who fulfill the income criterion
+        visible = (candidates >= 0) & (
+            prices[candidates]<max_rent_share*income) & (
+            (private[candidates]==True) | 
+            (income <= state_price * inc_factor_state))
+        # get random sample of visible apartments (imperfect information)
+        sample_size = min(max_sample_applicants, candidates.shape[1])
+        key = np.where(visible, rng.rand(*visible.shape), 2)
+        idx_sampled_a = np.argpartition(key, sample_size-1, 
+                                        axis=1)[:,:sample_size]
+        sampled = np.take_along_axis(visible, idx_sampled_a, axis=1)
+        idx_sampled_a = np.take_along_axis(
+            np.broadcast_to(candidates, visible.shape), idx_sampled_a, axis=1)
+        # calculate utility for sampled apartments (-inf if not visible)
+        utility = np.where(sampled, quality[idx_sampled_a]**preferences * (
+            (income-prices[idx_sampled_a]).clip(min=0)**(1-preferences)), 
+            -np.inf)
+        # select apartments with greatest utility (no more than 
+        # max_application can be selected)
+        selection_size = min(max_applications, sample_size)
+        idx_selected = np.argpartition(utility, -selection_size, 
+                                       axis=1)[:,-selection_size:]
+        selected = np.take_along_axis(sampled, idx_selected, axis=1)
+        selected_apartments = np.take_along_axis(idx_sampled_a, idx_selected,
+                                                 axis=1)[selected]
+        selected_renters = np.broadcast_to(idx_searchers[:,None], 
+                                           idx_selected.shape)[selected]
+        return(selected_apartments, selected_renters)
+
+#%% [4] Compiled populations (numba backend)
+
+class CompiledLandlords(Landlords):
+    """
+    Population of landlords which uses the compiled kernels (kernels.py) for
+    the price setting and the tenant selection. Same process as Landlords, but
+    random numbers are drawn from the numba random number generator. The 
+    tenant selection is always sequential (batched and rng are ignored).
+    """
+    __slots__ = ()
+    
+    def setPrice(self, max_increase, q_threshold, min_n_comparable):
+        # prices are updated in place
+        self._own('price')
+        kernels.setPrice(self.quality, self.price, self.available, 
+                         self.private, max_increase, q_threshold, 
+                         min_n_comparable)
+    
+    def selectTenant(self, renters, apartment_information, applicants, 
+                     batched=False, rng=None):
+        # Skip selection if there are no applications at all
+        if applicants.nnz == 0:
+            return(renters)
+        selected = kernels.selectTenant(applicants.indptr, applicants.indices,
+                                        len(renters.uid))
+        return(self.assignTenants(renters, apartment_information, selected))
+
+class CompiledRenters(Renters):
+    """
+    Population of renters which uses the compiled kernels (kernels.py) for the
+    affordability check, random moves, market screening and application. 
+    Same process as Renters, but random numbers are drawn from the numba 
+    random number generator. Applications are never batched (batch_size is 
+    ignored), and the random numbers of rng are not used.
+    """
+    __slots__ = ()
+    
+    def checkAffordability(self, landlords, max_rent_share):
+        idx_movers = kernels.checkAffordability(self.income, self.price, 
+                                                max_rent_share)
+        landlords.moveOut(self.apartment[idx_movers])
+        self.moveOut(idx_movers)
+        return(landlords)
+    
+    def moveRandomly(self, landlords, prob_random_move, rng=None):
+        # random numbers of renters are updated in place
+        self._own('random')
+        idx_movers = kernels.moveRandomly(self.random, self.searching, 
+                                          prob_random_move)
+        landlords.moveOut(self.apartment[idx_movers])
+        self.moveOut(idx_movers)
+        return(landlords)
+    
+    def screenMarket(self, landlords, screener_share, req_utility_improvement,
+                     req_n_preferred_options, rng=None):
+        idx_available = np.where(landlords.available == True)[0]
+        idx_pot_screeners = np.where(self.searching==False)[0]
+        idx_leaving = kernels.screenMarket(
+            idx_pot_screeners, round(len(idx_pot_screeners)*screener_share), 
+            self.income, self.preferences, self.utility, 
+            landlords.price[idx_available], landlords.quality[idx_available],
+            req_n_preferred_options)
+        landlords.moveOut(self.apartment[idx_leaving])
+        self.moveOut(idx_leaving)
+        return(landlords)
+    
+    def application(self, landlords, max_rent_share, inc_factor_state, 
+                    state_price, max_sample_applicants, max_applications,
+                    batch_size=None, rng=None):
+        idx_available = np.where(landlords.available == True)[0]
+        application_a, application_r = kernels.application(
+            landlords.price[idx_available], landlords.quality[idx_available],
+            landlords.private[idx_available], self.income, self.preferences, 
+            np.where(self.searching == True)[0], max_rent_share, 
+            inc_factor_state, state_price, max_sample_applicants, 
+            max_applications)
+        return(self.collectApplications(
+            landlords.getApartmentInfo(idx_available), application_a, 
+            application_r))
@@ -0,0 +1,300 @@
+#%% BENCHMARKS
+#%%
+
+"""
+This file contains the microbenchmarks of the agent methods. For every
+population size, a market state is created with initializeModel and
+simulated for a few months (warm-up, such that apartments are occupied).
+The benchmark state is the state of the following month before the market
+exchange (after the updates, the screening and the price setting), such that
+renters are searching and apply for apartments. Afterwards, every method is 
+timed in isolation on a
+copy of this state: the inputs of the method (e.g. the applications for
+selectTenant) are prepared before the timer starts, and every repetition
+starts from the same state. The timings of every run are appended to a
+history file (JSON), and methods which became slower than in the previous
+run with the same settings are reported as regressions.
+The benchmarks are run with the parameters of parameters.py (e.g. backend
+and compact_mode), the number of apartments is scaled with the ratio of
+n_apartments to n_renters.
+"""
+
+#%% [0] Required imports
+
+# import required packages
+import numpy as np
+import os
+import gc
+import copy
+import json
+import time
+import datetime
+import platform
+import subprocess
+
+# imports from other python files
+from additional_methods import (initializeModel, simulateMonth,
+                                updatePopulation, updateApartments,
+                                evaluateMonth)
+from streams import createGenerator
+from parameters import (inc_factor_state, income_min, income_max,
+                        max_rent_share, prob_income_change, income_change,
+                        prob_random_move, prob_increase, rent_decrease_factor,
+                        screener_share, req_utility_improvement,
+                        req_n_preferred_options, max_sample_applicants,
+                        max_applications, q_threshold, min_n_comparable,
+                        batched_selection, application_batch_size,
+                        share_state_apartments, state_price, max_increase,
+                        n_renters, n_apartments, outputs, backend,
+                        compact_mode, bit_generator)
+
+#%% [1] Benchmarked methods
+
+def benchSetPrice(renters, landlords, rng):
+    return(lambda: landlords.setPrice(max_increase, q_threshold,
+                                      min_n_comparable))
+
+def benchSelectTenant(renters, landlords, rng):
+    # applications of the searching renters (not timed)
+    apartment_info, applicants = renters.application(
+        landlords, max_rent_share, inc_factor_state, state_price,
+        max_sample_applicants, max_applications, application_batch_size, rng)
+    if applicants.nnz == 0:
+        raise ValueError('No applications in the benchmark state.')
+    return(lambda: landlords.selectTenant(renters, apartment_info,
+                                          applicants, batched_selection,
+                                          rng))
+
+def benchDecreasePrice(renters, landlords, rng):
+    return(lambda: landlords.decreasePrice(rent_decrease_factor))
+
+def benchUpdatePrice(renters, landlords, rng):
+    return(lambda: landlords.updatePrice(renters, prob_increase,
+                                         max_increase, rng))
+
+def benchApplication(renters, landlords, rng):
+    if not np.any(renters.searching) or not np.any(landlords.available):
+        raise ValueError('No searching renters or available apartments in '
+                         'the benchmark state.')
+    return(lambda: renters.application(
+        landlords, max_rent_share, inc_factor_state, state_price,
+        max_sample_applicants, max_applications, application_batch_size,
+        rng))
+
+def benchScreenMarket(renters, landlords, rng):
+    return(lambda: renters.screenMarket(landlords, screener_share,
+                                        req_utility_improvement,
+                                        req_n_preferred_options, rng))
+
+def benchCheckAffordability(renters, landlords, rng):
+    return(lambda: renters.checkAffordability(landlords, max_rent_share))
+
+def benchMoveRandomly(renters, landlords, rng):
+    return(lambda: renters.moveRandomly(landlords, prob_random_move, rng))
+
+def benchUpdateIncome(renters, landlords, rng):
+    return(lambda: renters.updateIncome(prob_income_change, income_change,
+                                        income_min, income_max, rng))
+
+def benchUpdateUtility(renters, landlords, rng):
+    return(lambda: renters.updateUtility())
+
+def benchUpdatePopulation(renters, landlords, rng):
+    return(lambda: updatePopulation(renters, landlords, rng))
+
+def benchUpdateApartments(renters, landlords, rng):
+    return(lambda: updateApartments(renters, landlords, rng))
+
+def benchEvaluateMonth(renters, landlords, rng):
+    return(lambda: evaluateMonth(renters, landlords, outputs))
+
+# benchmarks (name: function that prepares the inputs of the method and
+# returns the timed call)
+benchmarks = {'Landlords.setPrice': benchSetPrice,
+              'Landlords.selectTenant': benchSelectTenant,
+              'Landlords.decreasePrice': benchDecreasePrice,
+              'Landlords.updatePrice': benchUpdatePrice,
+              'Renters.application': benchApplication,
+              'Renters.screenMarket': benchScreenMarket,
+              'Renters.checkAffordability': benchCheckAffordability,
+              'Renters.moveRandomly': benchMoveRandomly,
+              'Renters.updateIncome': benchUpdateIncome,
+              'Renters.updateUtility': benchUpdateUtility,
+              'updatePopulation': benchUpdatePopulation,
+              'updateApartments': benchUpdateApartments,
+              'evaluateMonth': benchEvaluateMonth}
+
+#%% [2] Methods to run the benchmarks
+
+def createState(size, warmup, seed=0):
+    """
+    Market state with size renters (and the number of apartments scaled
+    accordingly), simulated for warmup months, followed by the phases of the
+    next month before the market exchange (see simulateMonth). Returns the 
+    renters, the landlords and the random number generator.
+    """
+    rng = createGenerator(seed, bit_generator)
+    renters, landlords = initializeModel(
+        size, round(size * n_apartments / n_renters), share_state_apartments,
+        state_price, rng)
+    for m in range(warmup):
+        renters, landlords = simulateMonth(renters, landlords, m,
+                                           inc_factor_state, max_increase,
+                                           state_price, rng=rng)
+    # next month until the market exchange (same phases as simulateMonth)
+    renters, landlords = updatePopulation(renters, landlords, rng)
+    renters, landlords = updateApartments(renters, landlords, rng)
+    renters = landlords.updatePrice(renters, prob_increase, max_increase, rng)
+    renters.updateIncome(prob_income_change, income_change, income_min,
+                         income_max, rng)
+    renters.updateUtility()
+    landlords = renters.checkAffordability(landlords, max_rent_share)
+    landlords = renters.moveRandomly(landlords, prob_random_move, rng)
+    landlords = renters.screenMarket(landlords, screener_share,
+                                     req_utility_improvement,
+                                     req_n_preferred_options, rng)
+    landlords.setPrice(max_increase, q_threshold, min_n_comparable)
+    return(renters, landlords, rng)
+
+def timeMethod(benchmark, renters, landlords, rng, repeat, budget=None):
+    """
+    Time one benchmark repeat times. Every repetition runs on a copy of the
+    state (renters, landlords and random number generator), the copy and
+    the preparation of the inputs are not timed. If a budget (seconds) is
+    given, no further repetition is started once the timed calls exceeded
+    the budget (slow methods of large populations). Returns the times in
+    seconds.
+    """
+    times = []
+    for r in range(repeat):
+        if budget is not None and sum(times) > budget:
+            break
+        renters_r, landlords_r, rng_r = copy.deepcopy((renters, landlords,
+                                                       rng))
+        call = benchmark(renters_r, landlords_r, rng_r)
+        # no garbage collection within the timed call
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return(times)
+
+def runBenchmarks(sizes, warmup=3, repeat=5, budget=None, names=None, 
+                  verbose=True):
+    """
+    Run the benchmarks (all, or the given names) for every population size
+    (see timeMethod for repeat and budget). Returns a dictionary size: 
+    {benchmark: {'min', 'median', 'repeat'}} with the times in seconds.
+    """
+    names = list(benchmarks) if names is None else names
+    results = dict()
+    for size in sizes:
+        if verbose:
+            print('Size:', size, 'renters')
+        renters, landlords, rng = createState(size, warmup)
+        results[str(size)] = dict()
+        for name in names:
+            times = timeMethod(benchmarks[name], renters, landlords, rng,
+                               repeat, budget)
+            results[str(size)][name] = {'min': min(times),
+                                        'median': float(np.median(times)),
+                                        'repeat': len(times)}
+            if verbose:
+                print('   %-28s %10.6f s' % (name, min(times)))
+    return(results)
+
+def getCommit():
+    """
+    Current git commit of the model code (None outside of a repository).
+    """
+    try:
+        return(subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return(None)
+
+def createRun(results, warmup):
+    """
+    Entry of the history: the results with the settings that determine the
+    timings (backend, compact mode, warm-up) and a description of the run.
+    """
+    return({'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': getCommit(),
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'settings': {'backend': backend, 'compact_mode': compact_mode,
+                         'bit_generator': bit_generator, 'warmup': warmup},
+            'results': results})
+
+def loadHistory(file):
+    """
+    Runs stored in the history file (list of runs, empty if the file does
+    not exist).
+    """
+    if not os.path.exists(file):
+        return([])
+    with open(file) as f:
+        return(json.load(f))
+
+def saveHistory(file, history):
+    with open(file, 'w') as f:
+        json.dump(history, f, indent=1)
+
+def findRegressions(run, history, threshold=0.1, min_difference=1e-4):
+    """
+    Compare the run with the last run of the history with the same settings
+    and machine. A benchmark is a regression if its minimum time increased
+    by more than the share threshold (and by more than min_difference
+    seconds, such that the noise of very short calls is ignored). Returns a
+    list of (size, benchmark, previous time, time).
+    """
+    previous = [r for r in history if r['settings'] == run['settings']
+                and r['machine'] == run['machine']]
+    if not previous:
+        return([])
+    regressions = []
+    for size, results_size in run['results'].items():
+        previous_size = previous[-1]['results'].get(size, dict())
+        for name, result in results_size.items():
+            if name not in previous_size:
+                continue
+            before = previous_size[name]['min']
+            if (result['min'] > before * (1 + threshold) and
+                    result['min'] - before > min_difference):
+                regressions.append((size, name, before, result['min']))
+    return(regressions)
+
+#%% [3] Run benchmarks
+
+if __name__ == '__main__':
+    # population sizes (renters), warm-up months, repetitions per method and
+    # time budget per method (seconds)
+    sizes = [1000, 10000, 100000, 1000000]
+    warmup = 3
+    repeat = 5
+    budget = 10
+    # history of all runs and threshold for regressions (share of the time)
+    history_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'benchmark_history.json')
+    threshold = 0.1
+
+    results = runBenchmarks(sizes, warmup, repeat, budget)
+    run = createRun(results, warmup)
+    history = loadHistory(history_file)
+    regressions = findRegressions(run, history, threshold)
+    history.append(run)
+    saveHistory(history_file, history)
+
+    # report regressions compared to the previous run
+    for size, name, before, after in regressions:
+        print('Regression: %s (%s renters) %.6f s -> %.6f s (+%.0f%%)' % (
+            name, size, before, after, 100 * (after / before - 1)))
+    if not regressions:
+        print('No regressions (threshold: %.0f%%)' % (100 * threshold))
@@ -0,0 +1,214 @@
+#%% KERNELS
+#%%
+
+"""
+This file contains compiled versions (numba) of the most time consuming
+agent methods. They are used by the compiled populations (CompiledRenters and
+CompiledLandlords in agents.py) if the numba backend is selected in the
+parameters. The kernels operate directly on the attribute arrays of the
+populations. Random numbers are drawn from the random number generator of
+numba (seeded with the method seed), hence the results differ from the numpy
+backend. Compiled kernels are cached on disk (__pycache__), such that they are
+only compiled once and not for every new process.
+"""
+
+#%% [0] Import required modules
+
+import numpy as np
+from numba import njit
+
+#%% [1] Random numbers
+
+@njit(cache=True)
+def seed(value):
+    """
+    Seed the random number generator used by the kernels (separate from the
+    numpy random number generator).
+    """
+    np.random.seed(value)
+
+#%% [2] Kernels for landlords
+
+@njit(cache=True)
+def setPrice(quality, price, available, private, max_increase, q_threshold,
+             min_n_comparable):
+    """
+    Compiled version of Landlords.setPrice (prices are updated in place).
+    """
+    # Check if there are any rented apartments
+    if np.all(available):
+        return
+    # index of rented private apartments sorted by quality (comparables)
+    comparables = np.where(~available & private)[0]
+    comparables = comparables[np.argsort(quality[comparables],
+                                         kind='mergesort')]
+    quality_sorted = quality[comparables]
+    # set comparable quality threshold such that 10% is covered
+    q_c_start = (quality.max() - quality.min()) * q_threshold
+    # loop through landlords who need to set a new price
+    for l in range(len(price)):
+        if not (available[l] and private[l]):
+            continue
+        # increase comparable quality threshold until enough comparables are
+        # found (or all comparables are included)
+        q_c = q_c_start
+        while True:
+            lower = np.searchsorted(quality_sorted, quality[l]-q_c,
+                                    side='right')
+            upper = np.searchsorted(quality_sorted, quality[l]+q_c,
+                                    side='left')
+            if (upper - lower >= min_n_comparable or
+                (lower == 0 and upper == len(comparables))):
+                break
+            q_c += q_c
+        if upper == lower:
+            continue
+        # calculate current market price
+        current_market_price = 0.0
+        for c in range(lower, upper):
+            current_market_price += price[comparables[c]]
+        current_market_price /= upper - lower
+        # new apartment: set price slightly above the market price
+        if price[l] == 0:
+            price[l] = current_market_price * max_increase
+        # if previously above market price, try to keep high price first
+        elif price[l] > current_market_price:
+            pass
+        # ensure that price is not more increased than legally allowed
+        elif current_market_price > max_increase*price[l]:
+            price[l] *= max_increase
+        # if the legal restrictions don't apply, use the market price
+        else:
+            price[l] = current_market_price
+
+@njit(cache=True)
+def selectTenant(indptr, indices, n_renters):
+    """
+    Compiled version of the sequential tenant selection (Landlords.
+    selectTenant). Takes the application matrix (indptr and indices of the
+    sparse matrix) and returns the index of the selected renter for each
+    apartment (-1 if no applicant is left).
+    """
+    selected = np.full(len(indptr)-1, -1, dtype=np.int64)
+    matched = np.zeros(n_renters, dtype=np.bool_)
+    candidates = np.empty(len(indices), dtype=np.int64)
+    # Loop through application list (apartment by apartment)
+    for i in range(len(indptr)-1):
+        # remove renters that were already selected by other landlords
+        n_candidates = 0
+        for k in range(indptr[i], indptr[i+1]):
+            if not matched[indices[k]]:
+                candidates[n_candidates] = indices[k]
+                n_candidates += 1
+        # randomly choose tenant among remaining applicants
+        if n_candidates > 0:
+            selected[i] = candidates[np.random.randint(0, n_candidates)]
+            matched[selected[i]] = True
+    return(selected)
+
+#%% [3] Kernels for renters
+
+@njit(cache=True)
+def checkAffordability(income, price, max_rent_share):
+    """
+    Compiled version of Renters.checkAffordability. Returns the index of
+    renters who can no longer afford their apartment.
+    """
+    movers = np.empty(len(income), dtype=np.int64)
+    n_movers = 0
+    for i in range(len(income)):
+        if max_rent_share * income[i] < price[i]:
+            movers[n_movers] = i
+            n_movers += 1
+    return(movers[:n_movers])
+
+@njit(cache=True)
+def moveRandomly(random, searching, prob_random_move):
+    """
+    Compiled version of Renters.moveRandomly. Draws new random numbers for all
+    renters (in place) and returns the index of the renters moving out.
+    """
+    movers = np.empty(len(random), dtype=np.int64)
+    n_movers = 0
+    for i in range(len(random)):
+        random[i] = np.random.random()
+        if random[i] < prob_random_move and not searching[i]:
+            movers[n_movers] = i
+            n_movers += 1
+    return(movers[:n_movers])
+
+@njit(cache=True)
+def screenMarket(idx_pot_screeners, n_screening, income, preferences,
+                 utility, prices, quality, req_n_preferred_options):
+    """
+    Compiled version of Renters.screenMarket. Randomly draws n_screening
+    screeners among the potential screeners and returns the index of the
+    screeners who found enough preferred options.
+    """
+    idx_screening = np.random.choice(idx_pot_screeners, n_screening,
+                                     replace=False)
+    leaving = np.empty(n_screening, dtype=np.int64)
+    n_leaving = 0
+    for r in idx_screening:
+        # count preferred options (stop once enough options were found)
+        n_preferred = 0
+        for a in range(len(prices)):
+            utility_alt = quality[a]**preferences[r] * max(
+                income[r]-prices[a], 0.0)**(1-preferences[r])
+            if utility_alt > utility[r]:
+                n_preferred += 1
+                if n_preferred >= req_n_preferred_options:
+                    break
+        # screener leaves if enough preferred options are available
+        if n_preferred >= req_n_preferred_options:
+            leaving[n_leaving] = r
+            n_leaving += 1
+    return(leaving[:n_leaving])
+
+@njit(cache=True)
+def application(prices, quality, private, income, preferences, idx_searchers,
+                max_rent_share, inc_factor_state, state_price,
+                max_sample_applicants, max_applications):
+    """
+    Compiled version of the apartment selection in Renters.application.
+    Returns the apartment position (within the available apartments) and
+    renter index of all applications.
+    """
+    application_a = np.empty(len(idx_searchers)*max_applications,
+                             dtype=np.int64)
+    application_r = np.empty(len(idx_searchers)*max_applications,
+                             dtype=np.int64)
+    n_applications = 0
+    visible_a = np.empty(len(prices), dtype=np.int64)
+    # loop through all searchers to select and apply for apartments
+    for i in idx_searchers:
+        # visible apartments: affordable, and state apartments only for
+        # renters who fulfill the income criterion
+        state_allowed = income[i] <= state_price * inc_factor_state
+        n_visible = 0
+        for a in range(len(prices)):
+            if prices[a] < max_rent_share*income[i] and (
+                    private[a] or state_allowed):
+                visible_a[n_visible] = a
+                n_visible += 1
+        # only continue if at least 1 apartment on the market is affordable
+        if n_visible == 0:
+            continue
+        # get random sample of visible apartments (partial shuffle)
+        sample_size = min(max_sample_applicants, n_visible)
+        for k in range(sample_size):
+            j = np.random.randint(k, n_visible)
+            visible_a[k], visible_a[j] = visible_a[j], visible_a[k]
+        # calculate utility for sampled apartments
+        utility = np.empty(sample_size)
+        for k in range(sample_size):
+            a = visible_a[k]
+            utility[k] = quality[a]**preferences[i] * max(
+                income[i]-prices[a], 0.0)**(1-preferences[i])
+        # select apartments with greatest utility
+        selection_size = min(max_applications, sample_size)
+        for k in np.argsort(utility)[sample_size-selection_size:]:
+            application_a[n_applications] = visible_a[k]
+            application_r[n_applications] = i
+            n_applications += 1
+    return(application_a[:n_applications], application_r[:n_applications])
@@ -111,3 +111,99 @@ weight_quality = 40
 """Evaluated outputs""" 
 outputs = ['mean_price', 'median_price', 'vacancy_rate_p', 'vacancy_rate_s',
            'vacancy_rate_t', 'utility_p25', 'utility_p50', 'utility_p75']
+
+"""Computational settings"""
+# Select tenants for all apartments at once (True) instead of apartment by 
+# apartment (False). Same selection process, but different random draws -> 
+# set to False to replicate the results of the thesis.
+batched_selection = False
+
+# Number of searchers whose applications are evaluated at once (batches of 
+# searchers x available apartments) instead of one searcher after another 
+# (None). Different random draws -> set to None to replicate the thesis.
+application_batch_size = None
+
+# Store agent attributes with 32 bit floats and integers (reduces memory usage
+# of large populations, but results deviate slightly due to lower precision)
+compact_mode = False
+
+# Backend for the agent methods: 'numpy' or 'numba' (compiled kernels, 
+# requires numba, different random draws -> use 'numpy' to replicate thesis)
+backend = 'numpy'
+
+# Run all simulations of runSimulations and runIntervention simultaneously in
+# lockstep (one population containing the agents of all simulations, see 
+# replicas.py). 
+# Same process, but different random draws -> set to False to replicate the
+# thesis.
+lockstep = False
+
+# Number of worker processes used to run the simulations of runSimulations in 
+# parallel (None: sequential). Each simulation draws from its own random 
+# stream derived from the experiment seed, such that the results do not depend
+# on the number of processes (but differ from the sequential results of the
+# thesis). Scripts using processes need the guard 
+# if __name__ == '__main__' on systems that spawn processes (Windows, macOS).
+n_processes = None
+
+# Number of months between checkpoints of the simulation state (only used if
+# a checkpoint file or directory is given, see runMonths), and whether the 
+# checkpoint files are compressed (smaller files, but slower to write)
+checkpoint_interval = 10
+checkpoint_compression = False
+
+# Directory of the result cache for runSimulations and runIntervention (None:
+# no caching). Runs with the same parameters, arguments, random state and 
+# model code are loaded from the cache instead of simulated again. The cache 
+# is limited to cache_size bytes (least recently used results are removed).
+cache_directory = None
+cache_size = 2**30
+
+# Aggregate the results of runSimulations and runIntervention online (mean and
+# variance of every output and month, see OnlineResults in results.py) instead
+# of keeping the results of all simulations. Only reservoir_size randomly 
+# chosen simulations are kept (e.g. for plots of individual simulations).
+# The aggregated results are supported by plotIntervention and 
+# subplotIntervention. runSweep always keeps the results of every simulation,
+# and tableIntervention_results (runPolicy_evaluation.py) and calibration.py
+# require them (calibration.py ignores aggregate, runPolicy_evaluation.py 
+# stops with an error).
+aggregate = False
+reservoir_size = 10
+
+# Adaptive number of simulations for runSimulations, runIntervention and 
+# runSweep: simulations are run in batches of adaptive_batch until the 
+# half-width of the 95% confidence interval of the mean is below the target
+# for every month and every output in ci_target (dictionary output: target, 
+# e.g. {'vacancy_rate_p': 0.5, 'utility_p50': 10}). The number of 
+# simulations given to the methods is then the maximum (budget). None: always
+# run the given number of simulations.
+ci_target = None
+adaptive_batch = 10
+
+# Common random numbers: every stochastic process (income shocks, random 
+# moves, screening, applications, tenant selection, population and apartment 
+# updates, ...) draws from its own random stream per simulation and month, 
+# derived from the experiment seed (see streams.py). The simulations with the
+# same index then draw the same random numbers with and without intervention 
+# (runIntervention) and for all parameter values (runSweep), which reduces the
+# variance of the comparisons. With antithetic, every second simulation uses
+# the antithetic random numbers of the previous one (requires common random 
+# numbers). Not used in lockstep mode and by the numba kernels.
+common_random_numbers = False
+antithetic = False
+
+# Bit generator of the random numbers of the simulations: 'legacy' draws from
+# numpy.random (same results as the thesis after numpy.random.seed), other 
+# names select a numpy.random.Generator with this bit generator (e.g. 
+# 'PCG64', 'Philox', 'SFC64'), seeded per simulation from the experiment seed
+# (see createGenerator in streams.py).
+bit_generator = 'legacy'
+
+# Profiling of simulateMonth (see profiler.py): False (disabled), True (time 
+# of every phase and counters of the market activity per month) or 'memory' 
+# (additionally the peak memory allocated within every phase, slower). If a 
+# profile_directory is given, the profile of every run of runMonths and 
+# runPostinvtervention is exported to this directory (JSON and CSV).
+profiling = False
+profile_directory = None
@@ -0,0 +1,178 @@
+#%% PROFILER
+#%%
+
+"""
+This file contains the profiler of the simulations. If profiling is set in
+the parameters, simulateMonth records the wall time of every phase of a month
+(population update, apartment update, price update, income, utility,
+affordability, random moves, screening, price setting, and the application and
+tenant selection of every cycle) together with counters of the market activity
+(searchers, applications and matches per cycle, iterations of the price
+setting, index lookups). With profiling = 'memory', the peak memory allocated
+within every phase is recorded as well (tracemalloc, higher overhead). The
+peak memory is recorded instead of the number of allocations: tracemalloc
+only counts the allocated blocks of a snapshot, which takes about a second
+per phase with the traces of the model loaded. Tracing is stopped at the end
+of the run (or when the next run is profiled without memory). The
+profile of every run can be exported as JSON or CSV. If profiling is disabled,
+every call of the profiler returns immediately.
+"""
+
+#%% [0] Import required modules
+
+import os
+import csv
+import json
+import time
+import tracemalloc
+
+#%% [1] Class for the profile of a run
+
+class Profiler():
+    """
+    Profile of one run: one record (dictionary) per simulated month with the
+    time ('time.' + phase, seconds) and peak allocated memory ('memory.' +
+    phase, bytes) of every phase and the counters of the month. The phases of
+    a month are recorded one after another: record(phase) ends the current
+    phase and starts the next one.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.months = []
+        self.run = dict()
+        self._start = 0.0
+        self._memory = 0
+        # tracing started by the profiler (stopped at the end of the run)
+        self._tracing = False
+
+    def reset(self, mode=False, **run):
+        """
+        Start the profile of a new run (mode: False, True or 'memory', see
+        profiling in the parameters). The keyword arguments describe the run
+        (e.g. its settings) and are exported with the profile.
+        """
+        self.enabled = bool(mode)
+        self.memory = mode == 'memory'
+        self.months = []
+        self.run = run
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        elif not self.memory:
+            self.stop()
+
+    def stop(self):
+        """
+        End the run: stop tracing the memory if it was started by the
+        profiler. The records of the run are kept (e.g. for the export).
+        """
+        self.memory = False
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def startMonth(self, month):
+        """
+        Start the record of a month and the first phase of the month.
+        """
+        if not self.enabled:
+            return
+        self.months.append({'month': month})
+        self.start()
+
+    def start(self):
+        """
+        Start the next phase (time and memory are measured from here).
+        """
+        if not self.enabled:
+            return
+        if self.memory:
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+
+    def record(self, phase):
+        """
+        End the current phase, add its time (and peak memory) to the record
+        of the month and start the next phase.
+        """
+        if not self.enabled or not self.months:
+            return
+        elapsed = time.perf_counter() - self._start
+        record = self.months[-1]
+        record['time.' + phase] = record.get('time.' + phase, 0.0) + elapsed
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1] - self._memory
+            record['memory.' + phase] = max(record.get('memory.' + phase, 0),
+                                            peak)
+        self.start()
+
+    def count(self, counter, value=1):
+        """
+        Add value to the counter of the current month.
+        """
+        if not self.enabled or not self.months:
+            return
+        record = self.months[-1]
+        record[counter] = record.get(counter, 0) + value
+
+    def summary(self):
+        """
+        Totals of all months (time and counters) and maximum of the peak
+        memory of every phase.
+        """
+        total = dict()
+        for record in self.months:
+            for key, value in record.items():
+                if key == 'month':
+                    continue
+                if key.startswith('memory.'):
+                    total[key] = max(total.get(key, 0), value)
+                else:
+                    total[key] = total.get(key, 0) + value
+        return(total)
+
+    def toJSON(self, file):
+        """
+        Export the profile (description of the run, records of all months and
+        totals) as JSON file.
+        """
+        with open(file, 'w') as f:
+            json.dump({'run': self.run, 'months': self.months,
+                       'total': self.summary()}, f, indent=1,
+                      default=toBuiltin)
+
+    def toCSV(self, file):
+        """
+        Export the records of all months as CSV file (one row per month).
+        """
+        columns = ['month'] + sorted({key for record in self.months
+                                      for key in record} - {'month'})
+        with open(file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, columns, restval=0)
+            writer.writeheader()
+            writer.writerows(self.months)
+
+    def save(self, directory, name=None):
+        """
+        Export the profile as JSON and CSV file to the directory. The file
+        name defaults to profile_<process id>_<time in ns>, such that runs of
+        several processes do not overwrite each other. Returns the path of
+        the files without extension.
+        """
+        if name is None:
+            name = 'profile_%d_%d' % (os.getpid(), time.time_ns())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        self.toJSON(path + '.json')
+        self.toCSV(path + '.csv')
+        return(path)
+
+def toBuiltin(value):
+    # numpy numbers (counters) as python numbers for the JSON export
+    return(value.item() if hasattr(value, 'item') else str(value))
+
+# profiler of the current process (used by simulateMonth and the agents)
+profiler = Profiler()
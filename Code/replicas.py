@@ -0,0 +1,606 @@
+#%% REPLICAS
+#%%
+
+"""
+This file contains the lockstep engine, which advances several simulations
+(replicas) of the model simultaneously. The agents of all replicas are stored
+in one population of renters and one population of landlords, and every agent
+carries the number of its replica. Each process step is applied to all
+replicas at once (one vectorized operation instead of one per simulation),
+while the agents only interact with agents of the same replica.
+The processes are the same as in the standard model (see additional_methods),
+but the random draws differ. Results therefore agree with runSimulations in
+distribution, but not draw for draw. The tenant selection is always batched.
+"""
+
+#%% [0] Required imports
+
+# import required packages
+import numpy as np
+import numpy.random as rd
+
+# imports from other python files
+from agents import Renters, Landlords
+from parameters import (inc_factor_state, income_min, preferences_mean,
+                        preferences_std, income_max, max_rent_share,
+                        prob_income_change, income_change, prob_random_move,
+                        construction_max, joiner_min, joiner_max, leaver_min,
+                        leaver_max, prob_increase, quality_max_public,
+                        demolition_min, demolition_max, construction_min,
+                        rent_decrease_factor, screener_share,
+                        req_utility_improvement, req_n_preferred_options,
+                        max_sample_applicants, max_applications, cycles,
+                        quality_apartment, q_threshold, min_n_comparable,
+                        p_base_std, weight_quality, n_renters, n_apartments,
+                        application_batch_size, compact_mode, state_price)
+
+#%% [1] Helper functions for grouped arrays
+
+def groupRows(replica, n_replicas, key=None):
+    """
+    Group the rows of an array by replica. Returns the order of the rows
+    (grouped by replica, within a replica ordered by key if given, otherwise
+    by position) and the offsets of the replicas within the order (the rows
+    of replica s are order[offsets[s]:offsets[s+1]]).
+    """
+    if key is None:
+        order = np.argsort(replica, kind='stable')
+    else:
+        order = np.lexsort((key, replica))
+    offsets = np.zeros(n_replicas+1, dtype=int)
+    offsets[1:] = np.cumsum(np.bincount(replica, minlength=n_replicas))
+    return(order, offsets)
+
+def groupRank(replica, order, offsets):
+    """
+    Rank of the rows within their replica (position within the grouped
+    order, see groupRows).
+    """
+    rank = np.empty(len(order), dtype=int)
+    rank[order] = np.arange(len(order)) - offsets[replica[order]]
+    return(rank)
+
+def groupDraw(offsets, n_draws):
+    """
+    Random draw (with replacement) of n_draws[s] rows of every replica s.
+    Returns the positions of the drawn rows within the grouped order (see
+    groupRows). Replicas without rows are skipped.
+    """
+    counts = np.diff(offsets)
+    n_draws = np.where(counts > 0, n_draws, 0)
+    replica = np.repeat(np.arange(len(counts)), n_draws)
+    return(offsets[replica] + (rd.rand(len(replica))
+                               * counts[replica]).astype(int))
+
+def groupQuantile(values, replica, n_replicas, q):
+    """
+    Quantile q of the values of every replica (linear interpolation, same as
+    np.quantile). NaN for replicas without values.
+    """
+    order, offsets = groupRows(replica, n_replicas, values)
+    values = values[order]
+    counts = np.diff(offsets)
+    quantile = np.full(n_replicas, np.nan)
+    has_values = counts > 0
+    # position of the quantile within the sorted values of each replica
+    h = (counts[has_values]-1) * q
+    lower = np.floor(h).astype(int)
+    upper = np.minimum(lower+1, counts[has_values]-1)
+    start = offsets[:-1][has_values]
+    quantile[has_values] = values[start+lower] + (h-lower) * (
+        values[start+upper] - values[start+lower])
+    return(quantile)
+
+def groupMean(values, replica, n_replicas):
+    """
+    Mean of the values of every replica (NaN for replicas without values).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return(np.bincount(replica, values, minlength=n_replicas)
+               / np.bincount(replica, minlength=n_replicas))
+
+#%% [2] Populations of several replicas
+
+class ReplicaLandlords(Landlords):
+    """
+    Population of landlords of several replicas (see Landlords). The price
+    setting only considers comparables of the same replica, and the
+    available apartments are offered to renters of the same replica only.
+    """
+    __slots__ = ('n_replicas',)
+    attributes = dict(Landlords.attributes, replica=(int, 0))
+
+    def __init__(self, n_replicas, capacity=None, compact=False, **values):
+        self.n_replicas = n_replicas
+        super().__init__(capacity, compact, **values)
+
+    def getAvailable(self):
+        """
+        Index of all available apartments and table of the available
+        apartments of each replica (one row per replica with the positions
+        within the index, padded with -1).
+        """
+        idx_available = np.where(self.available == True)[0]
+        replica = self.replica[idx_available]
+        order, offsets = groupRows(replica, self.n_replicas)
+        table = np.full((self.n_replicas, np.diff(offsets).max(initial=0)),
+                        -1)
+        table[replica, groupRank(replica, order, offsets)] = np.arange(
+            len(idx_available))
+        return(idx_available, table)
+
+    def setPrice(self, max_increase, q_threshold, min_n_comparable):
+        """
+        Private landlords set the price for their available apartments (see
+        Landlords.setPrice), based on the rented apartments of their replica.
+        Comparables are sorted by replica and quality, such that the binary
+        search can be restricted to the comparables of the setter's replica.
+        The mean prices are calculated with cumulative sums.
+        """
+        # get index of private landlords with an available apartment
+        index_price_setters = np.where(
+            (self.available==True) & (self.private==True))[0]
+        replica = self.replica[index_price_setters]
+        # comparable quality threshold based on quality range of each replica
+        q_max = np.full(self.n_replicas, -np.inf)
+        q_min = np.full(self.n_replicas, np.inf)
+        np.maximum.at(q_max, self.replica, self.quality)
+        np.minimum.at(q_min, self.replica, self.quality)
+        q_c = ((q_max - q_min) * q_threshold)[replica]
+        # rented private apartments sorted by replica and quality (quality
+        # is shifted by replica to obtain one sorted key for all replicas)
+        idx_rented = np.where(
+            (self.available==False) & (self.private==True))[0]
+        order, offsets = groupRows(self.replica[idx_rented], self.n_replicas,
+                                   self.quality[idx_rented])
+        comparables = idx_rented[order]
+        span = q_max.max(initial=0) - q_min.min(initial=0) + 1
+        shift = self.replica*span - q_min.min(initial=0)
+        key_sorted = self.quality[comparables] + shift[comparables]
+        # first and last (exclusive) comparable of each setter's replica
+        start = offsets[:-1][replica]
+        end = offsets[1:][replica]
+        key = self.quality[index_price_setters] + shift[index_price_setters]
+
+        def findComparables(key, q_c, start, end):
+            lower = np.clip(np.searchsorted(key_sorted, key - q_c,
+                                            side='right'), start, end)
+            upper = np.clip(np.searchsorted(key_sorted, key + q_c,
+                                            side='left'), start, end)
+            return(lower, upper)
+
+        lower, upper = findComparables(key, q_c, start, end)
+        # check if enough rented apartments of comparable quality (stop
+        # widening once the range covers all comparables of the replica)
+        extend = ((upper - lower) < min_n_comparable) & (
+            (lower > start) | (upper < end))
+        while extend.any():
+            # increase comparable quality threshold if needed
+            q_c[extend] += q_c[extend]
+            lower[extend], upper[extend] = findComparables(
+                key[extend], q_c[extend], start[extend], end[extend])
+            extend = ((upper - lower) < min_n_comparable) & (
+                (lower > start) | (upper < end))
+        # calculate current market price (previous price if no comparables)
+        price_sum = np.zeros(len(comparables)+1)
+        price_sum[1:] = np.cumsum(self.price[comparables])
+        current_market_price = self.price[index_price_setters].copy()
+        found = upper > lower
+        current_market_price[found] = (
+            price_sum[upper[found]] - price_sum[lower[found]]) / (
+            upper[found] - lower[found])
+        self._own('price')
+        self.price[index_price_setters] = self.adjustPrice(
+            self.price[index_price_setters], current_market_price,
+            max_increase)
+
+class ReplicaRenters(Renters):
+    """
+    Population of renters of several replicas (see Renters). Income shocks
+    are drawn per replica, and renters only screen and apply for available
+    apartments of their own replica.
+    """
+    __slots__ = ('n_replicas',)
+    attributes = dict(Renters.attributes, replica=(int, 0))
+
+    def __init__(self, n_replicas, capacity=None, compact=False, **values):
+        self.n_replicas = n_replicas
+        super().__init__(capacity, compact, **values)
+
+    def updateIncome(self, prob_income_change, income_change, income_min,
+                     income_max):
+        """
+        Renters' income is updated (see Renters.updateIncome), with one
+        income shock per replica.
+        """
+        self.random = rd.rand(len(self.uid))
+        shock = np.exp(rd.randn(self.n_replicas)*income_change)
+        self.income = np.where(self.random < prob_income_change,
+                               shock[self.replica]*self.income, self.income)
+        self.income = np.clip(self.income, income_min, income_max)
+
+    def screenMarket(self, landlords, screener_share, req_utility_improvement,
+                     req_n_preferred_options):
+        """
+        Renters living in an apartment sporadically screen the available
+        apartments of their replica (see Renters.screenMarket). The screeners
+        of each replica are the potential screeners with the lowest random
+        keys, which corresponds to a random choice without replacement.
+        """
+        # available apartments of each replica (NaN if padded)
+        idx_available, table = landlords.getAvailable()
+        prices = np.where(table >= 0, landlords.price[idx_available][table],
+                          np.nan)
+        quality = np.where(table >= 0,
+                           landlords.quality[idx_available][table], np.nan)
+        # randomly draw sample of potential screeners of each replica
+        idx_pot_screeners = np.where(self.searching==False)[0]
+        replica = self.replica[idx_pot_screeners]
+        order, offsets = groupRows(replica, self.n_replicas,
+                                   rd.rand(len(idx_pot_screeners)))
+        n_screening = np.round(np.diff(offsets)*screener_share).astype(int)
+        rank = np.arange(len(order)) - offsets[replica[order]]
+        idx_screening = idx_pot_screeners[order[
+            rank < n_screening[replica[order]]]]
+        # count preferred options among the apartments of the own replica
+        number_prefered_apartments = self.countPreferredOptions(
+            idx_screening, prices, quality, req_n_preferred_options,
+            rows=self.replica[idx_screening])
+        # screener leaves if enough preferred options are available
+        idx_leaving = idx_screening[
+            number_prefered_apartments >= req_n_preferred_options]
+        landlords.moveOut(self.apartment[idx_leaving])
+        self.moveOut(idx_leaving)
+        return(landlords)
+
+    def application(self, landlords, max_rent_share, inc_factor_state,
+                    state_price, max_sample_applicants, max_applications,
+                    batch_size=None):
+        """
+        Application process (see Renters.application) for the available
+        apartments of the own replica. Searchers are always processed in
+        batches (batch_size searchers, 128 if not defined).
+        """
+        idx_available, table = landlords.getAvailable()
+        apartment_info = landlords.getApartmentInfo(idx_available)
+        prices = landlords.price[idx_available]
+        quality = landlords.quality[idx_available]
+        private = landlords.private[idx_available]
+        idx_searchers = np.where(self.searching == True)[0]
+        batch_size = batch_size or 128
+        application_a = [np.zeros(0, dtype=int)]
+        application_r = [np.zeros(0, dtype=int)]
+        for start in range(0, len(idx_searchers), batch_size):
+            batch = idx_searchers[start:start+batch_size]
+            batch_a, batch_r = self.selectApartments(
+                batch, prices, quality, private, max_rent_share,
+                inc_factor_state, state_price, max_sample_applicants,
+                max_applications, candidates=table[self.replica[batch]])
+            application_a.append(batch_a)
+            application_r.append(batch_r)
+        return(self.collectApplications(
+            apartment_info, np.concatenate(application_a),
+            np.concatenate(application_r)))
+
+#%% [3] Methods for initializing and updating the populations
+
+def initializeReplicas(n_replicas, n_renters, n_apartments,
+                       share_state_apartments, state_price):
+    """
+    Method that creates the initial populations of landlords and renters of
+    all replicas (see initializeModel). Agents are numbered consecutively
+    across replicas.
+    """
+    # Calculate number of private and state landlords per replica
+    n_private = int(n_apartments * (1 - share_state_apartments))
+    n_state = int(n_apartments * share_state_apartments)
+    # quality and price of private (first columns) and state apartments
+    quality = np.hstack([
+        quality_apartment[1] + rd.rand(n_replicas, n_private)
+        * quality_apartment[0],
+        quality_apartment[1] + rd.rand(n_replicas, n_state)
+        * quality_max_public])
+    price = np.hstack([
+        rd.normal(state_price, p_base_std, (n_replicas, n_private))
+        + (quality[:,:n_private]-quality_apartment[1]) * weight_quality,
+        np.full((n_replicas, n_state), state_price)])
+    n_landlords = n_replicas * (n_private+n_state)
+    landlords = ReplicaLandlords(
+        n_replicas, compact = compact_mode,
+        private = np.tile(np.append(np.ones(n_private, dtype=bool),
+                                    np.zeros(n_state, dtype=bool)),
+                          n_replicas),
+        apartment = np.arange(n_landlords)+1,
+        quality = quality.ravel(),
+        price = price.ravel(),
+        random = rd.rand(n_landlords),
+        replica = np.repeat(np.arange(n_replicas), n_private+n_state))
+    renters = ReplicaRenters(
+        n_replicas, compact = compact_mode,
+        uid = np.arange(n_replicas*n_renters)+1,
+        income = rd.uniform(income_min, income_max, n_replicas*n_renters),
+        random = rd.rand(n_replicas*n_renters),
+        preferences = rd.normal(preferences_mean, preferences_std,
+                                n_replicas*n_renters),
+        replica = np.repeat(np.arange(n_replicas), n_renters))
+    return(renters, landlords)
+
+def updateReplicaPopulation(renters, landlords):
+    """
+    Joiner and leaver processes (see updatePopulation) for all replicas. The
+    numbers of leavers and joiners are drawn per replica.
+    """
+    n_replicas = renters.n_replicas
+    # randomly draw leavers of each replica (with replacement)
+    order, offsets = groupRows(renters.replica, n_replicas)
+    number_of_leavers = np.round(rd.uniform(leaver_min, leaver_max,
+                                 n_replicas) * np.diff(offsets)).astype(int)
+    leaver_index = order[groupDraw(offsets, number_of_leavers)]
+    landlords.moveOut(renters.apartment[leaver_index])
+    renters.remove(leaver_index)
+
+    # append joiners of each replica (searching without apartment)
+    number_of_joiners = np.round(rd.uniform(joiner_min, joiner_max,
+        n_replicas) * np.bincount(renters.replica, minlength=n_replicas)
+        ).astype(int)
+    n = number_of_joiners.sum()
+    uid_next = max(renters.uid) + 1
+    renters.append(n,
+        uid = np.arange(uid_next, uid_next + n, 1),
+        income = rd.uniform(income_min, income_max, n),
+        random = rd.rand(n),
+        preferences = rd.normal(preferences_mean, preferences_std, n),
+        replica = np.repeat(np.arange(n_replicas), number_of_joiners))
+    return(renters, landlords)
+
+def updateReplicaApartments(renters, landlords):
+    """
+    Construction and demolition of apartments (see updateApartments) for all
+    replicas. The numbers of demolitions and constructions are drawn per
+    replica.
+    """
+    n_replicas = landlords.n_replicas
+    # randomly select private apartments of each replica to be demolished
+    number_of_demolitions = np.round(rd.uniform(
+        demolition_min, demolition_max, n_replicas) * np.bincount(
+        landlords.replica, minlength=n_replicas)).astype(int)
+    private_index = np.where(landlords.private==True)[0]
+    order, offsets = groupRows(landlords.replica[private_index], n_replicas)
+    demolition_index = private_index[order[groupDraw(
+        offsets, number_of_demolitions)]]
+    # update renters which are living in an apartment that will be demolished
+    demolition_tenants = landlords.tenant[demolition_index]
+    renters.moveOut(renters.getIndex(
+        demolition_tenants[demolition_tenants >= 0]))
+    landlords.remove(demolition_index)
+
+    # append new private apartments of each replica (available, no price)
+    number_of_new_apartments = np.round(rd.uniform(
+        construction_min, construction_max, n_replicas) * np.bincount(
+        landlords.replica, minlength=n_replicas)).astype(int)
+    n = number_of_new_apartments.sum()
+    apartment_next = max(landlords.apartment) + 1
+    landlords.append(n,
+        apartment = np.arange(apartment_next, apartment_next+n, 1),
+        private = True,
+        quality = rd.rand(n) * quality_apartment[0] + quality_apartment[1],
+        price = 0,
+        random = rd.rand(n),
+        replica = np.repeat(np.arange(n_replicas), number_of_new_apartments))
+    return(renters, landlords)
+
+#%% [4] Methods to run the replicas (Process flows)
+
+def simulateReplicaMonth(renters, landlords, m, inc_factor_state,
+                         max_increase, state_price):
+    """
+    Standard process to simulate one month (see simulateMonth) for all
+    replicas.
+    """
+    if m > 0:
+        # Update population, apartments, prices, income and utility
+        renters, landlords = updateReplicaPopulation(renters, landlords)
+        renters, landlords = updateReplicaApartments(renters, landlords)
+        renters = landlords.updatePrice(renters, prob_increase, max_increase)
+        renters.updateIncome(prob_income_change, income_change, income_min,
+                             income_max)
+        renters.updateUtility()
+
+        # Renters check affordability, move randomly, and screen market
+        landlords = renters.checkAffordability(landlords, max_rent_share)
+        landlords = renters.moveRandomly(landlords, prob_random_move)
+        landlords = renters.screenMarket(landlords, screener_share,
+                                         req_utility_improvement,
+                                         req_n_preferred_options)
+
+        # Landlords adjust pricing
+        landlords.setPrice(max_increase, q_threshold, min_n_comparable)
+
+    # Market exchange (cycles are mimicking a 3 months notice period)
+    for cycle in range(cycles):
+        if cycle > 0:
+            landlords.decreasePrice(rent_decrease_factor)
+        apartment_info, applicants = renters.application(
+            landlords, max_rent_share, inc_factor_state,
+            state_price, max_sample_applicants, max_applications,
+            application_batch_size)
+        renters = landlords.selectTenant(renters, apartment_info,
+                                         applicants, batched=True)
+    return(renters, landlords)
+
+def selectReplica(population, population_class, replica):
+    """
+    Population (of population_class, e.g. Renters) with the agents of one
+    replica (copies of their attributes).
+    """
+    index = population.replica == replica
+    return(population_class(compact = compact_mode, **{
+        name: getattr(population, name)[index] 
+        for name in population_class.attributes}))
+
+def evaluateReplicaMonth(renters, landlords, outputs=None):
+    """
+    Evaluate the outcomes of one month (see evaluateMonth) for all replicas.
+    Returns a dictionary with one array (one value per replica) per output.
+    The standard outputs are evaluated for all replicas at once, further
+    metrics of the registry (see registerMetric) are evaluated with 
+    evaluateMonth replica by replica (slower).
+    """
+    n_replicas = renters.n_replicas
+    results_month = dict()
+    # prices of rented private apartments
+    rented = (landlords.available==False) & (landlords.private==True)
+    results_month['mean_price'] = groupMean(
+        landlords.price[rented], landlords.replica[rented], n_replicas)
+    results_month['median_price'] = groupQuantile(
+        landlords.price[rented], landlords.replica[rented], n_replicas, .5)
+    # vacancy rates (private, state and total) in %
+    for key, segment in [('vacancy_rate_p', landlords.private==True),
+                         ('vacancy_rate_s', landlords.private==False),
+                         ('vacancy_rate_t', np.ones(len(landlords), bool))]:
+        results_month[key] = groupMean(
+            landlords.available[segment].astype(float),
+            landlords.replica[segment], n_replicas) * 100
+    # Utility of income classes (quartiles of the income in each replica)
+    p25 = groupQuantile(renters.income, renters.replica, n_replicas, .25)
+    p75 = groupQuantile(renters.income, renters.replica, n_replicas, .75)
+    income_p25 = p25[renters.replica]
+    income_p75 = p75[renters.replica]
+    for key, segment in [
+            ('utility_p25', renters.income < income_p25),
+            ('utility_p50', (renters.income <= income_p75) &
+                            (renters.income >= income_p25)),
+            ('utility_p75', renters.income > income_p75)]:
+        results_month[key] = groupMean(renters.utility[segment],
+                                       renters.replica[segment], n_replicas)
+    # further registered metrics (evaluated per replica)
+    others = [output for output in (outputs or []) 
+              if output not in results_month]
+    if others:
+        # imported here, additional_methods imports this file
+        from additional_methods import evaluateMonth
+        for output in others:
+            results_month[output] = np.empty(n_replicas)
+        for s in range(n_replicas):
+            results_s = evaluateMonth(selectReplica(renters, Renters, s),
+                                      selectReplica(landlords, Landlords, s),
+                                      others)
+            for output in others:
+                results_month[output][s] = results_s[output]
+    return(results_month)
+
+def runReplicaMonths(months, simulations, initialization_period, state_price,
+                     share_state_apartments, inc_factor_state, outputs,
+                     max_increase):
+    """
+    Run all simulations in lockstep for several months (see runSimulations).
+    Returns the results in the same format as runSimulations (dictionary
+    with a list of arrays, one array per simulation) and the populations of
+    all replicas.
+    """
+    renters, landlords = initializeReplicas(
+        simulations, n_renters, n_apartments, share_state_apartments,
+        state_price)
+    # store results of all months (months x replicas) after initialization
+    results = {key: np.empty((max(months-initialization_period, 0),
+                              simulations)) for key in outputs}
+    for m in range(months):
+        # print calculation progress
+        if ((m+10) % 10 ==0) & (m+10 < months):
+            print('   Months:',m+1,'-',m+10, '(of', months, 'months)')
+        elif ((m+10) % 10 ==0) & (m+10 >= months):
+            print('   Months:',m+1,'-', months, '(of', months, 'months)')
+        renters, landlords = simulateReplicaMonth(
+            renters, landlords, m, inc_factor_state, max_increase,
+            state_price)
+        # start evaluation after initialization period
+        if m >= initialization_period:
+            results_month = evaluateReplicaMonth(renters, landlords, 
+                                                 outputs)
+            for key in outputs:
+                results[key][m-initialization_period] = results_month[key]
+    results_all = {key: list(results[key].T.copy()) for key in outputs}
+    return(results_all, landlords, renters)
+
+def constructReplicaStateApartments(landlords, new_apartments, state_price):
+    """
+    One-time construction of new_apartments state apartments in every
+    replica (see constructStateApartments).
+    """
+    n_replicas = landlords.n_replicas
+    n = n_replicas * new_apartments
+    apartment_next = max(landlords.apartment) + 1
+    landlords.append(n,
+        apartment = np.arange(apartment_next, apartment_next+n, 1),
+        private = False,
+        quality = rd.rand(n) * quality_apartment[0] + quality_apartment[1],
+        price = state_price,
+        random = rd.rand(n),
+        replica = np.repeat(np.arange(n_replicas), new_apartments))
+    return(landlords)
+
+def runReplicaPostintervention(months, renters, landlords, max_increase,
+                               outputs):
+    """
+    Simulate and evaluate the months after a (non-)intervention for all 
+    replicas (see runPostinvtervention, also with the state price and 
+    income factor of the parameters). Returns a dictionary with one array 
+    (simulations x months) per output.
+    """
+    results = {key: np.empty((months, renters.n_replicas)) 
+               for key in outputs}
+    for m in range(1, months+1):
+        # print calculation progress
+        if ((m+9) % 10 ==0) & (m+9 < months):
+            print('   Months:',m,'-',m+9, '(of', months, 'months)')
+        elif ((m+9) % 10 ==0) & (m+9 >= months):
+            print('   Months:',m,'-', months, '(of', months, 'months)')
+        renters, landlords = simulateReplicaMonth(
+            renters, landlords, m, inc_factor_state, max_increase, 
+            state_price)
+        results_month = evaluateReplicaMonth(renters, landlords, outputs)
+        for key in outputs:
+            results[key][m-1] = results_month[key]
+    return({key: results[key].T.copy() for key in outputs})
+
+def runReplicaIntervention(months_before_intervention, 
+                           months_after_intervention, simulations, 
+                           initialization_period, state_price, 
+                           share_state_apartments, inc_factor_state, outputs,
+                           new_apartments, max_increase):
+    """
+    Policy intervention (see runIntervention) for all simulations in 
+    lockstep: the pre-intervention period is run once for all replicas, 
+    followed by the months after the intervention and (restored from a 
+    snapshot) the months without intervention. Returns the results with and
+    without intervention (one array simulations x months per output) and the
+    populations of all replicas.
+    """
+    print("Simulations of pre-intervention period: 1 -", simulations, 
+          "(lockstep)")
+    results_pre, landlords, renters = runReplicaMonths(
+        months_before_intervention, simulations, initialization_period, 
+        state_price, share_state_apartments, inc_factor_state, outputs,
+        max_increase)
+    # snapshot of the populations (shares the arrays, no copy)
+    landlords_copy = landlords.snapshot()
+    renters_copy = renters.snapshot()
+    print("Simulations with intervention: 1 -", simulations, "(lockstep)")
+    landlords = constructReplicaStateApartments(landlords, new_apartments,
+                                                state_price)
+    results_int = runReplicaPostintervention(
+        months_after_intervention, renters, landlords, max_increase, outputs)
+    # restore populations (arrays are copied once they are modified)
+    landlords.restore(landlords_copy)
+    renters.restore(renters_copy)
+    print("Simulations without intervention: 1 -", simulations, 
+          "(lockstep)")
+    results_no_int = runReplicaPostintervention(
+        months_after_intervention, renters, landlords, max_increase, outputs)
+    # combine results from pre intervention and post intervention
+    results_int_total = {key: np.append(results_pre[key], results_int[key],
+                                        axis=1) for key in outputs}
+    results_no_int_total = {key: np.append(results_pre[key], 
+                                           results_no_int[key], axis=1) 
+                            for key in outputs}
+    return(results_int_total, results_no_int_total, renters, landlords)
@@ -0,0 +1,401 @@
+#%% RESULTS
+#%%
+
+"""
+This file contains the class ResultsCube, a container for the results of many
+simulations. The results of each output are stored in one array (parameter
+values x simulations x months) instead of lists of arrays, either in memory
+or on disk (memory-mapped or compressed in chunks), such that large 
+experiments do not need to fit into memory.
+"""
+
+#%% [0] Import required modules
+
+import os
+import json
+import zipfile
+import numpy as np
+
+#%% [1] Class for results of several simulations
+
+# size of the chunks of compressed cubes (bytes, see ResultsCube.save)
+chunk_bytes = 2**26
+
+class CompressedArray():
+    """
+    Output of a compressed cube (see ResultsCube.save): .npz file with one
+    compressed array (values x chunk simulations x months) per chunk of 
+    simulations. Indexing (e.g. array[value, simulations]) only loads the 
+    chunks of the requested simulations, np.asarray loads all chunks. The 
+    indices of the axes are applied one after another (like slices, also for
+    index arrays). If value is given, the array only contains the results of
+    this parameter value (simulations x months).
+    """
+
+    def __init__(self, file, shape, dtype, chunk, value=None):
+        self.file = file
+        self.shape3 = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.chunk = chunk
+        self.value = value
+        self.shape = self.shape3 if value is None else self.shape3[1:]
+        self.ndim = len(self.shape)
+
+    def __len__(self):
+        return(self.shape[0])
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[...] if self.value is None else self[:]
+        return(array if dtype is None else array.astype(dtype))
+
+    def _load(self, chunk):
+        # simulations of one chunk (files of earlier versions: one array)
+        with np.load(self.file) as arrays:
+            if 'results' in arrays.files:
+                return(arrays['results'][:, chunk*self.chunk:
+                                         (chunk+1)*self.chunk])
+            return(arrays['chunk_' + str(chunk)])
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        if self.value is not None:
+            key = (self.value,) + key
+        if key == (Ellipsis,):
+            key = ()
+        if any(k is Ellipsis for k in key) or len(key) > 3:
+            raise IndexError('Compressed arrays support up to three indices '
+                             'without Ellipsis.')
+        key = key + (slice(None),) * (3 - len(key))
+        # load the chunks of the requested simulations
+        simulations = np.arange(self.shape3[1])[key[1]]
+        chunks = np.unique(np.atleast_1d(simulations) // self.chunk)
+        position = np.zeros(self.shape3[1], dtype=int)
+        data = []
+        offset = 0
+        for chunk in chunks:
+            data.append(self._load(chunk))
+            start = chunk * self.chunk
+            stop = min(start + data[-1].shape[1], self.shape3[1])
+            position[start:stop] = offset + np.arange(stop - start)
+            offset += data[-1].shape[1]
+        if data:
+            data = np.concatenate(data, axis=1)
+        else:
+            data = np.empty((self.shape3[0], 0, self.shape3[2]), self.dtype)
+        # select simulations, then values and months
+        data = data[:, position[simulations]]
+        if np.ndim(simulations) == 0:
+            return(data[key[0], key[2]])
+        return(data[key[0], :, key[2]])
+
+def writeCompressed(file, array, chunk):
+    """
+    Write the array (values x simulations x months, e.g. memory-mapped or 
+    compressed) as .npz file with one compressed array per chunk of 
+    simulations, such that only one chunk is in memory at a time. The file 
+    is written to a temporary file first, such that the array can be read 
+    from the same file.
+    """
+    temporary = file + '.tmp'
+    with zipfile.ZipFile(temporary, 'w', zipfile.ZIP_DEFLATED, 
+                         allowZip64=True) as archive:
+        for c, start in enumerate(range(0, max(array.shape[1], 1), chunk)):
+            with archive.open('chunk_' + str(c) + '.npy', 'w', 
+                              force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(
+                    array[:, start:start+chunk]))
+    os.replace(temporary, file)
+
+class ResultsCube():
+    """
+    Results of several simulations with the axes value (of the varied
+    parameter), simulation, month and output. The cube can be used like the
+    dictionaries of results (cube[output], keys, items): cube[output] returns
+    the array of the output (values x simulations x months, or simulations x
+    months if the cube has no parameter values).
+    If a path is given, every output is stored in a .npy file within the
+    directory path and memory-mapped, such that only the accessed parts are
+    loaded into memory. Cubes can be saved with compression (one .npz file
+    per output, compressed in chunks of simulations), compressed outputs are
+    returned as CompressedArray, which only loads the accessed chunks. 
+    Storing results in a compressed output loads it into memory. Results can
+    be stored with 32 bit floats (dtype) to halve the size.
+    """
+
+    def __init__(self, outputs, simulations, months, values=None, path=None,
+                 dtype='float64'):
+        self.outputs = list(outputs)
+        self.values = None if values is None else list(values)
+        self.shape = (1 if values is None else len(values), simulations,
+                      months)
+        self.dtype = np.dtype(dtype)
+        self.chunk = getChunk(self.shape, self.dtype)
+        self.path = path
+        self._arrays = dict()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._writeInfo(compressed=False)
+        # create arrays (memory-mapped if a path is given), NaN if not stored
+        for output in self.outputs:
+            if path is None:
+                self._arrays[output] = np.full(self.shape, np.nan,
+                                               dtype=self.dtype)
+            else:
+                self._arrays[output] = np.lib.format.open_memmap(
+                    os.path.join(path, output + '.npy'), mode='w+',
+                    dtype=self.dtype, shape=self.shape)
+                self._arrays[output][:] = np.nan
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """
+        Open a cube stored in the directory path (see save). The outputs are
+        only loaded (or memory-mapped with the given mode) once they are
+        accessed.
+        """
+        with open(os.path.join(path, 'cube.json')) as file:
+            info = json.load(file)
+        cube = cls.__new__(cls)
+        cube.outputs = info['outputs']
+        cube.values = info['values']
+        cube.shape = tuple(info['shape'])
+        cube.dtype = np.dtype(info['dtype'])
+        cube.chunk = info.get('chunk', max(cube.shape[1], 1))
+        cube.path = path
+        cube._arrays = {output: None for output in cube.outputs}
+        cube._mode = mode
+        return(cube)
+
+    def _writeInfo(self, compressed):
+        # description of the cube (outputs, values, shape, storage)
+        with open(os.path.join(self.path, 'cube.json'), 'w') as file:
+            json.dump({'outputs': self.outputs, 'values': self.values,
+                       'shape': self.shape, 'dtype': self.dtype.name,
+                       'compressed': compressed, 'chunk': self.chunk}, file)
+
+    def _get(self, output):
+        # array of output (loaded from disk on first access)
+        if self._arrays[output] is None:
+            file = os.path.join(self.path, output)
+            if os.path.exists(file + '.npy'):
+                # only the stored simulations (see truncate)
+                self._arrays[output] = np.load(
+                    file + '.npy', mmap_mode=self._mode)[:, :self.shape[1]]
+            else:
+                self._arrays[output] = CompressedArray(
+                    file + '.npz', self.shape, self.dtype, self.chunk)
+        return(self._arrays[output])
+
+    def __getitem__(self, output):
+        if output not in self._arrays:
+            raise KeyError(output)
+        array = self._get(output)
+        if self.values is not None:
+            return(array)
+        if isinstance(array, CompressedArray):
+            return(CompressedArray(array.file, array.shape3, array.dtype, 
+                                   array.chunk, value=0))
+        return(array[0])
+
+    def __iter__(self):
+        return(iter(self.outputs))
+
+    def __len__(self):
+        return(len(self.outputs))
+
+    def __contains__(self, output):
+        return(output in self._arrays)
+
+    def keys(self):
+        return(list(self.outputs))
+
+    def items(self):
+        return([(output, self[output]) for output in self.outputs])
+
+    def store(self, results, value=0, simulation=0):
+        """
+        Store results (dictionary with one array or list of arrays per
+        output) of one or several simulations, starting at the given index of
+        parameter value and simulation.
+        """
+        for output in self.outputs:
+            values = np.asarray(results[output])
+            if values.ndim == 1:
+                values = values[None,:]
+            if isinstance(self._get(output), CompressedArray):
+                self._arrays[output] = np.array(self._get(output))
+            self._get(output)[value, simulation:simulation+len(values),
+                              :values.shape[1]] = values
+
+    def truncate(self, simulations):
+        """
+        Keep only the first simulations of the cube (e.g. if fewer 
+        simulations than planned were required, see ci_target in the 
+        parameters). Files on disk keep their size until the cube is saved 
+        with compression or to another path.
+        """
+        self.shape = (self.shape[0], simulations, self.shape[2])
+        for output in self.outputs:
+            array = self._arrays[output]
+            if isinstance(array, CompressedArray):
+                self._arrays[output] = CompressedArray(
+                    array.file, self.shape, array.dtype, array.chunk)
+            elif array is not None:
+                self._arrays[output] = array[:, :simulations]
+
+    def save(self, path=None, compress=False):
+        """
+        Save the cube to the directory path (default: path of the cube). The
+        outputs are stored as .npy files (can be memory-mapped), or as
+        compressed .npz files if compress is True. The outputs are written 
+        chunk by chunk (see writeCompressed), such that they do not need to 
+        fit into memory, and compressed outputs are not kept in memory after
+        saving.
+        """
+        path = self.path if path is None else path
+        os.makedirs(path, exist_ok=True)
+        for output in self.outputs:
+            array = self._get(output)
+            file = os.path.join(path, output)
+            if compress:
+                writeCompressed(file + '.npz', array, self.chunk)
+                # release memory-mapped file before removing it
+                self._arrays[output] = CompressedArray(
+                    file + '.npz', self.shape, self.dtype, self.chunk)
+                del array
+                if os.path.exists(file + '.npy'):
+                    os.remove(file + '.npy')
+            elif isinstance(array, np.memmap) and path == self.path:
+                array.flush()
+            else:
+                target = np.lib.format.open_memmap(
+                    file + '.npy', mode='w+', dtype=self.dtype, 
+                    shape=self.shape)
+                for start in range(0, self.shape[1], self.chunk):
+                    target[:, start:start+self.chunk] = array[
+                        :, start:start+self.chunk]
+                target.flush()
+                self._arrays[output] = target
+                del array
+                if os.path.exists(file + '.npz'):
+                    os.remove(file + '.npz')
+        self.path = path
+        self._writeInfo(compressed=compress)
+
+def getChunk(shape, dtype):
+    """
+    Number of simulations per chunk of a compressed output (about 
+    chunk_bytes per chunk).
+    """
+    size = shape[0] * shape[2] * np.dtype(dtype).itemsize
+    return(int(max(1, chunk_bytes // max(size, 1))))
+
+#%% [2] Class for online aggregation of results
+
+class OnlineResults():
+    """
+    Online aggregation of the results of many simulations: mean and variance
+    of every output and month (Welford's algorithm) are updated with every
+    finished simulation, such that the memory does not grow with the number
+    of simulations. Optionally, a random sample of reservoir_size simulations
+    is kept (reservoir sampling, separate random number generator), e.g. to
+    plot individual trajectories.
+    """
+
+    def __init__(self, outputs, reservoir_size=0, seed=0):
+        self.outputs = list(outputs)
+        self.count = 0
+        self.reservoir_size = reservoir_size
+        # trajectories of the sampled simulations
+        self.reservoir = {output: [] for output in self.outputs}
+        self._mean = dict()
+        self._m2 = dict()
+        self._random = np.random.RandomState(seed)
+
+    def add(self, results_sim):
+        """
+        Add the results of one simulation (dictionary with one array per
+        output).
+        """
+        self.count += 1
+        for output in self.outputs:
+            values = np.asarray(results_sim[output], dtype=float)
+            if self.count == 1:
+                self._mean[output] = values.copy()
+                self._m2[output] = np.zeros(len(values))
+            else:
+                delta = values - self._mean[output]
+                self._mean[output] += delta / self.count
+                self._m2[output] += delta * (values - self._mean[output])
+        # keep every simulation with probability reservoir_size / count
+        if self.count <= self.reservoir_size:
+            for output in self.outputs:
+                self.reservoir[output].append(np.asarray(results_sim[output]))
+        elif self.reservoir_size > 0:
+            j = self._random.randint(self.count)
+            if j < self.reservoir_size:
+                for output in self.outputs:
+                    self.reservoir[output][j] = np.asarray(
+                        results_sim[output])
+
+    def mean(self, output):
+        """
+        Mean of the output for every month.
+        """
+        return(self._mean[output].copy())
+
+    def var(self, output, ddof=0):
+        """
+        Variance of the output for every month (same as np.var).
+        """
+        return(self._m2[output] / (self.count - ddof))
+
+    def std(self, output, ddof=0):
+        """
+        Standard deviation of the output for every month (same as np.std).
+        """
+        return(np.sqrt(self.var(output, ddof)))
+
+    def halfWidth(self, output, z=1.96):
+        """
+        Half-width of the confidence interval of the mean of the output for
+        every month (normal approximation with the sample standard
+        deviation, 95% by default).
+        """
+        return(z * self.std(output, ddof=1) / np.sqrt(self.count))
+
+    def merge(self, other):
+        """
+        Add the results of other (OnlineResults of further simulations with
+        the same outputs) to the results, as if its simulations had been 
+        added one by one. The reservoir remains a random sample of all
+        simulations.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        for output in self.outputs:
+            if self.count == 0:
+                self._mean[output] = other._mean[output].copy()
+                self._m2[output] = other._m2[output].copy()
+                continue
+            # combine means and squared deviations (Chan et al.)
+            delta = other._mean[output] - self._mean[output]
+            self._mean[output] += delta * other.count / count
+            self._m2[output] += (other._m2[output] + delta**2 * self.count 
+                                 * other.count / count)
+        # number of sampled simulations from both parts of the combined 
+        # simulations (sampling without replacement)
+        size = min(self.reservoir_size, count)
+        if size > 0:
+            n_self = self._random.hypergeometric(self.count, other.count, 
+                                                 size)
+            keep_self = self._random.choice(len(self.reservoir[
+                self.outputs[0]]), n_self, replace=False)
+            keep_other = self._random.choice(len(other.reservoir[
+                other.outputs[0]]), size - n_self, replace=False)
+            for output in self.outputs:
+                self.reservoir[output] = (
+                    [self.reservoir[output][i] for i in keep_self] + 
+                    [other.reservoir[output][i] for i in keep_other])
+        self.count = count
@@ -19,7 +19,8 @@ from parameters import (state_price,
                         share_state_apartments, 
                         inc_factor_state, 
                         outputs,
-                        max_increase)
+                        max_increase,
+                        aggregate)
 
 from setup import path_tables
 
@@ -32,6 +33,12 @@ new_apartments_options = [10, 20, 30, 40, 50, 60]
 
 #%% [1] Run simulations before and after (no) policy intervention
 
+# the tables require the results of every simulation 
+# (see tableIntervention_results)
+if aggregate:
+    raise ValueError('runPolicy_evaluation.py requires the results of every '
+                     'simulation, set aggregate = False in the parameters.')
+
 # create lists to store the results
 store_int_results = dict()
 store_no_int_results = dict()
@@ -0,0 +1,172 @@
+#%% SCALING
+#%%
+
+"""
+This file contains the scaling study of the model: complete runs of
+runMonths for a grid of market sizes (n_renters and n_apartments) and vacancy
+regimes (rent_decrease_factor). For every run, the time per simulated month
+(total and per phase of simulateMonth, see profiler.py), the peak memory and
+the vacancy rate are recorded. The first months of every run (warm-up, 
+including the initial market clearing of month 0, in which all renters are 
+searching) are simulated, but not included in the times. For every vacancy
+regime, a scaling exponent is fitted per phase (time per month ~
+size^exponent, least squares on the log-log scale), such that phases which
+grow faster than linear with the size of the market can be identified
+(exponent clearly above 1).
+"""
+
+#%% [0] Required imports
+
+# import required packages
+import numpy as np
+import pandas as pd
+import os
+import tracemalloc
+import contextlib
+
+# imports from other python files
+import additional_methods
+from additional_methods import runMonths
+from profiler import profiler
+from streams import createGenerator
+from setup import path_tables
+from parameters import (n_renters, n_apartments, share_state_apartments,
+                        state_price, inc_factor_state, max_increase,
+                        bit_generator, outputs)
+
+#%% [1] Methods for the scaling study
+
+@contextlib.contextmanager
+def overrideParameters(**values):
+    """
+    Temporarily replace parameters of the model (e.g. n_renters or
+    rent_decrease_factor) for the runs within the with statement. The
+    parameters are imported by additional_methods when it is loaded, so the
+    values are replaced there and restored afterwards.
+    """
+    previous = {name: getattr(additional_methods, name) for name in values}
+    for name, value in values.items():
+        setattr(additional_methods, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(additional_methods, name, value)
+
+def runScaling(renters, apartments, factor, months, warmup=3, seed=0, 
+               memory=True):
+    """
+    Run runMonths once with the given number of renters and apartments and
+    the rent_decrease_factor factor: warmup months, followed by the months 
+    that are timed and evaluated. The run is timed with the profiler (time 
+    of every phase). If memory is True, the run is repeated with tracemalloc
+    to measure the peak memory (separately, because tracing slows down the 
+    run). Returns a dictionary with the settings, the time per month after
+    the warm-up (total and 'time.' + phase), the peak memory in bytes and 
+    the mean vacancy rate of the private sector.
+    """
+    settings = dict(months = warmup + months, initialization_period = warmup,
+                    state_price = state_price,
+                    share_state_apartments = share_state_apartments,
+                    inc_factor_state = inc_factor_state, outputs = outputs,
+                    max_increase = max_increase, verbose = False)
+    with overrideParameters(n_renters = renters, n_apartments = apartments,
+                            rent_decrease_factor = factor,
+                            profiling = True, profile_directory = None):
+        results_sim, _, _ = runMonths(rng = createGenerator(
+            seed, bit_generator), **settings)
+        run = dict(n_renters = renters, n_apartments = apartments,
+                   rent_decrease_factor = factor, months = months,
+                   warmup = warmup, vacancy_rate_p = float(np.mean(
+                       results_sim['vacancy_rate_p'])), time = 0.0)
+        # time per month of every phase (months after the warm-up)
+        for record in profiler.months:
+            if record['month'] < warmup:
+                continue
+            for key, value in record.items():
+                if key.startswith('time.'):
+                    run[key] = run.get(key, 0.0) + value / months
+                    run['time'] += value / months
+    # peak memory of the same run (without profiling)
+    if memory:
+        with overrideParameters(n_renters = renters,
+                                n_apartments = apartments,
+                                rent_decrease_factor = factor,
+                                profiling = False):
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            runMonths(rng = createGenerator(seed, bit_generator), **settings)
+            run['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+    return(run)
+
+def runScalingStudy(sizes, factors, months=12, warmup=3, seed=0, 
+                    memory=True, verbose=True):
+    """
+    Run the scaling study for all sizes (list of n_apartments, the number of
+    renters is scaled with the ratio of n_renters to n_apartments of the
+    parameters) and all rent decrease factors (vacancy regimes). Returns a
+    DataFrame with one row per run (see runScaling).
+    """
+    runs = []
+    for factor in factors:
+        for size in sizes:
+            renters = round(size * n_renters / n_apartments)
+            if verbose:
+                print('Renters:', renters, ' Apartments:', size,
+                      ' rent_decrease_factor:', factor)
+            runs.append(runScaling(renters, size, factor, months, warmup, 
+                                   seed, memory))
+            if verbose:
+                print('   %.4f s per month, vacancy rate %.2f%%' % (
+                    runs[-1]['time'], runs[-1]['vacancy_rate_p']))
+    return(pd.DataFrame(runs))
+
+def fitExponents(runs, size='n_apartments'):
+    """
+    Fit the scaling exponent (slope of log(time per month) on log(size))
+    of the total time, the peak memory and every phase for every vacancy
+    regime. Returns a DataFrame with one row per measure and one column per
+    rent_decrease_factor. Requires at least two different sizes.
+    """
+    measures = [column for column in runs.columns
+                if column == 'time' or column == 'peak_memory'
+                or column.startswith('time.')]
+    exponents = dict()
+    for factor, runs_factor in runs.groupby('rent_decrease_factor'):
+        exponents[factor] = dict()
+        for measure in measures:
+            # phases which did not occur in a run are not fitted
+            valid = runs_factor[measure] > 0
+            if runs_factor.loc[valid, size].nunique() < 2:
+                exponents[factor][measure] = np.nan
+                continue
+            exponents[factor][measure] = np.polyfit(
+                np.log(runs_factor.loc[valid, size]),
+                np.log(runs_factor.loc[valid, measure]), 1)[0]
+    return(pd.DataFrame(exponents))
+
+#%% [2] Run scaling study
+
+if __name__ == '__main__':
+    # number of apartments (thesis: 1,000, cities: up to 500,000), vacancy
+    # regimes, timed months and warm-up months per run
+    sizes = [1000, 10000, 100000, 500000]
+    factors = [0.92, 0.955, 0.98]
+    months = 12
+    warmup = 3
+
+    runs = runScalingStudy(sizes, factors, months, warmup)
+    exponents = fitExponents(runs)
+
+    # phases growing faster than linear with the size of the market
+    print(exponents.round(2).to_string())
+    superlinear = exponents[(exponents > 1.1).any(axis=1)]
+    print('Superlinear phases:', ', '.join(superlinear.index))
+
+    # store resulting tables
+    runs.to_csv(os.path.join(path_tables, 'scaling_runs.csv'), index=False)
+    exponents.to_csv(os.path.join(path_tables, 'scaling_exponents.csv'))
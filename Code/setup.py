@@ -3,7 +3,8 @@
 
 """ 
 Please adjust the paths below accordingly. The plots and tables will then
-be automatically stored in the specified location. 
+be automatically stored in the specified location. The checkpoints of
+interrupted simulations are stored in path_checkpoints (see runOFAT.py).
 """
 #%% Set working directory
 
@@ -11,6 +12,8 @@ path_plots = ('C:\\Users\\mmatt\\Documents\\01_Studium\\Master\\Masterarbeit'
                 '\\Python\\Master_Thesis_Code\\Plots')
 path_tables = ('C:\\Users\\mmatt\\Documents\\01_Studium\\Master\\Masterarbeit'
                '\\Python\\Master_Thesis_Code\\Tables')
+path_checkpoints = ('C:\\Users\\mmatt\\Documents\\01_Studium\\Master'
+                    '\\Masterarbeit\\Python\\Master_Thesis_Code\\Checkpoints')
 
 #%% Uncomment and execute line below for improved quality of graphics
 
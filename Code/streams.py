@@ -0,0 +1,189 @@
+#%% STREAMS
+#%%
+
+"""
+This file contains the random streams for common random numbers. Every
+stochastic process of the model (initialization, population and apartment
+updates, price updates, income shocks, random moves, screening, applications,
+tenant selection and the construction of state apartments) draws its random
+numbers from a separate stream, which is derived from the experiment seed,
+the simulation, the phase of the simulation and the month. Simulations with
+the same seed and index therefore draw the same random numbers for the same
+process and month, even if the other processes draw a different amount of
+random numbers (e.g. with and without intervention, or for different
+parameter values). Comparisons of such simulations have a lower variance
+than comparisons of independent simulations.
+"""
+
+#%% [0] Import required modules
+
+import numpy as np
+
+#%% [1] Random stream of one process
+
+class RandomStream():
+    """
+    Random stream with the methods of numpy.random used by the model (rand,
+    randn, uniform, normal, randint and choice). All random numbers are
+    derived from uniform or standard normal draws, such that the antithetic
+    stream (antithetic=True, same seed) uses 1-u instead of u and -z instead
+    of z for every draw.
+    """
+
+    def __init__(self, seed, antithetic=False):
+        self._random = np.random.RandomState(seed)
+        self.antithetic = antithetic
+
+    def _uniform(self, size):
+        # uniform random numbers in [0,1), antithetic numbers within (0,1]
+        u = self._random.random_sample(size)
+        return(1 - u if self.antithetic else u)
+
+    def _normal(self, size):
+        # standard normal random numbers
+        z = self._random.standard_normal(size)
+        return(-z if self.antithetic else z)
+
+    def rand(self, *shape):
+        return(self._uniform(shape if shape else None))
+
+    def randn(self, *shape):
+        return(self._normal(shape if shape else None))
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return(low + (high - low) * self._uniform(size))
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return(loc + scale * self._normal(size))
+
+    def randint(self, low, high=None, size=None):
+        """
+        Random integers from low (inclusive) to high (exclusive), or from 0
+        to low if high is None.
+        """
+        if high is None:
+            low, high = 0, low
+        # the antithetic draw u = 1 belongs to the largest integer
+        return(low + np.minimum(np.floor(self._uniform(size) * (
+            high - low)).astype(int), high - low - 1))
+
+    def choice(self, a, size=None, replace=True):
+        """
+        Random sample of a (array, or np.arange(a) if a is an integer).
+        Without replacement, the sample consists of the elements with the
+        lowest random keys (in the order of the keys).
+        """
+        a = np.arange(a) if np.ndim(a) == 0 else np.asarray(a)
+        if replace:
+            return(a[self.randint(len(a), size=size)])
+        n = 1 if size is None else size
+        if n > len(a):
+            raise ValueError("Cannot take a larger sample than population "
+                             "when replace is False")
+        sample = a[np.argsort(self._uniform(len(a)), kind='stable')[:n]]
+        return(sample[0] if size is None else sample)
+
+#%% [2] Random streams of all processes
+
+class RandomStreams():
+    """
+    Random streams of all stochastic processes of one simulation (common
+    random numbers, see common_random_numbers in the parameters). The stream
+    of a process in a month is determined by the experiment seed, the
+    simulation index, the phase (e.g. 0 before and 1 after an intervention)
+    and the month. With antithetic pairs, the simulations 2k and 2k+1 use the
+    same seeds, and simulation 2k+1 the antithetic random numbers.
+    """
+    processes = ('initialization', 'population', 'apartments', 'prices',
+                 'income', 'moves', 'screening', 'application', 'selection',
+                 'intervention')
+
+    def __init__(self, seed, simulation=0, phase=0, antithetic=False):
+        self.seed = seed
+        self.simulation = simulation
+        self.phase = phase
+        self.antithetic = antithetic
+
+    def __repr__(self):
+        # used for the keys of the result cache and for checkpoints
+        return('RandomStreams(seed=%d, simulation=%d, phase=%d, '
+               'antithetic=%s)' % (self.seed, self.simulation, self.phase,
+                                   self.antithetic))
+
+    def get(self, process, month):
+        """
+        Random stream (RandomStream) of the process in the given month.
+        """
+        simulation = self.simulation
+        if self.antithetic:
+            simulation //= 2
+        seed = np.random.SeedSequence(self.seed, spawn_key=(
+            simulation, self.phase, self.processes.index(process), month))
+        return(RandomStream(seed.generate_state(4),
+                            self.antithetic and self.simulation % 2 == 1))
+
+    def month(self, month):
+        """
+        Random streams of all processes in the given month (dictionary).
+        """
+        return({process: self.get(process, month)
+                for process in self.processes})
+
+    def getPhase(self, phase):
+        """
+        Random streams of the same simulation in another phase.
+        """
+        return(RandomStreams(self.seed, self.simulation, phase,
+                             self.antithetic))
+
+#%% [3] Random number generators
+
+class GeneratorAdapter():
+    """
+    Random number generator (numpy.random.Generator) with the methods of
+    numpy.random used by the model (rand, randn, randint, uniform, normal,
+    choice, get_state and set_state). The draws differ from numpy.random,
+    because the Generator uses different bit generators and algorithms.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def rand(self, *shape):
+        return(self.generator.random(shape if shape else None))
+
+    def randn(self, *shape):
+        return(self.generator.standard_normal(shape if shape else None))
+
+    def randint(self, low, high=None, size=None):
+        return(self.generator.integers(low, high, size))
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return(self.generator.uniform(low, high, size))
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return(self.generator.normal(loc, scale, size))
+
+    def choice(self, a, size=None, replace=True):
+        return(self.generator.choice(a, size, replace))
+
+    def get_state(self):
+        return(self.generator.bit_generator.state)
+
+    def set_state(self, state):
+        self.generator.bit_generator.state = state
+
+def createGenerator(seed=None, bit_generator='legacy'):
+    """
+    Random number generator for the model, seeded with seed (integer, array
+    or SeedSequence). In legacy mode, the generator is a RandomState, which
+    draws exactly the same random numbers as numpy.random after
+    numpy.random.seed(seed). Otherwise, a Generator with the given bit
+    generator of numpy.random (e.g. 'PCG64', 'Philox', 'SFC64') is used.
+    """
+    if bit_generator == 'legacy':
+        if isinstance(seed, np.random.SeedSequence):
+            seed = seed.generate_state(4)
+        return(np.random.RandomState(seed))
+    return(GeneratorAdapter(np.random.Generator(
+        getattr(np.random, bit_generator)(seed))))
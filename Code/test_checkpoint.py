@@ -0,0 +1,107 @@
+#%% TESTS OF THE CHECKPOINTS
+#%%
+
+"""
+Regression tests of the checkpoints (see saveCheckpoint): an interrupted 
+runSweep or runIntervention continues with the same results as an 
+uninterrupted run if it is repeated with the same checkpoint directory. Run
+with python -m pytest from this directory.
+"""
+
+#%% [0] Required imports
+
+import os
+import glob
+import numpy as np
+import numpy.random as rd
+import pytest
+
+import additional_methods
+from additional_methods import runSweep, runIntervention
+from parameters import outputs
+
+#%% [1] Methods for the tests
+
+class Interruption(Exception):
+    pass
+
+def interrupt(monkeypatch, months):
+    """
+    Interrupt the simulations after the given number of simulated months 
+    (all simulations of the run).
+    """
+    simulateMonth = additional_methods.simulateMonth
+    calls = [0]
+    def simulateMonthInterrupted(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] > months:
+            raise Interruption()
+        return(simulateMonth(*args, **kwargs))
+    monkeypatch.setattr(additional_methods, 'simulateMonth', 
+                        simulateMonthInterrupted)
+
+def truncateWrite(checkpoint):
+    """
+    Leave a truncated temporary file next to every checkpoint (interruption
+    while a checkpoint is written, see saveCheckpoint).
+    """
+    for file in glob.glob(str(checkpoint) + '/**/*.npz', recursive=True):
+        with open(file, 'rb') as f:
+            data = f.read()
+        with open(file + '.tmp', 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+def runInterrupted(monkeypatch, run, checkpoint, cuts):
+    """
+    Run (function of the checkpoint directory) once per element of cuts, 
+    each interrupted after the given number of months, and repeat it until
+    it is finished. Returns the results of the last run.
+    """
+    for months in cuts:
+        with monkeypatch.context() as m:
+            interrupt(m, months)
+            with pytest.raises(Interruption):
+                run(checkpoint)
+        truncateWrite(checkpoint)
+    return(run(checkpoint))
+
+#%% [2] Tests
+
+@pytest.mark.parametrize('n_processes', [None, 1])
+def test_checkpoint_sweep(monkeypatch, tmp_path, n_processes):
+    # checkpoints within the simulations (every 2 months)
+    monkeypatch.setattr(additional_methods, 'checkpoint_interval', 2)
+    monkeypatch.setattr(additional_methods, 'n_processes', n_processes)
+    def run(checkpoint):
+        rd.seed(1)
+        return(runSweep('state_price', [900, 1100], 2, checkpoint = 
+                        checkpoint, months = 6, initialization_period = 2, 
+                        state_price = 1000, share_state_apartments = 0.1,
+                        inc_factor_state = 4, outputs = outputs, 
+                        max_increase = 1.1))
+    results = run(None)
+    results_c = runInterrupted(monkeypatch, run, tmp_path, [3, 5, 5])
+    # one checkpoint directory per value
+    assert sorted(os.listdir(tmp_path)) == ['value_1', 'value_2']
+    for output in outputs:
+        assert np.array_equal(results[output], results_c[output])
+
+def test_checkpoint_intervention(monkeypatch, tmp_path):
+    monkeypatch.setattr(additional_methods, 'checkpoint_interval', 2)
+    def run(checkpoint):
+        rd.seed(2)
+        return(runIntervention(months_before_intervention = 5, 
+                               months_after_intervention = 4, 
+                               simulations = 2, initialization_period = 1, 
+                               state_price = 1000, 
+                               share_state_apartments = 0.1, 
+                               inc_factor_state = 4, outputs = outputs, 
+                               new_apartments = 20, max_increase = 1.1, 
+                               checkpoint = checkpoint))
+    results_int, results_no_int, _, _ = run(None)
+    results_int_c, results_no_int_c, _, _ = runInterrupted(
+        monkeypatch, run, tmp_path, [3, 5, 5, 5])
+    for output in outputs:
+        assert np.array_equal(results_int[output], results_int_c[output])
+        assert np.array_equal(results_no_int[output], 
+                              results_no_int_c[output])
@@ -0,0 +1,49 @@
+#%% TESTS OF THE POLICY INTERVENTION
+#%%
+
+"""
+Regression tests of runIntervention with other outputs than the outputs of 
+the policy evaluation (a subset and registered metrics), with and without 
+online aggregation of the results. Run with python -m pytest from this 
+directory.
+"""
+
+#%% [0] Required imports
+
+import numpy as np
+import numpy.random as rd
+import pytest
+
+import additional_methods
+from additional_methods import runIntervention, registerMetric, metrics
+
+# short simulations (2 months before and 3 months after the intervention)
+settings = dict(months_before_intervention = 4, months_after_intervention = 3,
+                simulations = 2, initialization_period = 2, state_price = 1000,
+                share_state_apartments = 0.1, inc_factor_state = 4, 
+                new_apartments = 20, max_increase = 1.1)
+
+#%% [1] Tests
+
+@pytest.mark.parametrize('aggregate', [False, True])
+@pytest.mark.parametrize('outputs', [['vacancy_rate_t'], 
+                                     ['mean_price', 'n_available']])
+def test_intervention_outputs(monkeypatch, aggregate, outputs):
+    # metric which is not part of the standard outputs
+    monkeypatch.setitem(metrics, 'n_available', None)
+    registerMetric('n_available', 
+                   lambda e: np.count_nonzero(e['available']))
+    monkeypatch.setattr(additional_methods, 'aggregate', aggregate)
+    rd.seed(0)
+    results_int, results_no_int, _, _ = runIntervention(outputs = outputs,
+                                                        **settings)
+    for results in (results_int, results_no_int):
+        for output in outputs:
+            if aggregate:
+                values = results.mean(output)
+                assert results.count == 2
+            else:
+                values = np.asarray(results[output])
+                assert values.shape[0] == 2
+            assert values.shape[-1] == 5
+            assert np.all(values > 0)
@@ -0,0 +1,33 @@
+#%% TESTS OF THE PARALLEL SIMULATIONS
+#%%
+
+"""
+Regression tests of runSimulations with one seed stream per simulation 
+(n_processes in the parameters). Run with python -m pytest from this 
+directory.
+"""
+
+#%% [0] Required imports
+
+import numpy.random as rd
+
+import additional_methods
+from additional_methods import runSimulations
+from parameters import outputs
+
+# short simulations
+settings = dict(months = 4, simulations = 2, initialization_period = 1, 
+                state_price = 1000, share_state_apartments = 0.1, 
+                inc_factor_state = 4, outputs = outputs, max_increase = 1.1,
+                seed = 3)
+
+#%% [1] Tests
+
+def test_parallel_random_state(monkeypatch):
+    # simulations in the current process do not draw from numpy.random
+    monkeypatch.setattr(additional_methods, 'n_processes', 1)
+    rd.seed(0)
+    runSimulations(**settings)
+    draw = rd.rand()
+    rd.seed(0)
+    assert draw == rd.rand()
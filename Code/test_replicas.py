@@ -0,0 +1,33 @@
+#%% TESTS OF THE LOCKSTEP ENGINE
+#%%
+
+"""
+Regression tests of the lockstep simulations (see replicas.py). Run with
+python -m pytest from this directory.
+"""
+
+#%% [0] Required imports
+
+import numpy as np
+import numpy.random as rd
+
+import additional_methods
+from additional_methods import runSimulations, registerMetric, metrics
+
+#%% [1] Tests
+
+def test_lockstep_registered_metric(monkeypatch):
+    # metric which is not part of the standard outputs
+    monkeypatch.setitem(metrics, 'n_available', None)
+    registerMetric('n_available', 
+                   lambda e: np.count_nonzero(e['available']))
+    monkeypatch.setattr(additional_methods, 'lockstep', True)
+    rd.seed(0)
+    results_all = runSimulations(
+        months = 4, simulations = 3, initialization_period = 1, 
+        state_price = 1000, share_state_apartments = 0.1, 
+        inc_factor_state = 4, outputs = ['vacancy_rate_t', 'n_available'], 
+        max_increase = 1.1)[0]
+    n_available = np.array(results_all['n_available'])
+    assert n_available.shape == (3, 3)
+    assert np.all(n_available > 0)
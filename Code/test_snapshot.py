@@ -0,0 +1,96 @@
+#%% TESTS OF THE POPULATION SNAPSHOTS
+#%%
+
+"""
+Regression tests of the copy-on-write snapshots of the populations (see 
+Population.snapshot), as used by runIntervention: the simulations after a 
+restored snapshot do not change the snapshot, and give the same results as
+simulations of deep copies. Without the population update (no agents leave
+or join, which replaces all arrays), every method of the agents modifies the
+shared arrays of the snapshot. Run with python -m pytest from this directory.
+"""
+
+#%% [0] Required imports
+
+import copy
+import numpy as np
+import pytest
+
+import additional_methods
+from additional_methods import (initializeModel, simulateMonth, 
+                                constructStateApartments, evaluateMonth)
+from parameters import outputs
+
+#%% [1] Methods for the tests
+
+def runBranch(renters, landlords, seed, new_apartments=0):
+    """
+    Simulate three months after the (non-)intervention with the random 
+    number generator seeded with seed. Returns the results of every month 
+    and the populations.
+    """
+    rng = np.random.RandomState(seed)
+    if new_apartments > 0:
+        landlords = constructStateApartments(landlords, new_apartments, 1000,
+                                             rng)
+    results = []
+    for m in range(1, 4):
+        renters, landlords = simulateMonth(renters, landlords, m, 4, 1.1, 
+                                           1000, rng=rng)
+        results.append(evaluateMonth(renters, landlords, outputs))
+    return(results, renters, landlords)
+
+def getValues(population):
+    # copies of all attributes of the population
+    return({name: np.array(getattr(population, name)) 
+            for name in population.attributes})
+
+def assertEqual(values, population):
+    for name in population.attributes:
+        assert np.array_equal(values[name], getattr(population, name)), name
+
+#%% [2] Tests
+
+def keepPopulation(renters, landlords, rng=None):
+    # population update without leaving and joining agents
+    return(renters, landlords)
+
+@pytest.mark.parametrize('compact_mode', [False, True])
+@pytest.mark.parametrize('population_update', [True, False])
+def test_snapshot_restore(monkeypatch, compact_mode, population_update):
+    monkeypatch.setattr(additional_methods, 'compact_mode', compact_mode)
+    if not population_update:
+        monkeypatch.setattr(additional_methods, 'updatePopulation', 
+                            keepPopulation)
+        monkeypatch.setattr(additional_methods, 'updateApartments', 
+                            keepPopulation)
+    rng = np.random.RandomState(0)
+    renters, landlords = initializeModel(500, 500, 0.1, 1000, rng)
+    for m in range(4):
+        renters, landlords = simulateMonth(renters, landlords, m, 4, 1.1, 
+                                           1000, rng=rng)
+    # snapshots (shared arrays) and deep copies of the populations
+    renters_copy, landlords_copy = renters.snapshot(), landlords.snapshot()
+    renters_deep, landlords_deep = copy.deepcopy((renters, landlords))
+    renters_values, landlords_values = getValues(renters), getValues(landlords)
+    # intervention and no intervention from the same snapshot
+    results_int, renters, landlords = runBranch(renters, landlords, 1, 20)
+    landlords.restore(landlords_copy)
+    renters.restore(renters_copy)
+    results_no_int, renters, landlords = runBranch(renters, landlords, 2)
+    # the snapshots are not changed by the simulations
+    assertEqual(renters_values, renters_copy)
+    assertEqual(landlords_values, landlords_copy)
+    # same results as the simulations of deep copies
+    results_int_deep, _, _ = runBranch(*copy.deepcopy((renters_deep, 
+                                                       landlords_deep)), 1, 20)
+    results_no_int_deep, renters_d, landlords_d = runBranch(
+        renters_deep, landlords_deep, 2)
+    assert results_int == results_int_deep
+    assert results_no_int == results_no_int_deep
+    assertEqual(getValues(renters_d), renters)
+    assertEqual(getValues(landlords_d), landlords)
+    # a restored snapshot can be simulated again with the same results
+    landlords.restore(landlords_copy)
+    renters.restore(renters_copy)
+    assert runBranch(renters, landlords, 1, 20)[0] == results_int
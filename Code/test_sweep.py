@@ -0,0 +1,38 @@
+#%% TESTS OF THE OFAT SWEEP
+#%%
+
+"""
+Regression tests of runSweep with online aggregation of the results
+(aggregate in the parameters), for the sequential and the parallel runs and
+for results stored on disk. Run with python -m pytest from this directory.
+"""
+
+#%% [0] Required imports
+
+import numpy as np
+import numpy.random as rd
+import pytest
+
+import additional_methods
+from additional_methods import runSweep
+from parameters import outputs
+
+# short simulations (the results are not evaluated)
+settings = dict(months = 4, initialization_period = 1, state_price = 1000,
+                share_state_apartments = 0.1, inc_factor_state = 4,
+                outputs = outputs, max_increase = 1.1)
+
+#%% [1] Tests
+
+@pytest.mark.parametrize('n_processes', [None, 1])
+@pytest.mark.parametrize('stored', [False, True])
+def test_sweep_aggregate(monkeypatch, tmp_path, n_processes, stored):
+    monkeypatch.setattr(additional_methods, 'aggregate', True)
+    monkeypatch.setattr(additional_methods, 'n_processes', n_processes)
+    rd.seed(0)
+    results_ofat = runSweep('state_price', [900, 1100], 2, seed = 1,
+                            path = str(tmp_path) if stored else None,
+                            **settings)
+    # results of every simulation for every value
+    for output in outputs:
+        assert np.asarray(results_ofat[output]).shape == (2, 2, 3)